@@ -0,0 +1,143 @@
+# ai_cache.py (AI 응답 캐시: 프롬프트 해시 → 완료된 생성 결과 / 동시 요청 병합)
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_CACHE_DIR = ".ai_cache"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+CACHE_HIT = "hit"             # 디스크에 저장된 완료 응답을 즉시 재생
+CACHE_COALESCED = "coalesced" # 진행 중인 같은 프롬프트의 생성에 합류
+CACHE_MISS = "miss"           # 새로 생성 (완료되면 저장)
+
+def prompt_key(prompt, model_name=""):
+    """모델 이름 + 프롬프트의 SHA-256"""
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode('utf-8')).hexdigest()
+
+class _InflightGeneration:
+    """진행 중인 생성 1건: 받은 조각을 쌓아 두고 모든 구독자에게 전달"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Condition()
+
+    async def subscribe(self):
+        position = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: position < len(self.chunks) or self.done)
+                pending = self.chunks[position:]
+                finished = self.done
+            for text in pending:
+                yield text
+            position += len(pending)
+            if finished and position >= len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+class AIResponseCache:
+    """
+    프롬프트 해시를 키로 완료된 AI 응답(텍스트 조각 목록)을 디스크에 TTL과 함께 저장하고,
+    같은 프롬프트의 동시 요청은 업스트림 스트림 하나를 모든 클라이언트에 나눠 줍니다.
+    (단일 이벤트 루프 기준: uvicorn 워커 1개)
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS, model_name=""):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.model_name = model_name
+        self._inflight = {} # key -> _InflightGeneration
+        self._tasks = set() # 실행 중인 업스트림 태스크 (가비지 컬렉션 방지용 참조)
+        self.hits = 0; self.misses = 0; self.coalesced = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # --- 1. 디스크 저장소 ---
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key):
+        """만료되지 않은 저장 응답의 조각 목록 (없으면 None)"""
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.ttl_seconds is not None and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        return entry.get("chunks")
+
+    def save(self, key, chunks):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"created_at": time.time(), "chunks": chunks}, f, ensure_ascii=False)
+            os.replace(tmp_path, path) # ⭐️ 원자적 교체
+        except OSError as e:
+            print(f"⚠️ AI 응답 캐시 저장 실패: {e}")
+
+    # --- 2. 스트림 열기 (캐시 재생 / 합류 / 새 생성) ---
+
+    def open_stream(self, prompt, producer):
+        """
+        producer: 호출하면 텍스트 조각을 내보내는 비동기 이터레이터를 반환하는 함수 (예: lambda: stream_text(model, prompt))
+        반환: (CACHE_HIT | CACHE_COALESCED | CACHE_MISS, 텍스트 조각 비동기 이터레이터)
+        """
+        key = prompt_key(prompt, self.model_name)
+        chunks = self.load(key)
+        if chunks is not None:
+            self.hits += 1
+            return CACHE_HIT, _replay(chunks)
+
+        generation = self._inflight.get(key)
+        if generation is not None:
+            self.coalesced += 1
+            return CACHE_COALESCED, generation.subscribe()
+
+        self.misses += 1
+        generation = _InflightGeneration()
+        self._inflight[key] = generation
+        # ⭐️ 업스트림 소비는 별도 태스크: 처음 요청한 클라이언트가 끊겨도 합류한 클라이언트는 계속 받음
+        task = asyncio.get_running_loop().create_task(self._generate(key, generation, producer))
+        self._tasks.add(task); task.add_done_callback(self._tasks.discard)
+        return CACHE_MISS, generation.subscribe()
+
+    async def _generate(self, key, generation, producer):
+        try:
+            async for text in producer():
+                async with generation.changed:
+                    generation.chunks.append(text)
+                    generation.changed.notify_all()
+            if generation.chunks: # ⭐️ 빈 응답은 저장하지 않음 (실패 시에는 여기까지 오지 않음)
+                await asyncio.to_thread(self.save, key, generation.chunks)
+        except Exception as e:
+            generation.error = e
+        finally:
+            # ⭐️ 저장이 끝난 뒤에 진행 목록에서 제거 (그 사이 들어온 요청이 중복 생성하지 않도록)
+            del self._inflight[key]
+            async with generation.changed:
+                generation.done = True
+                generation.changed.notify_all()
+
+    def stats(self):
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+            "inflight": len(self._inflight), "ttl_seconds": self.ttl_seconds,
+            "upstream_saved_rate": ((self.hits + self.coalesced) / total) if total else 0.0,
+        }
+
+async def _replay(chunks):
+    for text in chunks:
+        yield text
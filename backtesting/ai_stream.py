@@ -0,0 +1,76 @@
+# ai_stream.py (AI 응답 비동기 스트리밍 + 로컬 테스트용 가짜 모델)
+
+import asyncio
+import threading
+
+DEFAULT_FAKE_CHUNKS = (
+    "안녕하세요! 전문 자산 관리 어드바이저입니다.\n\n",
+    "(테스트 모델 응답) 백테스트 결과를 바탕으로 ",
+    "포트폴리오의 수익률과 최대 손실폭을 살펴보겠습니다.\n\n",
+    "채권과 현금 비중이 하락장에서 손실을 완화했습니다.",
+)
+
+class _FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStreamingModel:
+    """
+    Gemini GenerativeModel 대신 쓰는 로컬 모델. (API 키 없이 스트리밍/동시 접속 테스트용)
+    chunks를 chunk_delay 간격(첫 조각은 first_delay 후)으로 내보냅니다.
+    """
+
+    def __init__(self, chunks=DEFAULT_FAKE_CHUNKS, chunk_delay=0.05, first_delay=0.0):
+        self.chunks = list(chunks)
+        self.chunk_delay = chunk_delay
+        self.first_delay = first_delay
+        self.calls = 0 # 호출 횟수 (캐시/요청 병합 확인용)
+
+    async def generate_content_async(self, prompt, stream=True):
+        self.calls += 1
+        return self._stream()
+
+    async def _stream(self):
+        await asyncio.sleep(self.first_delay)
+        for i, text in enumerate(self.chunks):
+            if i: await asyncio.sleep(self.chunk_delay)
+            yield _FakeChunk(text)
+
+async def _iterate_in_thread(sync_iterable):
+    """동기 스트림(generate_content(stream=True))을 스레드에서 소비하고 큐로 이벤트 루프에 전달하는 브리지"""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for item in sync_iterable:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+
+    threading.Thread(target=pump, daemon=True).start()
+    while True:
+        item = await queue.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+async def stream_text(model, prompt):
+    """
+    모델 응답을 텍스트 조각 단위로 비동기로 내보냅니다.
+    비동기 클라이언트(generate_content_async)가 있으면 사용하고, 없으면 동기 스트림을 스레드 브리지로 소비합니다.
+    """
+    if hasattr(model, 'generate_content_async'):
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+    else:
+        sync_response = await asyncio.to_thread(model.generate_content, prompt, stream=True)
+        async for chunk in _iterate_in_thread(sync_response):
+            if chunk.text:
+                yield chunk.text
@@ -2,55 +2,95 @@
 
 import pandas as pd
 import numpy as np
-from flask import Flask, jsonify, request, Response
-from flask_cors import CORS
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 import os
 import json 
+import asyncio
 import google.generativeai as genai
-import time
 from dotenv import load_dotenv
+from backtest_engine import run_rebalancing_backtest_vectorized, run_batch_backtest, history_to_records, HISTORY_COLUMNS
+from backtest_cache import BacktestCache, make_cache_key, file_mtimes
+from portfolio_optimizer import optimize_portfolio, simplex_grid_size
+from rolling_analysis import run_rolling_analysis, validate_horizons, DEFAULT_HORIZONS_YEARS
+from price_store import load_price_frame, price_columns
+from rate_curve import RateCurve, DEFAULT_RATE_CURVE
+from rebalance_schedule import resolve_rebalance_indices, CALENDAR_FREQS, LEGACY_SCHEDULE
+from monte_carlo import run_monte_carlo, DEFAULT_NUM_PATHS
+from crash_analytics import analyze_crash_periods, period_returns, drawdown_episodes, PORTFOLIO_RETURN_KEYS
+from risk_metrics import compute_risk_metrics
+from job_queue import JobQueue
+from ai_stream import stream_text, FakeStreamingModel
+from ai_cache import AIResponseCache, CACHE_HIT
+from payload_format import (
+    negotiate_format, negotiate_encoding, to_columnar_payload, compress, make_etag, etag_matches, dumps_json,
+    FORMAT_ROWS, FORMAT_COLUMNAR, COLUMNAR_MIME,
+)
 
 load_dotenv()
 
 gemini_api_key = os.getenv("GEMINI_API_KEY")  # ⭐️ (환경변수에서 API 키 로드)
 
 # --- 0. AI 설정 (Gemini) ---
-try:
-    genai.configure(api_key=gemini_api_key)
-    model = genai.GenerativeModel('models/gemini-flash-latest') 
-except Exception as e:
-    print(f"⚠️ AI 모델 로드 실패: {e}. API 키를 확인하세요.")
-    model = None
+# ⭐️ [신규] AI_MODEL=fake 이면 API 키 없이 로컬 가짜 모델 사용 (AI_FAKE_DELAY: 조각 간 지연 초)
+AI_STREAM_PACING_SECONDS = 0.02 # 조각 사이 최소 간격 (프런트엔드 타이핑 효과)
+AI_MODEL_NAME = 'models/gemini-flash-latest'
+if os.getenv("AI_MODEL") == "fake":
+    AI_MODEL_NAME = "fake"
+    model = FakeStreamingModel(chunk_delay=float(os.getenv("AI_FAKE_DELAY", "0.05")))
+else:
+    try:
+        genai.configure(api_key=gemini_api_key)
+        model = genai.GenerativeModel(AI_MODEL_NAME) 
+    except Exception as e:
+        print(f"⚠️ AI 모델 로드 실패: {e}. API 키를 확인하세요.")
+        model = None
+
+# ⭐️ [신규] 프롬프트 해시 → 완료된 AI 응답 캐시 (디스크, TTL) + 같은 프롬프트 동시 요청 병합
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+g_ai_response_cache = AIResponseCache(ttl_seconds=AI_CACHE_TTL_SECONDS, model_name=AI_MODEL_NAME)
 
-g_ai_prompt_cache = None
-g_backtest_result_cache = None # ⭐️ 반복 계산 방지 캐시
+# ⭐️ [수정] 단일 전역 캐시 대신, 백테스트 입력 파라미터(+CSV mtime) 해시를 키로 쓰는 LRU/TTL 캐시
+#    값: {"result": API 응답 데이터, "prompt": AI 분석용 프롬프트}
+g_backtest_cache = BacktestCache(max_entries=64, ttl_seconds=60 * 60)
+# ⭐️ [수정] 일괄 백테스트용 가격 데이터 캐시: 자산 목록별 (CSV mtime, price_df)
+g_price_df_cache = BacktestCache(max_entries=16, ttl_seconds=None)
 
 # --- 1. 백테스팅 함수 (이전과 동일) ---
 
+# ⭐️ [수정] 기준금리 이력은 rate_curve 모듈에서 관리 (BASE_RATE_FILE 환경변수로 CSV 이력 지정 가능)
+BASE_RATE_FILE = os.getenv("BASE_RATE_FILE")
+g_rate_curve = (None, DEFAULT_RATE_CURVE) # (BASE_RATE_FILE mtime, RateCurve)
+
+def current_rate_curve():
+    """BASE_RATE_FILE이 있으면 그 이력 (파일이 바뀌면 다시 읽음), 없으면 기본 이력"""
+    global g_rate_curve
+    if not BASE_RATE_FILE:
+        return DEFAULT_RATE_CURVE
+    mtime = file_mtimes(BASE_RATE_FILE)[BASE_RATE_FILE]
+    if g_rate_curve[0] != mtime:
+        g_rate_curve = (mtime, RateCurve.from_csv(BASE_RATE_FILE))
+    return g_rate_curve[1]
+
+def source_files():
+    """백테스트 결과가 의존하는 원본 파일 (캐시 키/가격 캐시 무효화에 사용)"""
+    return (ETF_FILE, KOSPI_FILE) + ((BASE_RATE_FILE,) if BASE_RATE_FILE else ())
+
 def create_daily_base_rate_series(start_date, end_date):
-    # (이전과 동일... 기준금리 이력)
-    rate_history = {
-        '2021-11-25': 1.00, '2022-01-14': 1.25, '2022-04-14': 1.50,
-        '2022-05-26': 1.75, '2022-07-13': 2.25, '2022-08-25': 2.50,
-        '2022-10-12': 3.00, '2022-11-24': 3.25, '2023-01-13': 3.50,
-        '2024-10-11': 3.25, '2024-11-28': 3.00, '2025-02-25': 2.75,
-        '2025-05-29': 2.50,
-    }
-    all_days = pd.date_range(start=start_date, end=end_date, freq='D')
-    rate_series = pd.Series(index=all_days, name="base_rate")
-    for date_str, rate in rate_history.items():
-        rate_series.loc[rate_series.index >= pd.to_datetime(date_str)] = rate
-    rate_series.ffill(inplace=True) 
-    return rate_series / 100.0
-
-def load_data(etf_file, kospi_file, start_date, end_date):
+    # ⭐️ [수정] 변경일마다 전체 날짜 마스크를 씌우는 대신 searchsorted 한 번으로 계단 함수 생성 (기간별 캐시)
+    return current_rate_curve().daily_series(start_date, end_date)
+
+def load_data(etf_file, kospi_file, start_date, end_date, assets=None):
     # (이전과 동일... CSV 로드)
     try:
-        df_etf = pd.read_csv(etf_file, index_col='Date', parse_dates=True)
-        df_kospi = pd.read_csv(kospi_file, index_col='Date', parse_dates=True)
-        assets_to_use = ['226490', '114260', '363570']
-        df_etf = df_etf[assets_to_use]
+        # ⭐️ [수정] 매번 CSV를 파싱하지 않고, 컬럼형 바이너리 저장소(.npy mmap)에서 로드
+        # ⭐️ [수정] 고정 3종목 대신 포트폴리오가 참조하는 종목 컬럼만 로드 (넓은 가격 파일에서도 비용 동일)
+        assets_to_use = list(assets) if assets is not None else portfolio_assets(TARGET_WEIGHTS)
+        df_etf = load_price_frame(etf_file, assets_to_use)
+        df_kospi = load_price_frame(kospi_file)
         if 'KOSPI' not in df_kospi.columns:
             df_kospi.rename(columns={df_kospi.columns[0]: 'KOSPI'}, inplace=True)
         price_df = pd.concat([df_etf, df_kospi['KOSPI']], axis=1)
@@ -63,45 +103,9 @@ def load_data(etf_file, kospi_file, start_date, end_date):
         print(f"❌ 데이터 로드 오류: {e}"); return None
 
 def run_monthly_rebalancing_backtest(price_df, initial_capital, target_weights, assets_by_group):
-    # (이전과 동일... 월간 리밸런싱 실행)
-    dates = price_df.index
-    asset_keys = assets_by_group['Stocks'] + assets_by_group['Bonds']
-    cash_weight = target_weights['Cash']
-    current_shares = {asset: 0 for asset in asset_keys}
-    current_cash_value = 0.0
-    portfolio_history = [] 
-    first_date = dates[0]
-    first_prices = price_df.loc[first_date]
-    current_cash_value = initial_capital * cash_weight
-    stock_value = 0.0; bond_value = 0.0
-    for asset in assets_by_group['Stocks']:
-        target_value = initial_capital * target_weights[asset]
-        current_shares[asset] = target_value / first_prices[asset]
-        stock_value += target_value
-    for asset in assets_by_group['Bonds']:
-        target_value = initial_capital * target_weights[asset]
-        current_shares[asset] = target_value / first_prices[asset]
-        bond_value += target_value
-    portfolio_history.append({'date': first_date.strftime('%Y-%m-%d'), 'value': initial_capital, 'stock_value': stock_value, 'bond_value': bond_value, 'cash_value': current_cash_value})
-    for i in range(1, len(dates)):
-        date = dates[i]
-        today_prices = price_df.loc[date]
-        daily_rate = price_df.loc[date, 'base_rate'] / 365.0
-        current_cash_value *= (1 + daily_rate)
-        stock_value = 0.0; bond_value = 0.0
-        for asset in assets_by_group['Stocks']:
-            stock_value += current_shares[asset] * today_prices[asset]
-        for asset in assets_by_group['Bonds']:
-            bond_value += current_shares[asset] * today_prices[asset]
-        current_total_value = stock_value + bond_value + current_cash_value
-        portfolio_history.append({'date': date.strftime('%Y-%m-%d'), 'value': current_total_value, 'stock_value': stock_value, 'bond_value': bond_value, 'cash_value': current_cash_value})
-        is_rebalancing_day = (date.month != (date + pd.Timedelta(days=1)).month)
-        if is_rebalancing_day:
-            current_cash_value = current_total_value * cash_weight
-            for asset in asset_keys:
-                target_value = current_total_value * target_weights[asset]
-                current_shares[asset] = target_value / today_prices[asset]
-    return portfolio_history
+    # ⭐️ [수정] 일별 루프 대신 벡터화 엔진으로 계산 (결과는 기존 루프와 동일한 딕셔너리 리스트)
+    history_df = run_rebalancing_backtest_vectorized(price_df, initial_capital, target_weights, assets_by_group)
+    return history_to_records(history_df)
 
 def calculate_stats(series):
     # (이전과 동일... CAGR, MDD 계산)
@@ -118,8 +122,36 @@ START_DATE = "2019-12-01"; END_DATE = "2025-11-07"
 STOCKS = ['226490']; BONDS = ['114260', '363570']
 ASSETS_BY_GROUP = {'Stocks': STOCKS, 'Bonds': BONDS}
 TARGET_WEIGHTS = {'226490': 0.60, '114260': 0.15, '363570': 0.15, 'Cash': 0.10 }
+
+def portfolio_assets(target_weights):
+    """비중 딕셔너리가 참조하는 종목 목록 ('Cash' 제외, 가격 파일에서 이 컬럼만 로드)"""
+    return [asset for asset in target_weights if asset != 'Cash']
+
+def universe_assets():
+    """ETF 가격 파일에 들어 있는 전체 종목 (가격 데이터는 읽지 않음)"""
+    return price_columns(ETF_FILE)
+
+def missing_assets(asset_keys):
+    universe = set(universe_assets())
+    return [asset for asset in asset_keys if asset not in universe]
+# ⭐️ [신규] 리밸런싱 일정: 'weekly' / 'monthly' / 'quarterly' / 'annual' (각 기간의 마지막 '거래일')
+#    또는 {'type': 'band', 'band': 0.05, 'check': 'monthly'} (비중 이탈 밴드)
+#    ('legacy_month_end'는 이전 규칙: 말일이 휴장일인 달은 리밸런싱을 건너뜀)
+REBALANCE_SCHEDULE = 'monthly'
+MAX_SIMULATION_PATHS = 200_000 # ⭐️ 몬테카를로 요청당 최대 경로 수
+MAX_STRESS_PERIODS = 1_000 # ⭐️ 스트레스 구간 요청당 최대 개수
+MAX_OPTIMIZE_CANDIDATES = 200_000 # ⭐️ 최적화 요청당 최대 격자 후보 수 (자산 3개 + Cash, step 0.01 ≈ 17.7만)
 INITIAL_CAPITAL = 100_000_000
 
+# ⭐️ [신규] 리밸런싱 매매 비용 (매매 금액 대비 비율)
+#    - 국내 상장 ETF는 증권거래세 면제이므로 sell_tax는 0. 개별 주식을 쓸 경우 0.0015(코스피 기준)로 설정
+TRADING_COSTS = {
+    'commission': 0.00015, # 증권사 수수료 (매수/매도 각각)
+    'slippage': 0.0005,    # 호가 스프레드 절반 수준의 체결 슬리피지
+    'sell_tax': 0.0,       # 증권거래세 (매도 시에만)
+    'taxed_assets': STOCKS,
+}
+
 # ⭐️ [신규] 사용자가 요청한 하락장 음영 구간
 CRASH_PERIODS = [
     {"name": "코로나19 급락장", "start": "2020-02-14", "end": "2020-03-19"},
@@ -130,77 +162,19 @@ CRASH_PERIODS = [
 # --- 3. ⭐️ AI 분석 함수 (수정) ---
 
 def find_analysis_data(portfolio_history, benchmark_history, user_crash_periods):
-    """(수정) 벤치마크의 (1)최악의 하락 '기간', (2)최악의 '하루', (3)사용자 지정 기간을 모두 분석합니다."""
-    
-    # 1. 시계열 데이터로 변환
-    bm_series = pd.Series({pd.to_datetime(item['date']): item['value'] for item in benchmark_history})
-    pf_df = pd.DataFrame(portfolio_history); pf_df['date'] = pd.to_datetime(pf_df['date']); pf_df = pf_df.set_index('date'); pf_df.index.name = 'Date'
-    
-    # 2. 벤치마크의 MDD (최악의 '기간') 분석
-    bm_peak = bm_series.cummax(); bm_drawdown = (bm_series - bm_peak) / bm_peak
-    mdd_trough_date = bm_drawdown.idxmin(); mdd_peak_date = bm_series.loc[:mdd_trough_date].idxmax()
-    
-    def get_period_return(series, start_date_str, end_date_str):
-        try:
-            # ⭐️ 'asof'는 해당 날짜 혹은 그 이전에 가장 가까운 날짜의 데이터를 찾음 (휴장일 대응)
-            start_date = pd.to_datetime(start_date_str)
-            end_date = pd.to_datetime(end_date_str)
-            
-            # ⭐️ 데이터 범위 밖의 기간을 요청할 경우 np.nan 반환
-            if end_date < series.index.min() or start_date > series.index.max():
-                return np.nan
-                
-            start_val = series.asof(start_date)
-            end_val = series.asof(end_date)
-            
-            if pd.isna(start_val) or pd.isna(end_val): return np.nan
-            return (end_val / start_val) - 1
-        except Exception:
-            return np.nan # 날짜 범위를 벗어나는 등 예외 발생 시
-
-    mdd_period_analysis = {
-        "start_date": mdd_peak_date.strftime('%Y-%m-%d'), "end_date": mdd_trough_date.strftime('%Y-%m-%d'),
-        "benchmark_return": get_period_return(bm_series, mdd_peak_date, mdd_trough_date),
-        "portfolio_return": get_period_return(pf_df['value'], mdd_peak_date, mdd_trough_date),
-        "stock_return": get_period_return(pf_df['stock_value'], mdd_peak_date, mdd_trough_date),
-        "bond_return": get_period_return(pf_df['bond_value'], mdd_peak_date, mdd_trough_date),
-        "cash_return": get_period_return(pf_df['cash_value'], mdd_peak_date, mdd_trough_date)
-    }
-    
-    # 3. 벤치마크의 최악의 '하루' 분석
-    bm_daily_returns = bm_series.pct_change(); pf_daily_returns = pf_df['value'].pct_change()
-    worst_day_date = bm_daily_returns.idxmin()
-    worst_day_analysis = {
-        "date": worst_day_date.strftime('%Y-%m-%d'),
-        "benchmark_return": bm_daily_returns.loc[worst_day_date],
-        "portfolio_return": pf_daily_returns.loc[worst_day_date]
-    }
-    
-    # --- 4. ⭐️ [신규] 사용자가 정의한 하락장 분석 ---
-    user_period_analyses = []
-    for period in user_crash_periods:
-        start_date = period['start']
-        end_date = period['end']
-        
-        analysis = {
-            "name": period['name'],
-            "start_date": start_date,
-            "end_date": end_date,
-            "benchmark_return": get_period_return(bm_series, start_date, end_date),
-            "portfolio_return": get_period_return(pf_df['value'], start_date, end_date),
-            "stock_return": get_period_return(pf_df['stock_value'], start_date, end_date),
-            "bond_return": get_period_return(pf_df['bond_value'], start_date, end_date),
-            "cash_return": get_period_return(pf_df['cash_value'], start_date, end_date),
-        }
-        # ⭐️ 계산된 경우에만(NaN이 아님) 리스트에 추가
-        if not pd.isna(analysis['benchmark_return']):
-            user_period_analyses.append(analysis)
-
-    return mdd_period_analysis, worst_day_analysis, user_period_analyses
-
-
-def generate_ai_analysis_prompt(stats, mdd_period_analysis, worst_day_analysis, user_period_analyses, user_weights):
-    """(수정) AI에게 전달할 프롬프트를 동적으로 생성합니다."""
+    """(수정) 벤치마크의 (1)최악의 하락 '기간', (2)최악의 '하루', (3)사용자 지정 기간을 모두 분석합니다.
+
+    ⭐️ [수정] 계산은 crash_analytics.analyze_crash_periods(컬럼형 입력, searchsorted 한 번)에 위임합니다.
+    (딕셔너리 리스트 입력을 쓰는 기존 호출부 호환용)
+    """
+    dates = pd.DatetimeIndex([item['date'] for item in portfolio_history])
+    portfolio_columns = {key: np.array([item[key] for item in portfolio_history]) for key in HISTORY_COLUMNS}
+    benchmark_values = np.array([item['value'] for item in benchmark_history])
+    return analyze_crash_periods(dates, portfolio_columns, benchmark_values, user_crash_periods)
+
+
+def generate_ai_analysis_prompt(stats, mdd_period_analysis, worst_day_analysis, user_period_analyses, user_weights, risk_metrics=None):
+    """(수정) AI에게 전달할 프롬프트를 동적으로 생성합니다. (risk_metrics가 있으면 위험 지표 섹션 추가)"""
     
     weights_str = f"주식 {user_weights['226490']*100:.0f}%, 채권 {(user_weights['114260'] + user_weights['363570'])*100:.0f}%, 현금 {user_weights['Cash']*100:.0f}%"
     
@@ -214,6 +188,21 @@ def generate_ai_analysis_prompt(stats, mdd_period_analysis, worst_day_analysis,
             f"      (당시 내부 성과: 주식 {analysis['stock_return']:.2%}, 채권 {analysis['bond_return']:.2%}, 현금 {analysis['cash_return']:.2%})\n"
         )
 
+    # ⭐️ [신규] 위험 지표 섹션 (compute_backtest에서 계산한 값 재사용)
+    risk_str = ""
+    if risk_metrics:
+        pm, bm = risk_metrics['portfolio'], risk_metrics['benchmark']
+        fmt = lambda value, spec: format(value, spec) if value is not None else "N/A"
+        risk_str = f"""
+    [6. ⭐️ 위험 지표 (포트폴리오 / KOSPI)]
+    - 연 변동성: {fmt(pm['Volatility'], '.2%')} / {fmt(bm['Volatility'], '.2%')}
+    - 샤프 지수: {fmt(pm['Sharpe'], '.2f')} / {fmt(bm['Sharpe'], '.2f')}
+    - 소르티노 지수: {fmt(pm['Sortino'], '.2f')} / {fmt(bm['Sortino'], '.2f')}
+    - 칼마 지수: {fmt(pm['Calmar'], '.2f')} / {fmt(bm['Calmar'], '.2f')}
+    - 최장 손실 지속 기간: {pm['Max Drawdown Duration Days']}일 / {bm['Max Drawdown Duration Days']}일
+    - KOSPI 대비 베타: {fmt(pm.get('Beta'), '.2f')}, 연 알파: {fmt(pm.get('Alpha'), '.2%')}, 정보비율: {fmt(pm.get('Information Ratio'), '.2f')}
+"""
+
     prompt = f"""
     당신은 전문 자산 관리 어드바이저입니다. 사용자('사용자'라고 불러줘)의 백테스트 결과를 분석하고 친절한 조언을 제공해야 합니다.(단 10줄 이내로 해주시고, 내용별로 단락 띄어쓰기를 해주세요) 첫 인사는 이렇게 해주세요, "안녕하세요! 전문 자산 관리 어드바이저입니다."
 
@@ -243,7 +232,7 @@ def generate_ai_analysis_prompt(stats, mdd_period_analysis, worst_day_analysis,
 
     [5. ⭐️ 사용자 지정 하락장 분석]
     {user_periods_str}
-
+    {risk_str}
     [지시사항]
     위 데이터를 바탕으로, 다음 5가지 항목을 포함하여 리포트를 작성해주세요. (강조를 위해 ** 사용 금지)
 
@@ -254,96 +243,591 @@ def generate_ai_analysis_prompt(stats, mdd_period_analysis, worst_day_analysis,
     """
     return prompt
 
-# --- 4. Flask API 서버 ---
+# --- 4. ⭐️ [수정] API 서버 (Flask → FastAPI/ASGI) ---
+#    계산이 무거운 엔드포인트는 일반 def(스레드 풀에서 실행), 스트리밍은 async def(이벤트 루프 하나를 공유)
+#    실행: uvicorn app:app --host 0.0.0.0 --port 5000
 
-app = Flask(__name__)
-CORS(app) 
+app = FastAPI()
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
-@app.route('/api/backtest')
-def get_backtest_data():
-    """ ⭐️ [수정] 백테스트 실행 + AI 프롬프트 캐시 + '하락장 분석 결과' 반환 """
-    
-    global g_ai_prompt_cache, g_backtest_result_cache
-    
-    # ⭐️ 반복 요청 방지 캐시
-    if g_backtest_result_cache is not None:
-        # print("🔄 캐시된 백테스트 결과를 반환합니다.") # (디버깅용)
-        return jsonify(g_backtest_result_cache)
-    
-    print("⏳ 새로운 백테스트 계산을 시작합니다...")
-    
-    price_df = load_data(ETF_FILE, KOSPI_FILE, START_DATE, END_DATE)
-    if price_df is None: return jsonify({"error": "데이터 파일을 찾을 수 없습니다."}), 500
-        
-    portfolio_history_list = run_monthly_rebalancing_backtest(
-        price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP
+def json_response(data, status_code=200):
+    """기존 jsonify와 같은 JSON 응답 (numpy 값 허용)"""
+    return Response(dumps_json(data), status_code=status_code, media_type='application/json')
+
+async def read_json_body(request):
+    """기존 request.get_json(silent=True) or {} 와 동일: 본문이 없거나 JSON이 아니면 {}
+    ⭐️ [수정] JSON이지만 객체가 아니면(배열/숫자/문자열) None → 호출부에서 invalid_body_response()로 400
+    """
+    try:
+        body = await request.json() or {}
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else None
+
+def invalid_body_response():
+    return json_response({"error": "요청 본문은 JSON 객체여야 합니다."}, 400)
+
+def parse_initial_capital(value):
+    """초기 자본: 양의 유한한 숫자 (아니면 ValueError)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError("initial_capital은 양수여야 합니다.")
+    try:
+        capital = float(value)
+    except ValueError:
+        raise ValueError("initial_capital은 양수여야 합니다.") from None
+    if not np.isfinite(capital) or capital <= 0:
+        raise ValueError("initial_capital은 양수여야 합니다.")
+    return capital
+
+def current_backtest_params():
+    """캐시 키 생성에 쓰이는 백테스트 입력 전체"""
+    return {
+        "target_weights": TARGET_WEIGHTS, "assets_by_group": ASSETS_BY_GROUP,
+        "start_date": START_DATE, "end_date": END_DATE,
+        "initial_capital": INITIAL_CAPITAL, "crash_periods": CRASH_PERIODS,
+        "trading_costs": TRADING_COSTS, "rebalance_schedule": REBALANCE_SCHEDULE,
+    }
+
+def schedule_rebalance_indices(price_df, schedule, target_weights, assets_by_group):
+    asset_keys = assets_by_group['Stocks'] + assets_by_group['Bonds']
+    return resolve_rebalance_indices(price_df, schedule, target_weights, asset_keys)
+
+def backtest_cache_key(params):
+    return make_cache_key(params, source_files=source_files()) # ⭐️ 기준금리 파일이 바뀌어도 새로 계산
+
+def compute_backtest(params):
+    """백테스트 실행 + AI 프롬프트 생성 + '하락장 분석 결과'를 계산합니다. (데이터 로드 실패 시 None)"""
+    assets = params['assets_by_group']['Stocks'] + params['assets_by_group']['Bonds']
+    price_df = load_data(ETF_FILE, KOSPI_FILE, params['start_date'], params['end_date'], assets)
+    if price_df is None: return None
+
+    initial_capital = params['initial_capital']
+    # ⭐️ [수정] 리밸런싱 인덱스를 일정별로 한 번만 계산해 두 백테스트(무비용/비용 반영)에 재사용
+    rebalance_idx = schedule_rebalance_indices(
+        price_df, params['rebalance_schedule'], params['target_weights'], params['assets_by_group']
     )
+    portfolio_history_df = run_rebalancing_backtest_vectorized(
+        price_df, initial_capital, params['target_weights'], params['assets_by_group'], rebalance_idx
+    )
+    portfolio_history_list = history_to_records(portfolio_history_df)
     
-    benchmark_series = (price_df['benchmark'] / price_df['benchmark'].iloc[0]) * INITIAL_CAPITAL
+    benchmark_series = (price_df['benchmark'] / price_df['benchmark'].iloc[0]) * initial_capital
     benchmark_history_list = [
         {'date': date.strftime('%Y-%m-%d'), 'value': value}
         for date, value in benchmark_series.items()
     ]
     
-    portfolio_series_for_stats = pd.Series(
-        [item['value'] for item in portfolio_history_list], 
-        index=pd.to_datetime([item['date'] for item in portfolio_history_list])
-    )
-    stats_portfolio = calculate_stats(portfolio_series_for_stats)
+    stats_portfolio = calculate_stats(portfolio_history_df['value'])
     stats_benchmark = calculate_stats(benchmark_series)
+    # ⭐️ [신규] 위험 지표 (변동성/샤프/소르티노/칼마/베타/알파/추적오차/드로다운 기간/월별·연도별 수익률)
+    dates = portfolio_history_df.index
+    base_rates = price_df['base_rate'].to_numpy()
+    risk_metrics = {
+        "portfolio": compute_risk_metrics(dates, portfolio_history_df['value'].to_numpy(), base_rates, benchmark_series.to_numpy()),
+        "benchmark": compute_risk_metrics(dates, benchmark_series.to_numpy(), base_rates),
+    }
+
+    # ⭐️ [신규] 같은 전략에 매매 비용을 반영한 결과 (비용은 리밸런싱 시점에서만 계산)
+    costed_history_df = run_rebalancing_backtest_vectorized(
+        price_df, initial_capital, params['target_weights'], params['assets_by_group'], rebalance_idx,
+        costs=params['trading_costs']
+    )
+    trading_cost_summary = {
+        "config": params['trading_costs'],
+        "stats": calculate_stats(costed_history_df['value']),
+        "total_cost": float(costed_history_df['trading_cost'].iloc[-1]),
+        "total_turnover": float(costed_history_df['turnover'].iloc[-1]),
+    }
     
     # AI 프롬프트 생성 (및 하락장 분석 데이터 생성)
     user_period_analyses = [] # ⭐️ AI 분석 함수가 실패할 경우를 대비해 초기화
     try:
-        mdd_period_analysis, worst_day_analysis, user_period_analyses = find_analysis_data(
-            portfolio_history_list, benchmark_history_list, CRASH_PERIODS
+        mdd_period_analysis, worst_day_analysis, user_period_analyses = analyze_crash_periods(
+            portfolio_history_df.index, portfolio_history_df, benchmark_series.to_numpy(), params['crash_periods']
         )
-        g_ai_prompt_cache = generate_ai_analysis_prompt(
+        prompt = generate_ai_analysis_prompt(
             {"portfolio": stats_portfolio, "benchmark": stats_benchmark}, 
             mdd_period_analysis, 
             worst_day_analysis, 
             user_period_analyses,
-            TARGET_WEIGHTS
+            params['target_weights'],
+            risk_metrics
         )
-        print("✅ AI 프롬프트가 성공적으로 캐시되었습니다.")
+        print("✅ AI 프롬프트가 성공적으로 생성되었습니다.")
     except Exception as e:
         print(f"❌ AI 프롬프트 생성 중 오류: {e}")
-        g_ai_prompt_cache = None
+        prompt = None
 
     # ⭐️ [수정] 프런트엔드에 '하락장 분석 결과' 데이터 추가 전달
     result_data = {
         "portfolio_history": portfolio_history_list,
         "benchmark_history": benchmark_history_list,
         "stats": { "portfolio": stats_portfolio, "benchmark": stats_benchmark },
-        "crash_period_results": user_period_analyses # ⭐️ AI가 분석한 '결과'를 전달
+        "crash_period_results": user_period_analyses, # ⭐️ AI가 분석한 '결과'를 전달
+        "trading_costs": trading_cost_summary, # ⭐️ 비용 반영 성과 (stats와 비교용)
+        "risk_metrics": risk_metrics # ⭐️ 위험 지표
     }
+    # ⭐️ [신규] 컬럼형 응답용 원본 배열 (날짜 배열 1개 + 시리즈별 배열)
+    columns = {
+        "index": portfolio_history_df.index,
+        "dates": portfolio_history_df.index.strftime('%Y-%m-%d').tolist(),
+        "portfolio": {col: portfolio_history_df[col].to_numpy() for col in HISTORY_COLUMNS},
+        "benchmark": {"value": benchmark_series.to_numpy()},
+    }
+    return {"result": result_data, "prompt": prompt, "columns": columns, "encoded": {}}
+
+@app.get('/api/backtest')
+def get_backtest_data(request: Request):
+    """ ⭐️ [수정] 파라미터 키 캐시 조회 → 없으면 백테스트 실행 후 캐시 """
     
-    g_backtest_result_cache = result_data # ⭐️ 결과 캐시
-    return jsonify(result_data)
+    cached = get_or_compute_backtest(current_backtest_params())
+    if cached is None: return json_response({"error": "데이터 파일을 찾을 수 없습니다."}, 500)
+    return build_backtest_response(request, cached)
+
+def get_or_compute_backtest(params):
+    """캐시 항목을 반환하고, 없으면 계산 후 캐시합니다. (데이터 로드 실패 시 None)"""
+    cache_key = backtest_cache_key(params)
+    cached = g_backtest_cache.get(cache_key)
+    if cached is None:
+        print("⏳ 새로운 백테스트 계산을 시작합니다...")
+        cached = compute_backtest(params)
+        if cached is None: return None
+        g_backtest_cache.set(cache_key, cached) # ⭐️ 결과 + 프롬프트 캐시
+    return cached
+
+@app.post('/api/stress')
+async def stress_periods_api(request: Request):
+    """ ⭐️ [신규] 사용자 지정 스트레스 구간(여러 개)의 수익률 + 벤치마크 상위 N개 드로다운 에피소드
+
+    요청 예시: {"periods": [{"name": "코로나", "start": "2020-02-14", "end": "2020-03-19"}, ...], "top_n": 5}
+    """
+    body = await read_json_body(request)
+    if body is None: return invalid_body_response()
+    return await run_in_threadpool(stress_periods, body)
+
+def stress_periods(body):
+    periods = body.get('periods', [])
+    top_n = body.get('top_n', 5)
+    # ⭐️ top_n: 양의 정수 (정수 문자열 허용, 불리언/소수는 거절)
+    if isinstance(top_n, str) and top_n.strip().isdigit():
+        top_n = int(top_n)
+    if isinstance(top_n, bool) or not isinstance(top_n, int) or not 1 <= top_n <= MAX_STRESS_PERIODS:
+        return json_response({"error": f"top_n은 1 ~ {MAX_STRESS_PERIODS} 사이의 정수여야 합니다."}, 400)
+    if not isinstance(periods, list) or len(periods) > MAX_STRESS_PERIODS:
+        return json_response({"error": f"periods는 최대 {MAX_STRESS_PERIODS}개의 리스트여야 합니다."}, 400)
+    if any(not isinstance(p, dict) or 'start' not in p or 'end' not in p for p in periods):
+        return json_response({"error": "각 기간에는 start, end가 필요합니다."}, 400)
+
+    cached = get_or_compute_backtest(current_backtest_params())
+    if cached is None: return json_response({"error": "데이터 파일을 찾을 수 없습니다."}, 500)
+    columns = cached['columns']
+    value_matrix = np.column_stack([columns['benchmark']['value']] + [columns['portfolio'][key] for key in HISTORY_COLUMNS])
+
+    try:
+        returns = period_returns(columns['index'], value_matrix, [p['start'] for p in periods], [p['end'] for p in periods])
+    except (ValueError, TypeError) as e:
+        return json_response({"error": f"날짜 형식 오류: {e}"}, 400)
+
+    result_keys = ['benchmark_return'] + [PORTFOLIO_RETURN_KEYS[key] for key in HISTORY_COLUMNS]
+    period_results = []
+    for period, row in zip(periods, returns.tolist()):
+        entry = {"name": period.get('name'), "start_date": period['start'], "end_date": period['end']}
+        entry.update({key: (None if np.isnan(value) else value) for key, value in zip(result_keys, row)})
+        period_results.append(entry)
+
+    return json_response({
+        "periods": period_results,
+        "benchmark_drawdowns": drawdown_episodes(columns['benchmark']['value'], columns['index'], top_n),
+        "portfolio_drawdowns": drawdown_episodes(columns['portfolio']['value'], columns['index'], top_n),
+    })
+
+def build_backtest_response(request, entry):
+    """ ⭐️ [신규] 포맷(기존/컬럼형, float32) + 압축(br/gzip) 협상 후 ETag와 함께 응답
+
+    - 컬럼형: ?format=columnar 또는 Accept: application/vnd.backtest.columnar+json
+    - float32 양자화: ?precision=f32 (컬럼형에서 시리즈를 base64 float32 바이트로 전송)
+    인코딩된 바이트는 캐시 항목에 저장해 두므로 같은 요청은 직렬화/압축을 다시 하지 않습니다.
+    """
+    fmt = negotiate_format(request.query_params.get('format'), request.headers.get('Accept'))
+    float32 = fmt == FORMAT_COLUMNAR and request.query_params.get('precision') == 'f32'
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+
+    variant = (fmt, float32, encoding)
+    if variant not in entry['encoded']:
+        payload = entry['result'] if fmt == FORMAT_ROWS else to_columnar_payload(entry['columns'], entry['result'], float32)
+        body, content_encoding = compress(dumps_json(payload), encoding)
+        entry['encoded'][variant] = (body, content_encoding, make_etag(body))
+    body, content_encoding, etag = entry['encoded'][variant]
+
+    headers = {"ETag": f'"{etag}"', "Vary": "Accept, Accept-Encoding", "Cache-Control": "no-cache"}
+    if content_encoding: headers["Content-Encoding"] = content_encoding
+    if etag_matches(request.headers.get('If-None-Match'), etag): # ⭐️ 변경 없음 → 본문 없이 304
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    media_type = COLUMNAR_MIME if fmt == FORMAT_COLUMNAR else 'application/json'
+    return Response(body, media_type=media_type, headers=headers)
+
+@app.get('/api/universe')
+def universe_api():
+    """ ⭐️ [신규] 가격 파일에 들어 있는 전체 종목 목록 (배치/최적화 요청의 assets로 사용 가능) """
+    try:
+        return json_response({"assets": universe_assets(), "portfolio": portfolio_assets(TARGET_WEIGHTS)})
+    except OSError:
+        return json_response({"error": "데이터 파일을 찾을 수 없습니다."}, 500)
+
+@app.get('/api/cache/stats')
+def get_cache_stats():
+    """ ⭐️ [신규] 백테스트 캐시의 적중/실패/제거 카운터 """
+    return json_response({"backtest": g_backtest_cache.stats(), "ai_response": g_ai_response_cache.stats()})
+
+def is_calendar_schedule(schedule):
+    return isinstance(schedule, str) and (schedule in CALENDAR_FREQS or schedule == LEGACY_SCHEDULE)
+
+def default_calendar_schedule():
+    """일괄 평가(포트폴리오마다 비중이 다름)에는 비중 이탈 밴드를 쓸 수 없으므로 달력 주기만 사용"""
+    return REBALANCE_SCHEDULE if is_calendar_schedule(REBALANCE_SCHEDULE) else 'monthly'
+
+def get_shared_price_df(assets=None):
+    """일괄 백테스트가 공유하는 price_df(assets 컬럼만, 기본: TARGET_WEIGHTS 종목)를 CSV가 바뀔 때만 다시 로드합니다."""
+    assets = tuple(assets) if assets is not None else tuple(portfolio_assets(TARGET_WEIGHTS))
+    mtimes = file_mtimes(*source_files()) # price_df에 base_rate 컬럼이 들어 있으므로 금리 파일도 포함
+    cached = g_price_df_cache.get(assets)
+    if cached is None or cached[0] != mtimes: # ⭐️ CSV가 갱신되면 다시 로드
+        cached = (mtimes, load_data(ETF_FILE, KOSPI_FILE, START_DATE, END_DATE, assets))
+        g_price_df_cache.set(assets, cached)
+    return cached[1]
+
+@app.post('/api/backtest/batch')
+async def run_batch_backtest_api(request: Request):
+    """ ⭐️ [신규] 여러 비중 벡터(N × 자산, 'Cash' 포함)를 한 번의 행렬 연산으로 평가합니다.
+
+    요청 예시: {"assets": ["226490", "114260", "363570", "Cash"], "weights": [[0.6, 0.15, 0.15, 0.1], ...],
+               "costs": {...}, "schedule": "monthly"}
+    """
+    body = await read_json_body(request)
+    if body is None: return invalid_body_response()
+    return await run_in_threadpool(run_batch_backtest_request, body)
+
+def run_batch_backtest_request(body):
+    assets = body.get('assets', list(TARGET_WEIGHTS.keys()))
+    weights = body.get('weights')
+    costs = body.get('costs') # ⭐️ 예: {"commission": 0.00015, "slippage": 0.0005} (없으면 무비용)
+    schedule = body.get('schedule', default_calendar_schedule())
+    try:
+        initial_capital = parse_initial_capital(body.get('initial_capital', INITIAL_CAPITAL))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    if not is_calendar_schedule(schedule):
+        return json_response({"error": f"일괄 백테스트는 달력 주기만 지원합니다: {list(CALENDAR_FREQS)}"}, 400)
+
+    if not isinstance(assets, list) or not all(isinstance(asset, str) for asset in assets):
+        return json_response({"error": "assets는 종목코드 문자열 리스트여야 합니다."}, 400)
+    if 'Cash' not in assets:
+        return json_response({"error": "assets에 'Cash'가 포함되어야 합니다."}, 400)
+    try:
+        weight_matrix = np.atleast_2d(np.asarray(weights, dtype=float))
+    except (TypeError, ValueError):
+        return json_response({"error": "weights는 숫자 2차원 배열이어야 합니다."}, 400)
+    if weight_matrix.ndim != 2 or weight_matrix.shape[1] != len(assets):
+        return json_response({"error": "weights의 열 개수가 assets 개수와 다릅니다."}, 400)
+    if not np.allclose(weight_matrix.sum(axis=1), 1.0, atol=1e-6):
+        return json_response({"error": "각 포트폴리오의 비중 합은 1이어야 합니다."}, 400)
+
+    asset_keys = [asset for asset in assets if asset != 'Cash']
+    missing = missing_assets(asset_keys)
+    if missing:
+        return json_response({"error": f"가격 데이터에 없는 자산입니다: {missing}"}, 400)
+    price_df = get_shared_price_df(asset_keys) # ⭐️ 요청 종목 컬럼만 로드
+    if price_df is None: return json_response({"error": "데이터 파일을 찾을 수 없습니다."}, 500)
+
+    # ⭐️ 엔진은 [자산..., Cash] 열 순서를 사용하므로 Cash 열을 맨 뒤로 재배치
+    column_order = [assets.index(asset) for asset in asset_keys] + [assets.index('Cash')]
+    rebalance_idx = resolve_rebalance_indices(price_df, schedule) # ⭐️ 모든 포트폴리오가 같은 일정을 공유
+    results = run_batch_backtest(price_df, weight_matrix[:, column_order], asset_keys, initial_capital, rebalance_idx, costs=costs)
+
+    return json_response({
+        "assets": asset_keys + ['Cash'],
+        "count": int(weight_matrix.shape[0]),
+        "results": {key: values.tolist() for key, values in results.items()}
+    })
+
+def parse_optimize_spec(spec):
+    """최적화 입력 검증 (데이터를 읽기 전에 끝나는 검사만). 반환: (max_mdd, step, asset_keys, schedule), 오류는 ValueError"""
+    try:
+        max_mdd = float(spec['max_mdd']) if spec.get('max_mdd') is not None else None
+        step = float(spec.get('step', 0.05))
+    except (TypeError, ValueError):
+        raise ValueError("max_mdd, step은 숫자여야 합니다.") from None
+    if not 0.01 <= step <= 0.5:
+        raise ValueError("step은 0.01 ~ 0.5 사이여야 합니다.")
+
+    assets = spec.get('assets')
+    if assets and not isinstance(assets, (str, list)):
+        raise ValueError("assets는 쉼표 구분 문자열 또는 리스트여야 합니다.")
+    # ⭐️ [수정] 기본 탐색 대상은 TARGET_WEIGHTS 종목 (가격 파일 전체 종목을 격자 탐색하지 않도록)
+    asset_keys = (assets.split(',') if isinstance(assets, str) else list(assets)) if assets else portfolio_assets(TARGET_WEIGHTS)
+    asset_keys = list(dict.fromkeys(asset_keys)) # 중복 종목 제거 (격자 크기만 키움)
+    # ⭐️ 후보 수는 C(1/step + 자산 수, 자산 수)로 급증하므로 데이터 로드/격자 생성 전에 거절
+    num_candidates = simplex_grid_size(len(asset_keys) + 1, step)
+    if num_candidates > MAX_OPTIMIZE_CANDIDATES:
+        raise ValueError(f"탐색 후보가 너무 많습니다: {num_candidates:,}개 (최대 {MAX_OPTIMIZE_CANDIDATES:,}개). "
+                         "자산 수를 줄이거나 step을 키우세요.")
+    missing = missing_assets(asset_keys)
+    if missing:
+        raise ValueError(f"가격 데이터에 없는 자산입니다: {missing}")
+
+    schedule = spec.get('schedule', default_calendar_schedule())
+    if not is_calendar_schedule(schedule):
+        raise ValueError(f"최적화는 달력 주기만 지원합니다: {list(CALENDAR_FREQS)}")
+    return max_mdd, step, asset_keys, schedule
+
+def optimize_job(spec, progress=None):
+    """비중 심플렉스 탐색 실행 (/api/optimize와 작업 큐가 공유, 입력 오류는 ValueError)"""
+    max_mdd, step, asset_keys, schedule = parse_optimize_spec(spec)
+    price_df = get_shared_price_df(asset_keys)
+    if price_df is None: raise FileNotFoundError("데이터 파일을 찾을 수 없습니다.")
+
+    return optimize_portfolio(price_df, INITIAL_CAPITAL, asset_keys=asset_keys, max_mdd=max_mdd, step=step,
+                              rebalance_idx=resolve_rebalance_indices(price_df, schedule), progress=progress)
+
+@app.get('/api/optimize')
+def optimize_api(request: Request):
+    """ ⭐️ [신규] 비중 심플렉스 탐색: MDD 제약 하 CAGR 최대 포트폴리오 + CAGR–MDD 효율적 투자선
+
+    쿼리: max_mdd(예: -0.2), step(격자 간격, 기본 0.05), assets(쉼표 구분, 기본: TARGET_WEIGHTS 종목),
+          schedule(달력 주기, 기본: REBALANCE_SCHEDULE)
+    """
+    try:
+        return json_response(optimize_job(dict(request.query_params)))
+    except FileNotFoundError as e:
+        return json_response({"error": str(e)}, 500)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+@app.get('/api/rolling')
+def rolling_api(request: Request):
+    """ ⭐️ [신규] 리밸런싱 시점(기본: 매월 시작)별 롤링 윈도우(기본 1/3/5년) CAGR·MDD 분포
+
+    쿼리: horizons(쉼표 구분 연수, 예: 1,3,5), windows=1 이면 윈도우별 결과도 포함
+    """
+    price_df = get_shared_price_df()
+    if price_df is None: return json_response({"error": "데이터 파일을 찾을 수 없습니다."}, 500)
+
+    horizons_arg = request.query_params.get('horizons')
+    try:
+        horizons = [int(h) for h in horizons_arg.split(',')] if horizons_arg else list(DEFAULT_HORIZONS_YEARS)
+    except ValueError:
+        return json_response({"error": "horizons는 쉼표로 구분된 정수(연 단위)여야 합니다."}, 400)
+    include_windows = request.query_params.get('windows') == '1'
+    try:
+        validate_horizons(price_df.index, horizons) # ⭐️ 백테스트를 돌리기 전에 기간 범위 검사
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    result = run_rolling_analysis(
+        price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP,
+        horizons_years=horizons, include_windows=include_windows,
+        rebalance_idx=schedule_rebalance_indices(price_df, REBALANCE_SCHEDULE, TARGET_WEIGHTS, ASSETS_BY_GROUP)
+    )
+    return json_response(result)
+
+def parse_simulate_spec(spec):
+    """시뮬레이션 입력 검증. 반환: (num_paths, block_size, seed, workers), 오류는 ValueError"""
+    try:
+        num_paths = int(spec.get('paths', DEFAULT_NUM_PATHS))
+        block_size = int(spec.get('block', 1))
+        seed = int(spec['seed']) if spec.get('seed') is not None else None
+        workers = int(spec.get('workers', 1))
+    except (TypeError, ValueError):
+        raise ValueError("paths, block, seed, workers는 정수여야 합니다.") from None
+    if not 1 <= num_paths <= MAX_SIMULATION_PATHS:
+        raise ValueError(f"paths는 1 ~ {MAX_SIMULATION_PATHS} 사이여야 합니다.")
+    if block_size < 1:
+        raise ValueError("block은 1 이상, 데이터 일수 미만이어야 합니다.")
+    workers = min(max(workers, 1), os.cpu_count() or 1) # ⭐️ 요청 하나가 CPU 수보다 많은 프로세스를 띄우지 않도록
+    return num_paths, block_size, seed, workers
+
+def simulate_job(spec, progress=None):
+    """몬테카를로 시뮬레이션 실행 (/api/simulate와 작업 큐가 공유, 입력 오류는 ValueError)"""
+    num_paths, block_size, seed, workers = parse_simulate_spec(spec)
+    price_df = get_shared_price_df()
+    if price_df is None: raise FileNotFoundError("데이터 파일을 찾을 수 없습니다.")
+    if block_size >= len(price_df):
+        raise ValueError("block은 1 이상, 데이터 일수 미만이어야 합니다.")
+
+    asset_keys = ASSETS_BY_GROUP['Stocks'] + ASSETS_BY_GROUP['Bonds']
+    rebalance_idx = schedule_rebalance_indices(price_df, default_calendar_schedule(), TARGET_WEIGHTS, ASSETS_BY_GROUP)
+    return run_monte_carlo(
+        price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, asset_keys, rebalance_idx,
+        num_paths=num_paths, block_size=block_size, seed=seed, workers=workers, progress=progress
+    )
+
+@app.get('/api/simulate')
+def simulate_api(request: Request):
+    """ ⭐️ [신규] TARGET_WEIGHTS 포트폴리오의 부트스트랩 몬테카를로 시뮬레이션 (최종 가치/CAGR/MDD 분위수)
+
+    쿼리: paths(경로 수, 기본 10000), block(블록 길이, 1이면 일별 독립 재표본), seed, workers(프로세스 수)
+    """
+    try:
+        return json_response(simulate_job(dict(request.query_params)))
+    except FileNotFoundError as e:
+        return json_response({"error": str(e)}, 500)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+
+def parse_backtest_spec(spec):
+    """
+    ⭐️ 백테스트 작업 입력 검증: 현재 설정(current_backtest_params)에 spec을 덮어쓴 파라미터가
+    /api/backtest와 같은 엔진 경로(compute_backtest)를 KeyError 없이 통과하는지 미리 확인합니다.
+    반환: 전체 파라미터, 오류는 ValueError
+    """
+    unknown = set(spec) - set(current_backtest_params())
+    if unknown:
+        raise ValueError(f"지원하지 않는 백테스트 파라미터입니다: {sorted(unknown)}")
+    params = {**current_backtest_params(), **spec}
+
+    groups = params['assets_by_group']
+    if (not isinstance(groups, dict) or set(groups) != {'Stocks', 'Bonds'}
+            or not all(isinstance(groups[key], list) and all(isinstance(a, str) for a in groups[key]) for key in groups)):
+        raise ValueError("assets_by_group은 {'Stocks': [종목...], 'Bonds': [종목...]} 형식이어야 합니다.")
+    asset_keys = groups['Stocks'] + groups['Bonds']
+    missing = missing_assets(asset_keys)
+    if missing:
+        raise ValueError(f"가격 데이터에 없는 자산입니다: {missing}")
+
+    weights = params['target_weights']
+    if not isinstance(weights, dict) or set(weights) != set(asset_keys) | {'Cash'}:
+        raise ValueError(f"target_weights에는 {asset_keys + ['Cash']}의 비중이 모두(그리고 그것만) 있어야 합니다.")
+    if not all(_is_number(w) and w >= 0 for w in weights.values()) or not np.isclose(sum(weights.values()), 1.0, atol=1e-6):
+        raise ValueError("target_weights는 0 이상의 숫자이고 합이 1이어야 합니다.")
+
+    parse_initial_capital(params['initial_capital']) # 값은 그대로 (캐시 키가 /api/backtest와 같도록)
+    try:
+        if pd.Timestamp(params['start_date']) >= pd.Timestamp(params['end_date']):
+            raise ValueError("start_date는 end_date보다 앞서야 합니다.")
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"날짜 형식 오류: {e}") from None
+
+    schedule = params['rebalance_schedule']
+    if isinstance(schedule, dict):
+        band, check = schedule.get('band'), schedule.get('check')
+        if schedule.get('type') != 'band' or not _is_number(band) or not 0 < band < 1:
+            raise ValueError("밴드 리밸런싱은 {'type': 'band', 'band': 0 ~ 1 사이 숫자} 형식이어야 합니다.")
+        if check is not None and check not in CALENDAR_FREQS:
+            raise ValueError(f"band의 check는 달력 주기여야 합니다: {list(CALENDAR_FREQS)}")
+    elif not is_calendar_schedule(schedule):
+        raise ValueError(f"지원하지 않는 리밸런싱 일정입니다: {schedule}")
+
+    costs = params['trading_costs']
+    if costs is not None:
+        if not isinstance(costs, dict) or not all(_is_number(costs.get(key, 0.0)) and costs.get(key, 0.0) >= 0
+                                                  for key in ('commission', 'slippage', 'sell_tax')):
+            raise ValueError("trading_costs의 commission/slippage/sell_tax는 0 이상의 숫자여야 합니다.")
+        if not isinstance(costs.get('taxed_assets', []), list):
+            raise ValueError("trading_costs.taxed_assets는 리스트여야 합니다.")
+
+    periods = params['crash_periods']
+    if not isinstance(periods, list) or any(not isinstance(p, dict) or 'start' not in p or 'end' not in p for p in periods):
+        raise ValueError("crash_periods는 start, end가 있는 객체의 리스트여야 합니다.")
+    return params
+
+def backtest_job(spec, progress=None):
+    """현재 설정에 spec(target_weights, start_date, end_date, rebalance_schedule 등)을 덮어쓴 백테스트 (캐시 공유)"""
+    params = parse_backtest_spec(spec)
+    if progress: progress(0, 1)
+    cached = get_or_compute_backtest(params)
+    if cached is None: raise FileNotFoundError("데이터 파일을 찾을 수 없습니다.")
+    if progress: progress(1, 1)
+    return cached['result']
+
+# ⭐️ [신규] 장시간 작업 큐 (작업 종류 → 실행 함수). 결과는 .job_store/{job_id}.json에 저장
+JOB_RUNNERS = {"backtest": backtest_job, "optimize": optimize_job, "simulate": simulate_job}
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# ⭐️ 제출 시점 입력 검증 (실행 함수와 같은 검사, 오류면 /api/jobs가 바로 400)
+JOB_VALIDATORS = {"backtest": parse_backtest_spec, "optimize": parse_optimize_spec, "simulate": parse_simulate_spec}
+g_job_queue = JobQueue(JOB_RUNNERS, max_workers=JOB_WORKERS, validators=JOB_VALIDATORS)
+
+@app.post('/api/jobs')
+async def submit_job_api(request: Request):
+    """ ⭐️ [신규] 작업 제출 → 작업 ID 즉시 반환 (202)
+
+    요청 예시: {"kind": "simulate", "spec": {"paths": 100000, "block": 20, "seed": 42}}
+    """
+    body = await read_json_body(request)
+    if body is None: return invalid_body_response()
+    spec = body.get('spec', {})
+    if not isinstance(spec, dict):
+        return json_response({"error": "spec은 객체여야 합니다."}, 400)
+    try:
+        # ⭐️ 입력 검증이 가격 저장소를 열거나 재생성할 수 있으므로(잠금 + 파일 I/O) 이벤트 루프 밖에서 실행
+        job_id = await run_in_threadpool(g_job_queue.submit, body.get('kind'), spec)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    return json_response({
+        "job_id": job_id, "status": "queued",
+        "status_url": f"/api/jobs/{job_id}", "events_url": f"/api/jobs/{job_id}/events",
+    }, 202)
+
+@app.get('/api/jobs')
+def list_jobs_api():
+    """ ⭐️ [신규] 최근 작업 목록 (결과 제외) """
+    return json_response({"jobs": g_job_queue.list_jobs()})
+
+@app.get('/api/jobs/{job_id}')
+def get_job_api(job_id: str):
+    """ ⭐️ [신규] 작업 상태/결과 조회 """
+    job = g_job_queue.get(job_id)
+    if job is None: return json_response({"error": "작업을 찾을 수 없습니다."}, 404)
+    return json_response(job)
+
+@app.get('/api/jobs/{job_id}/events')
+async def job_events_api(job_id: str):
+    """ ⭐️ [신규] 작업 진행 상황/중간 결과를 SSE로 스트리밍 (analyze_stream과 같은 data: JSON 형식, 마지막은 event: done) """
+    if await run_in_threadpool(g_job_queue.get, job_id, False) is None:
+        return json_response({"error": "작업을 찾을 수 없습니다."}, 404)
+
+    async def stream_events():
+        async for event in g_job_queue.events(job_id):
+            if event is None:
+                yield ": keep-alive\n\n" # ⭐️ 프록시 타임아웃 방지
+                continue
+            yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+    # ⭐️ 비동기 제너레이터: 구독자가 많아도 스레드 풀 워커를 점유하지 않음 (동기 엔드포인트가 막히지 않도록)
+    return StreamingResponse(stream_events(), media_type='text/event-stream')
+
+@app.get('/api/analyze_stream')
+async def analyze_stream():
+    """ ⭐️ AI의 답변을 실시간 스트리밍(SSE)하는 엔드포인트
+
+    ⭐️ [수정] 비동기 제너레이터로 스트리밍: 접속한 클라이언트 수만큼 스레드를 점유하지 않고 이벤트 루프 하나를 공유
+    """
 
-@app.route('/api/analyze_stream')
-def analyze_stream():
-    """ ⭐️ AI의 답변을 실시간 스트리밍(SSE)하는 엔드포인트 """
+    # ⭐️ [수정] 현재 파라미터의 캐시 항목에서 프롬프트를 꺼냄
+    cached = g_backtest_cache.get(backtest_cache_key(current_backtest_params()))
+    prompt = cached['prompt'] if cached is not None else None
 
-    def stream_analysis():
-        global g_ai_prompt_cache
-        
+    async def stream_analysis():
         if not model:
             yield f"data: {json.dumps({'text': '오류: AI 모델이 로드되지 않았습니다. API 키를 확인하세요.'})}\n\n"
             yield f"data: {json.dumps({'event': 'done'})}\n\n"
             return
             
-        if not g_ai_prompt_cache:
+        if not prompt:
             yield f"data: {json.dumps({'text': '오류: AI 분석용 프롬프트가 캐시되지 않았습니다. /api/backtest를 먼저 호출하세요.'})}\n\n"
             yield f"data: {json.dumps({'event': 'done'})}\n\n"
             return
 
         try:
-            response = model.generate_content(g_ai_prompt_cache, stream=True)
-            for chunk in response:
-                if chunk.text:
-                    yield f"data: {json.dumps({'text': chunk.text})}\n\n"
-                    time.sleep(0.02)
+            # ⭐️ [수정] 같은 프롬프트의 완료 응답은 즉시 재생, 진행 중이면 그 스트림에 합류
+            status, chunks = g_ai_response_cache.open_stream(prompt, lambda: stream_text(model, prompt))
+            async for text in chunks:
+                yield f"data: {json.dumps({'text': text})}\n\n"
+                if status != CACHE_HIT:
+                    await asyncio.sleep(AI_STREAM_PACING_SECONDS) # ⭐️ 이벤트 루프를 막지 않는 대기
             yield f"data: {json.dumps({'event': 'done'})}\n\n"
             
         except Exception as e:
@@ -351,9 +835,10 @@ def analyze_stream():
             yield f"data: {json.dumps({'text': f'AI 스트리밍 중 오류가 발생했습니다: {e}'})}\n\n"
             yield f"data: {json.dumps({'event': 'done'})}\n\n"
 
-    return Response(stream_analysis(), mimetype='text/event-stream')
+    return StreamingResponse(stream_analysis(), media_type='text/event-stream')
 
 
 if __name__ == '__main__':
-    # ⭐️ debug=False로 변경하여 자동 새로고침 방지
-    app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
+    import uvicorn
+    # ⭐️ [수정] ASGI 서버(uvicorn)로 실행 (자동 새로고침 없음)
+    uvicorn.run(app, host='0.0.0.0', port=5000)
@@ -0,0 +1,65 @@
+# backtest_cache.py (파라미터 기반 백테스트 결과 캐시)
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+def file_mtimes(*paths):
+    """CSV 원본 파일들의 수정 시각을 반환합니다. (파일이 없으면 None)"""
+    return {path: (os.path.getmtime(path) if os.path.exists(path) else None) for path in paths}
+
+def make_cache_key(params, source_files=()):
+    """백테스트 입력 전체 + 원본 파일 mtime을 정규화(JSON, 키 정렬)한 뒤 SHA-256으로 해시합니다."""
+    payload = {"params": params, "sources": file_mtimes(*source_files)}
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class BacktestCache:
+    """크기 제한(LRU) + 만료 시간(TTL)을 가진 스레드 안전 캐시"""
+
+    def __init__(self, max_entries=128, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # key -> (저장 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0; self.evictions = 0; self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1; self.misses += 1
+                return None
+            self._entries.move_to_end(key) # ⭐️ 최근 사용 항목을 맨 뒤로
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False) # ⭐️ 가장 오래 사용되지 않은 항목 제거
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries), "max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "expirations": self.expirations,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
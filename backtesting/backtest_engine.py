@@ -0,0 +1,202 @@
+# backtest_engine.py (벡터화 리밸런싱 백테스트 엔진)
+
+import numpy as np
+import pandas as pd
+
+# 결과 DataFrame의 컬럼 순서 (기존 portfolio_history 딕셔너리 키와 동일)
+HISTORY_COLUMNS = ['value', 'stock_value', 'bond_value', 'cash_value']
+DAYS_PER_YEAR = 365.0 # 현금 이자는 달력일 기준 일복리 (연율 / 365)
+
+# --- 1. 리밸런싱 시점 계산 ---
+
+def monthly_rebalance_indices(dates):
+    """기존 루프와 동일한 규칙(다음 날이 다른 달이면 월말)으로 리밸런싱 인덱스를 구합니다."""
+    dates = pd.DatetimeIndex(dates)
+    is_month_end = dates.month != (dates + pd.Timedelta(days=1)).month
+    is_month_end[0] = False # ⭐️ 첫날은 초기 매수일이므로 리밸런싱하지 않음 (기존 루프는 i=1부터 검사)
+    return np.flatnonzero(is_month_end)
+
+def segment_bounds(num_days, rebalance_idx):
+    """리밸런싱 인덱스를 (시작, 끝) 구간 목록으로 변환합니다. 끝 인덱스는 구간에 포함됩니다."""
+    starts = np.concatenate(([0], rebalance_idx[rebalance_idx < num_days - 1]))
+    ends = np.concatenate((starts[1:], [num_days - 1]))
+    return starts, ends
+
+def cash_growth_factors(dates, annual_rates):
+    """
+    ⭐️ 행(거래일)별 현금 증가 배수: 직전 거래일 이후 지난 달력일 수만큼 (1 + 연율 / 365) 일복리
+    (주말·휴일에도 이자가 붙으므로 1년 누적이 연율과 같아짐. 첫 행은 1)
+    """
+    rates = np.asarray(annual_rates, dtype=float)
+    gaps = np.diff(pd.DatetimeIndex(dates).values).astype('timedelta64[D]').astype(float)
+    return np.concatenate((np.ones(min(len(rates), 1)), (1 + rates[1:] / DAYS_PER_YEAR) ** gaps))
+
+# --- 2. 거래 비용 (수수료 / 슬리피지 / 증권거래세) ---
+
+def cost_rates(asset_keys, costs):
+    """
+    자산별 (매수 비용률, 매도 비용률) 배열을 만듭니다.
+    costs 예시: {'commission': 0.00015, 'slippage': 0.0005, 'sell_tax': 0.0015, 'taxed_assets': ['005930']}
+    매도세는 taxed_assets에 포함된 자산의 매도 금액에만 부과합니다.
+    """
+    base_rate = costs.get('commission', 0.0) + costs.get('slippage', 0.0)
+    taxed_assets = set(costs.get('taxed_assets', ()))
+    sell_tax = np.array([costs.get('sell_tax', 0.0) if asset in taxed_assets else 0.0 for asset in asset_keys])
+    return np.full(len(asset_keys), base_rate), base_rate + sell_tax
+
+def rebalance_cost(current_values, target_values, buy_rates, sell_rates):
+    """리밸런싱 매매 금액에 대한 비용과 회전 금액(매수+매도)을 반환합니다. (마지막 축 = 자산)"""
+    trades = target_values - current_values
+    buys = np.clip(trades, 0, None); sells = np.clip(-trades, 0, None)
+    cost = (buys * buy_rates + sells * sell_rates).sum(axis=-1)
+    return cost, (buys + sells).sum(axis=-1)
+
+# --- 3. 벡터화 백테스트 ---
+
+def run_rebalancing_backtest_vectorized(price_df, initial_capital, target_weights, assets_by_group, rebalance_idx=None, costs=None):
+    """
+    리밸런싱 사이의 보유 구간을 배열 단위로 계산합니다.
+    (보유 수량 × 가격 행렬, 현금은 base_rate 달력일 일복리 누적곱으로 계산)
+    결과는 날짜 인덱스를 가진 컬럼형 DataFrame(value/stock_value/bond_value/cash_value)입니다.
+    costs를 주면 초기 매수와 각 리밸런싱 시점에만 매매 비용을 차감하고,
+    누적 비용(trading_cost)과 누적 회전 금액(turnover) 컬럼을 추가합니다.
+    """
+    stocks = list(assets_by_group['Stocks']); bonds = list(assets_by_group['Bonds'])
+    asset_keys = stocks + bonds
+    num_stocks = len(stocks)
+    dates = price_df.index
+    num_days = len(dates)
+
+    prices = price_df[asset_keys].to_numpy(dtype=float)
+    cash_growth = cash_growth_factors(dates, price_df['base_rate'])
+    weights = np.array([target_weights[asset] for asset in asset_keys], dtype=float)
+    cash_weight = target_weights['Cash']
+
+    if rebalance_idx is None:
+        rebalance_idx = monthly_rebalance_indices(dates)
+    starts, ends = segment_bounds(num_days, np.asarray(rebalance_idx))
+
+    stock_values = np.empty(num_days); bond_values = np.empty(num_days)
+    cash_values = np.empty(num_days); total_values = np.empty(num_days)
+
+    # 첫날: 초기 자본으로 목표 비중만큼 매수
+    first_targets = initial_capital * weights
+    stock_values[0] = first_targets[:num_stocks].sum()
+    bond_values[0] = first_targets[num_stocks:].sum()
+    cash_values[0] = initial_capital * cash_weight
+    total_values[0] = initial_capital
+
+    if costs is not None:
+        buy_rates, sell_rates = cost_rates(asset_keys, costs)
+        cum_costs = np.zeros(num_days); cum_turnover = np.zeros(num_days)
+        total_cost = 0.0; total_turnover = 0.0
+        shares = np.zeros(len(asset_keys)) # 초기 매수 전 보유 수량
+
+    current_total = initial_capital
+    for start, end in zip(starts, ends):
+        if costs is not None:
+            # ⭐️ 리밸런싱 시점에서만 (현재 보유 금액 → 목표 금액) 매매 비용을 계산해 총자산에서 차감
+            cost, turnover = rebalance_cost(shares * prices[start], current_total * weights, buy_rates, sell_rates)
+            current_total = current_total - cost
+            total_cost += cost; total_turnover += turnover
+            cum_costs[start:end + 1] = total_cost; cum_turnover[start:end + 1] = total_turnover
+            # ⭐️ 매매일 행은 비용 차감 후 (목표 비중으로 나눈) 가치로 기록
+            total_values[start] = current_total
+            stock_values[start] = current_total * weights[:num_stocks].sum()
+            bond_values[start] = current_total * weights[num_stocks:].sum()
+            cash_values[start] = current_total * cash_weight
+        # ⭐️ 구간 시작일(초기 매수일 또는 리밸런싱일)의 총자산으로 목표 비중 재설정
+        shares = (current_total * weights) / prices[start]
+        cash_start = current_total * cash_weight
+        if end <= start:
+            continue
+
+        held = prices[start + 1:end + 1] * shares
+        stock_seg = held[:, :num_stocks].sum(axis=1)
+        bond_seg = held[:, num_stocks:].sum(axis=1)
+        # ⭐️ 현금은 [시작 현금, 일별 증가율...] 누적곱 (기존 루프의 순차 곱셈과 같은 순서)
+        cash_seg = np.multiply.accumulate(np.concatenate(([cash_start], cash_growth[start + 1:end + 1])))[1:]
+
+        stock_values[start + 1:end + 1] = stock_seg
+        bond_values[start + 1:end + 1] = bond_seg
+        cash_values[start + 1:end + 1] = cash_seg
+        total_values[start + 1:end + 1] = stock_seg + bond_seg + cash_seg
+        current_total = total_values[end]
+
+    history_df = pd.DataFrame(
+        {'value': total_values, 'stock_value': stock_values, 'bond_value': bond_values, 'cash_value': cash_values},
+        index=dates, columns=HISTORY_COLUMNS,
+    )
+    if costs is not None:
+        history_df['trading_cost'] = cum_costs
+        history_df['turnover'] = cum_turnover
+    return history_df
+
+# --- 4. 다중 포트폴리오 일괄 백테스트 ---
+
+def run_batch_backtest(price_df, weight_matrix, asset_keys, initial_capital, rebalance_idx=None, costs=None):
+    """
+    N개 포트폴리오(행) × 자산(열, 마지막 열은 'Cash')의 비중 행렬을 한 번에 평가합니다.
+    구간별로 (N × 자산) 보유 수량 행렬과 가격 행렬을 곱하고, 고점/MDD는 구간마다 누적 갱신하므로
+    메모리는 N × (구간 길이)만 사용합니다.
+    반환값: {'CAGR': (N,), 'MDD': (N,), 'Final Value': (N,)} 넘파이 배열 딕셔너리
+    (costs를 주면 'Total Cost' 열이 추가됩니다)
+    """
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype=float))
+    asset_keys = list(asset_keys)
+    weights = weight_matrix[:, :len(asset_keys)]
+    cash_weights = weight_matrix[:, len(asset_keys)]
+    dates = price_df.index
+    num_days = len(dates)
+
+    prices = price_df[asset_keys].to_numpy(dtype=float)
+    cash_growth = cash_growth_factors(dates, price_df['base_rate'])
+
+    if rebalance_idx is None:
+        rebalance_idx = monthly_rebalance_indices(dates)
+    starts, ends = segment_bounds(num_days, np.asarray(rebalance_idx))
+
+    num_portfolios = weight_matrix.shape[0]
+    current_total = np.full(num_portfolios, float(initial_capital))
+    peak = current_total.copy()
+    mdd = np.zeros(num_portfolios)
+    if costs is not None:
+        buy_rates, sell_rates = cost_rates(asset_keys, costs)
+        shares = np.zeros_like(weights)
+        total_cost = np.zeros(num_portfolios)
+
+    for start, end in zip(starts, ends):
+        if end <= start:
+            continue
+        if costs is not None:
+            cost, _ = rebalance_cost(shares * prices[start], current_total[:, None] * weights, buy_rates, sell_rates)
+            current_total = current_total - cost
+            total_cost += cost
+        shares = (current_total[:, None] * weights) / prices[start]
+        cash_start = current_total * cash_weights
+        # (N × 자산) @ (자산 × 구간 일수) → (N × 구간 일수)
+        seg_values = shares @ prices[start + 1:end + 1].T
+        seg_values += cash_start[:, None] * np.cumprod(cash_growth[start + 1:end + 1])
+
+        seg_peak = np.maximum(np.maximum.accumulate(seg_values, axis=1), peak[:, None])
+        mdd = np.minimum(mdd, ((seg_values - seg_peak) / seg_peak).min(axis=1))
+        peak = seg_peak[:, -1]
+        current_total = seg_values[:, -1]
+
+    num_years = (dates[-1] - dates[0]).days / 365.25
+    cagr = (current_total / initial_capital) ** (1 / num_years) - 1
+    results = {'CAGR': cagr, 'MDD': mdd, 'Final Value': current_total}
+    if costs is not None:
+        results['Total Cost'] = total_cost
+    return results
+
+# --- 5. 변환 헬퍼 ---
+
+def history_to_records(history_df):
+    """컬럼형 결과를 기존 API 형식(날짜별 딕셔너리 리스트)으로 변환합니다."""
+    date_strs = history_df.index.strftime('%Y-%m-%d')
+    columns = [history_df[col].tolist() for col in HISTORY_COLUMNS]
+    return [
+        {'date': date_str, 'value': v, 'stock_value': s, 'bond_value': b, 'cash_value': c}
+        for date_str, v, s, b, c in zip(date_strs, *columns)
+    ]
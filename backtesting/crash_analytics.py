@@ -0,0 +1,121 @@
+# crash_analytics.py (하락 구간 분석: 기간 수익률 / 드로다운 에피소드)
+
+import numpy as np
+import pandas as pd
+
+# 포트폴리오 컬럼 → 분석 결과 키
+PORTFOLIO_RETURN_KEYS = {
+    'value': 'portfolio_return', 'stock_value': 'stock_return',
+    'bond_value': 'bond_return', 'cash_value': 'cash_return',
+}
+
+# --- 1. 기간 수익률 (searchsorted 한 번) ---
+
+def asof_positions(dates, query_dates):
+    """각 날짜 이전(포함)의 마지막 거래일 위치 (Series.asof와 동일, 데이터 이전이면 -1)"""
+    return np.searchsorted(dates.values, pd.DatetimeIndex(query_dates).values, side='right') - 1
+
+def period_returns(dates, value_matrix, starts, ends):
+    """
+    (일수 × 시리즈) 가치 행렬에 대해 여러 기간 [start, end]의 수익률을 한 번에 구합니다.
+    반환: (기간 수 × 시리즈 수). 데이터 범위를 벗어난 기간은 NaN (기존 get_period_return과 동일).
+    """
+    value_matrix = np.asarray(value_matrix, dtype=float)
+    if value_matrix.ndim == 1:
+        value_matrix = value_matrix[:, None]
+    start_pos = asof_positions(dates, starts)
+    end_pos = asof_positions(dates, ends)
+    valid = (start_pos >= 0) & (end_pos >= 0) & (pd.DatetimeIndex(starts).values <= dates.values[-1])
+    safe_start = np.where(valid, start_pos, 0); safe_end = np.where(valid, end_pos, 0)
+    returns = value_matrix[safe_end] / value_matrix[safe_start] - 1
+    returns[~valid] = np.nan
+    return returns
+
+# --- 2. 드로다운 에피소드 (한 번의 순회) ---
+
+def underwater_segments(values):
+    """
+    고점 아래 구간(수면 아래)들을 한 번에 찾습니다.
+    반환: (starts, ends, troughs, drawdown) — ends는 회복일 위치(미회복이면 len(values)), troughs는 구간별 첫 최저점
+    """
+    values = np.asarray(values, dtype=float)
+    peak = np.maximum.accumulate(values)
+    drawdown = values / peak - 1
+    under = drawdown < 0
+    edges = np.diff(np.concatenate(([0], under.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1); ends = np.flatnonzero(edges == -1)
+    # ⭐️ (구간 번호, 낙폭) 순 안정 정렬 후 구간별 첫 항목 = 구간의 (첫) 최저점
+    positions = np.flatnonzero(under)
+    seg_id = np.searchsorted(starts, positions, side='right') - 1
+    order = np.lexsort((drawdown[positions], seg_id))
+    first_in_seg = np.flatnonzero(np.diff(np.concatenate(([-1], seg_id[order]))))
+    troughs = positions[order[first_in_seg]]
+    return starts, ends, troughs, drawdown
+
+def drawdown_episodes(values, dates, top_n=5):
+    """
+    고점 → 저점 → 회복 에피소드를 한 번에 찾아 낙폭이 큰 순으로 top_n개 반환합니다.
+    회복하지 못한 에피소드는 recovery_date가 None입니다.
+    """
+    starts, ends, troughs, drawdown = underwater_segments(values)
+    if len(starts) == 0:
+        return []
+    depths = drawdown[troughs]
+
+    order = np.argsort(depths, kind='stable')[:top_n]
+    episodes = []
+    for i in order:
+        peak_idx = starts[i] - 1 # 수면 아래로 내려가기 직전 날이 고점
+        recovered = ends[i] < len(drawdown)
+        episodes.append({
+            "peak_date": dates[peak_idx].strftime('%Y-%m-%d'),
+            "trough_date": dates[troughs[i]].strftime('%Y-%m-%d'),
+            "recovery_date": dates[ends[i]].strftime('%Y-%m-%d') if recovered else None,
+            "drawdown": float(depths[i]),
+            "days_to_trough": int((dates[troughs[i]] - dates[peak_idx]).days),
+            "days_to_recovery": int((dates[ends[i]] - dates[troughs[i]]).days) if recovered else None,
+        })
+    return episodes
+
+# --- 3. AI 프롬프트용 분석 (find_analysis_data의 컬럼형 버전) ---
+
+def analyze_crash_periods(dates, portfolio_columns, benchmark_values, user_crash_periods):
+    """
+    컬럼형 백테스트 결과로 (1) 벤치마크 MDD 기간, (2) 최악의 하루, (3) 사용자 지정 기간을 분석합니다.
+    portfolio_columns: {'value': 배열, 'stock_value': 배열, 'bond_value': 배열, 'cash_value': 배열}
+    """
+    benchmark_values = np.asarray(benchmark_values, dtype=float)
+    keys = list(PORTFOLIO_RETURN_KEYS)
+    value_matrix = np.column_stack([benchmark_values] + [portfolio_columns[key] for key in keys])
+    result_keys = ['benchmark_return'] + [PORTFOLIO_RETURN_KEYS[key] for key in keys]
+
+    # 1. 벤치마크 MDD 기간 (최초 최저점, 그 이전의 최초 최고점)
+    bm_peak = np.maximum.accumulate(benchmark_values)
+    trough_idx = int(np.argmin((benchmark_values - bm_peak) / bm_peak))
+    peak_idx = int(np.argmax(benchmark_values[:trough_idx + 1]))
+    mdd_returns = value_matrix[trough_idx] / value_matrix[peak_idx] - 1
+    mdd_period_analysis = {"start_date": dates[peak_idx].strftime('%Y-%m-%d'), "end_date": dates[trough_idx].strftime('%Y-%m-%d')}
+    mdd_period_analysis.update(zip(result_keys, mdd_returns))
+
+    # 2. 벤치마크 최악의 하루
+    daily_returns = value_matrix[1:, :2] / value_matrix[:-1, :2] - 1
+    worst_idx = int(np.argmin(daily_returns[:, 0]))
+    worst_day_analysis = {
+        "date": dates[worst_idx + 1].strftime('%Y-%m-%d'),
+        "benchmark_return": daily_returns[worst_idx, 0],
+        "portfolio_return": daily_returns[worst_idx, 1],
+    }
+
+    # 3. 사용자 지정 기간 (모든 기간을 한 번에)
+    user_period_analyses = []
+    if user_crash_periods:
+        returns = period_returns(dates, value_matrix,
+                                 [p['start'] for p in user_crash_periods], [p['end'] for p in user_crash_periods])
+        for period, row in zip(user_crash_periods, returns):
+            if np.isnan(row[0]): # ⭐️ 데이터 범위 밖 기간은 제외 (기존과 동일)
+                continue
+            analysis = {"name": period['name'], "start_date": period['start'], "end_date": period['end']}
+            analysis.update(zip(result_keys, row))
+            user_period_analyses.append(analysis)
+
+    return mdd_period_analysis, worst_day_analysis, user_period_analyses
@@ -0,0 +1,212 @@
+# job_queue.py (장시간 작업 큐: 작업 ID 발급 / 워커 풀 실행 / 진행 상황 이벤트 / 결과 저장)
+
+import asyncio
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED)
+
+DEFAULT_STORE_DIR = ".job_store"
+HEARTBEAT_SECONDS = 15 # SSE 연결 유지용 주석 라인 간격
+
+class JobQueue:
+    """
+    작업 종류별 실행 함수(runners: {kind: fn(spec, progress) -> 결과})를 워커 풀에서 실행합니다.
+    - 진행 상황은 작업별 이벤트 목록에 쌓이고, events()(비동기 제너레이터)로 처음부터(또는 중간부터) 구독할 수 있습니다.
+    - 완료/실패한 작업은 store_dir/<job_id>.json에 저장되어 서버 재시작 후에도 조회됩니다.
+    실행 함수의 무거운 연산은 numpy(GIL 해제) 또는 프로세스 풀에서 수행되므로 요청 스레드는 막히지 않습니다.
+    validators: {kind: fn(spec)} (선택). 제출 시점에 실행해 ValueError면 작업을 만들지 않습니다.
+    """
+
+    def __init__(self, runners, max_workers=2, store_dir=DEFAULT_STORE_DIR, max_jobs_in_memory=256, validators=None):
+        self.runners = runners
+        self.validators = validators or {}
+        self.store_dir = store_dir
+        self.max_jobs_in_memory = max_jobs_in_memory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backtest-job")
+        self._jobs = {} # job_id -> 작업 상태 딕셔너리 (삽입 순서 = 제출 순서)
+        self._listeners = {} # job_id -> 새 이벤트 알림 콜백 집합 (events() 구독자)
+        self._lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    # --- 1. 제출 / 조회 ---
+
+    def submit(self, kind, spec):
+        if kind not in self.runners:
+            raise ValueError(f"지원하지 않는 작업 종류입니다: {kind} (지원: {list(self.runners)})")
+        if kind in self.validators:
+            self.validators[kind](spec) # ⭐️ 입력 오류는 나중에 '실패한 작업'이 아니라 제출 요청의 400으로
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id, "kind": kind, "spec": spec, "status": JOB_QUEUED,
+            "created_at": time.time(), "started_at": None, "finished_at": None,
+            "progress": None, "result": None, "error": None, "events": [],
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict_finished()
+        self._publish(job_id, {"event": "status", "status": JOB_QUEUED})
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id, include_result=True):
+        """작업 상태 (메모리에 없으면 저장소에서 로드, 없으면 None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._public(job, include_result)
+        stored = self._load(job_id)
+        if stored is None:
+            return None
+        if not include_result:
+            stored.pop("result", None)
+        return stored
+
+    def list_jobs(self):
+        with self._lock:
+            return [self._public(job, include_result=False) for job in reversed(list(self._jobs.values()))]
+
+    async def events(self, job_id, start=0):
+        """
+        작업 이벤트를 start번째부터 차례로 내보내고 작업이 끝나면 종료하는 비동기 제너레이터.
+        ⭐️ 스레드에서 기다리지 않고, 워커 스레드의 _publish가 loop.call_soon_threadsafe로 넣어 주는
+           asyncio.Queue 알림을 기다립니다. (구독자가 많아도 스레드 풀 워커를 점유하지 않음)
+        새 이벤트가 없으면 HEARTBEAT_SECONDS마다 None을 내보냅니다. (SSE keep-alive용)
+        """
+        loop = asyncio.get_running_loop()
+        wakeups = asyncio.Queue()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(wakeups.put_nowait, None)
+            except RuntimeError: # 이벤트 루프가 이미 닫힘
+                pass
+
+        with self._lock:
+            in_memory = job_id in self._jobs
+            if in_memory:
+                self._listeners.setdefault(job_id, set()).add(wake) # 이벤트를 읽기 전에 등록 (알림 유실 방지)
+        try:
+            position = start
+            while in_memory:
+                with self._lock:
+                    job = self._jobs.get(job_id)
+                    if job is None: # 구독 중 메모리에서 제거됨 → 저장된 최종 상태로
+                        break
+                    pending = job["events"][position:]
+                for event in pending:
+                    yield event
+                position += len(pending)
+                if pending and pending[-1]["event"] == "done": # 최종 이벤트까지 보냈으면 종료
+                    return
+                if not pending:
+                    try:
+                        await asyncio.wait_for(wakeups.get(), HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield None
+        finally:
+            with self._lock:
+                listeners = self._listeners.get(job_id)
+                if listeners is not None:
+                    listeners.discard(wake)
+                    if not listeners:
+                        del self._listeners[job_id]
+
+        # ⭐️ 메모리에서 제거된(또는 재시작 전) 작업은 저장된 최종 상태만 한 번 재생
+        stored = await asyncio.to_thread(self._load, job_id)
+        if stored is not None:
+            yield self._final_event(stored)
+
+    # --- 2. 실행 ---
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = JOB_RUNNING; job["started_at"] = time.time()
+        self._publish(job_id, {"event": "status", "status": JOB_RUNNING})
+
+        def progress(done, total, partial=None):
+            """실행 함수가 호출하는 진행 상황 콜백 (partial: 중간 결과 요약)"""
+            event = {"event": "progress", "done": done, "total": total}
+            if partial is not None:
+                event["partial"] = partial
+            with self._lock:
+                job["progress"] = {"done": done, "total": total}
+            self._publish(job_id, event)
+
+        try:
+            result = self.runners[job["kind"]](job["spec"], progress)
+            with self._lock:
+                job["status"] = JOB_DONE; job["result"] = result
+        except Exception as e:
+            print(f"❌ 작업 {job_id} ({job['kind']}) 실행 중 오류: {e}")
+            if not isinstance(e, ValueError): # 입력 오류는 메시지만 기록
+                traceback.print_exc()
+            with self._lock:
+                job["status"] = JOB_FAILED; job["error"] = str(e)
+        with self._lock:
+            job["finished_at"] = time.time()
+            snapshot = self._public(job, include_result=True)
+        self._save(snapshot)
+        self._publish(job_id, self._final_event(snapshot))
+
+    def _publish(self, job_id, event):
+        with self._lock:
+            self._jobs[job_id]["events"].append(event)
+            for wake in self._listeners.get(job_id, ()):
+                wake()
+
+    @staticmethod
+    def _final_event(job):
+        if job["status"] == JOB_DONE:
+            return {"event": "done", "status": JOB_DONE, "result": job.get("result")}
+        return {"event": "done", "status": JOB_FAILED, "error": job.get("error")}
+
+    @staticmethod
+    def _public(job, include_result):
+        public = {key: value for key, value in job.items() if key != "events"}
+        if not include_result:
+            public.pop("result")
+        return public
+
+    def _evict_finished(self):
+        """메모리 상한 초과 시 가장 오래된 '완료' 작업부터 제거 (저장소에는 남아 있음)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATUSES]
+        for job_id in finished[:max(len(self._jobs) - self.max_jobs_in_memory, 0)]:
+            del self._jobs[job_id]
+
+    # --- 3. 로컬 저장소 (작업별 JSON 파일) ---
+
+    def _path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        path = self._path(job["job_id"])
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(job, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path) # ⭐️ 원자적 교체 (읽는 쪽이 쓰다 만 파일을 보지 않도록)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ 작업 결과 저장 실패 ({job['job_id']}): {e}")
+
+    def _load(self, job_id):
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id): # 경로 조작 방지 (uuid hex만 허용)
+            return None
+        try:
+            with open(self._path(job_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
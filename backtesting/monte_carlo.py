@@ -0,0 +1,142 @@
+# monte_carlo.py (부트스트랩 몬테카를로 시뮬레이션)
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backtest_engine import cash_growth_factors, segment_bounds
+from rolling_analysis import summarize
+
+DEFAULT_NUM_PATHS = 10_000
+DEFAULT_CHUNK_SIZE = 1_000 # 청크당 (경로 × 일수 × 자산) 배열 크기를 제한
+
+# 프로세스 풀 워커가 공유하는 입력 배열 (워커 프로세스의 initializer에서만 설정. 서버 프로세스에서는 쓰지 않음)
+_worker_inputs = None
+
+# --- 1. 입력 준비 ---
+
+def prepare_inputs(price_df, target_weights, asset_keys):
+    """일별 가격 상대비(P_t / P_t-1), 현금 증가율, 벤치마크 상대비와 비중 배열"""
+    asset_keys = list(asset_keys)
+    prices = price_df[asset_keys].to_numpy(dtype=float)
+    benchmark = price_df['benchmark'].to_numpy(dtype=float)
+    return {
+        "asset_rel": prices[1:] / prices[:-1],
+        "cash_growth": cash_growth_factors(price_df.index, price_df['base_rate'])[1:], # 직전 거래일 이후 달력일 복리
+        "benchmark_rel": benchmark[1:] / benchmark[:-1],
+        "weights": np.array([target_weights[asset] for asset in asset_keys], dtype=float),
+        "cash_weight": float(target_weights['Cash']),
+    }
+
+def sample_day_indices(rng, num_paths, num_steps, block_size=1):
+    """(경로 × 일수) 리샘플링 인덱스. block_size > 1이면 연속 구간을 통째로 뽑는 블록 부트스트랩"""
+    if block_size <= 1:
+        return rng.integers(0, num_steps, size=(num_paths, num_steps))
+    num_blocks = -(-num_steps // block_size)
+    block_starts = rng.integers(0, num_steps - block_size + 1, size=(num_paths, num_blocks))
+    indices = block_starts[:, :, None] + np.arange(block_size)
+    return indices.reshape(num_paths, -1)[:, :num_steps]
+
+# --- 2. 경로 시뮬레이션 (경로 방향 벡터화) ---
+
+def max_drawdown(values):
+    """(경로 × 일수) 가치 배열의 경로별 MDD"""
+    peak = np.maximum.accumulate(values, axis=1)
+    return ((values - peak) / peak).min(axis=1)
+
+def simulate_chunk(inputs, num_paths, rng, rebalance_idx, block_size=1):
+    """
+    num_paths개 경로를 한 번에 시뮬레이션하여 (포트폴리오 가치, 벤치마크 가치) 상대 경로를 반환합니다.
+    리밸런싱 구간마다 [자산별 누적곱 × 비중 + 현금 누적곱 × 현금 비중]으로 구간 내 가치를 계산합니다.
+    (초기 가치 = 1, 반환 배열은 1일차부터의 (경로 × 일수))
+    """
+    num_steps = len(inputs["asset_rel"])
+    idx = sample_day_indices(rng, num_paths, num_steps, block_size)
+    asset_rel = inputs["asset_rel"][idx]        # (경로, 일수, 자산)
+    cash_growth = inputs["cash_growth"][idx]    # (경로, 일수)
+    weights, cash_weight = inputs["weights"], inputs["cash_weight"]
+
+    values = np.empty((num_paths, num_steps))
+    current = np.ones(num_paths)
+    # ⭐️ 가격 일수 기준 구간 [start, end] → 상대비 배열에서는 [start, end) 위치
+    starts, ends = segment_bounds(num_steps + 1, np.asarray(rebalance_idx))
+    for start, end in zip(starts, ends):
+        seg_assets = np.cumprod(asset_rel[:, start:end], axis=1) @ weights
+        seg_cash = np.cumprod(cash_growth[:, start:end], axis=1) * cash_weight
+        values[:, start:end] = current[:, None] * (seg_assets + seg_cash)
+        current = values[:, end - 1]
+
+    benchmark_values = np.cumprod(inputs["benchmark_rel"][idx], axis=1)
+    return values, benchmark_values
+
+def summarize_paths(values, benchmark_values, num_years, initial_capital):
+    """청크 결과를 (최종 가치, CAGR, MDD) 배열로 요약합니다."""
+    out = {}
+    for name, path in (("portfolio", values), ("benchmark", benchmark_values)):
+        # ⭐️ MDD에는 시작 가치(1)도 고점 후보로 포함
+        with_start = np.concatenate((np.ones((len(path), 1)), path), axis=1)
+        final = path[:, -1]
+        out[name] = {
+            "Final Value": final * initial_capital,
+            "CAGR": final ** (1 / num_years) - 1,
+            "MDD": max_drawdown(with_start),
+        }
+    return out
+
+def _init_worker(inputs):
+    global _worker_inputs
+    _worker_inputs = inputs
+
+def _simulate_task(inputs, task):
+    """청크 하나 시뮬레이션 + 요약 (입력 배열은 인자로 받으므로 여러 스레드가 동시에 호출해도 안전)"""
+    num_paths, seed_seq, rebalance_idx, block_size, num_years, initial_capital = task
+    values, benchmark_values = simulate_chunk(inputs, num_paths, np.random.default_rng(seed_seq), rebalance_idx, block_size)
+    return summarize_paths(values, benchmark_values, num_years, initial_capital)
+
+def _run_chunk(task):
+    """프로세스 풀 워커용: initializer로 받은 입력 배열 사용"""
+    return _simulate_task(_worker_inputs, task)
+
+# --- 3. 시뮬레이션 실행 ---
+
+def run_monte_carlo(price_df, initial_capital, target_weights, asset_keys, rebalance_idx,
+                    num_paths=DEFAULT_NUM_PATHS, block_size=1, seed=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE, workers=1, progress=None):
+    """
+    과거 일별 수익률을 (블록) 부트스트랩으로 재표본하여 num_paths개 가상 경로를 만들고
+    최종 가치 / CAGR / MDD 분포와 손실 확률을 반환합니다.
+    리밸런싱은 과거 데이터에서 구한 rebalance_idx의 '거래일 순번'에서 수행합니다.
+    progress(done, total, partial)가 주어지면 청크가 끝날 때마다 (완료 경로 수, 중간 CAGR 중앙값)을 전달합니다.
+    """
+    inputs = prepare_inputs(price_df, target_weights, asset_keys)
+    num_years = (price_df.index[-1] - price_df.index[0]).days / 365.25
+    chunk_sizes = [min(chunk_size, num_paths - i) for i in range(0, num_paths, chunk_size)]
+    # ⭐️ 청크마다 독립적인 난수 스트림 (병렬 실행 여부와 무관하게 같은 seed → 같은 결과)
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = [(n, s, rebalance_idx, block_size, num_years, initial_capital) for n, s in zip(chunk_sizes, seed_seqs)]
+
+    def collect(results):
+        chunk_results = []; done = 0
+        for task, chunk in zip(tasks, results):
+            chunk_results.append(chunk); done += task[0]
+            if progress is not None:
+                cagr = np.concatenate([c["portfolio"]["CAGR"] for c in chunk_results])
+                progress(done, num_paths, {"portfolio_cagr_median": float(np.median(cagr))})
+        return chunk_results
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        chunk_results = collect(_simulate_task(inputs, task) for task in tasks) # ⭐️ 모듈 전역을 쓰지 않음 (API/작업 스레드 동시 실행)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_worker, initargs=(inputs,)) as pool:
+            chunk_results = collect(pool.map(_run_chunk, tasks))
+
+    result = {"num_paths": num_paths, "method": "block" if block_size > 1 else "iid", "block_size": block_size}
+    for name in ("portfolio", "benchmark"):
+        merged = {key: np.concatenate([chunk[name][key] for chunk in chunk_results])
+                  for key in ("Final Value", "CAGR", "MDD")}
+        result[name] = {key: summarize(values) for key, values in merged.items()}
+        result[name]["prob_loss"] = float((merged["Final Value"] < initial_capital).mean())
+    return result
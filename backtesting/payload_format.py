@@ -0,0 +1,95 @@
+# payload_format.py (/api/backtest 응답 포맷: 컬럼형 JSON / float32 양자화 / 압축 / ETag)
+
+import base64
+import gzip
+import hashlib
+import json
+
+import numpy as np
+
+try:
+    import brotli # 선택 의존성 (pip install brotli)
+except ImportError:
+    brotli = None
+
+COLUMNAR_MIME = "application/vnd.backtest.columnar+json"
+FORMAT_ROWS = "rows"         # 기존 형식: 날짜별 딕셔너리 리스트
+FORMAT_COLUMNAR = "columnar" # 날짜 배열 1개 + 시리즈별 숫자 배열
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+MIN_COMPRESS_BYTES = 1024 # 이보다 작은 응답은 압축 이득이 거의 없음
+
+# --- 1. 포맷 협상 ---
+
+def negotiate_format(format_arg, accept_header):
+    """?format=columnar 또는 Accept 헤더의 COLUMNAR_MIME이 있으면 컬럼형, 아니면 기존 형식"""
+    if format_arg:
+        return FORMAT_COLUMNAR if format_arg == FORMAT_COLUMNAR else FORMAT_ROWS
+    return FORMAT_COLUMNAR if accept_header and COLUMNAR_MIME in accept_header else FORMAT_ROWS
+
+def negotiate_encoding(accept_encoding):
+    """Accept-Encoding 기준으로 br(설치된 경우) > gzip > 무압축 순으로 선택"""
+    accept_encoding = (accept_encoding or "").lower()
+    if brotli is not None and "br" in accept_encoding:
+        return "br"
+    if "gzip" in accept_encoding:
+        return "gzip"
+    return None
+
+# --- 2. 컬럼형 변환 / 직렬화 ---
+
+def _json_default(value):
+    """numpy 스칼라/배열을 JSON 기본 타입으로 변환"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"JSON으로 변환할 수 없는 타입입니다: {type(value).__name__}")
+
+def dumps_json(payload):
+    """응답 본문 바이트 (numpy 값 허용, NaN은 기존 Flask 응답과 같이 NaN 그대로)"""
+    return json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def encode_series(values, float32=False):
+    """float32=True면 리틀엔디언 float32 바이트를 base64로 (브라우저에서 Float32Array로 바로 디코딩)"""
+    values = np.asarray(values, dtype=float)
+    if float32:
+        return base64.b64encode(values.astype('<f4').tobytes()).decode('ascii')
+    return values.tolist()
+
+def to_columnar_payload(columns, result_data, float32=False):
+    """
+    columns: {"dates": 날짜 문자열 리스트, "portfolio": {시리즈명: 배열}, "benchmark": {시리즈명: 배열}}
+    날짜별 딕셔너리 대신 날짜 배열 1개 + 시리즈별 배열로 응답합니다. (stats 등 나머지 필드는 그대로)
+    """
+    payload = {key: value for key, value in result_data.items()
+               if key not in ("portfolio_history", "benchmark_history")}
+    payload.update({
+        "format": FORMAT_COLUMNAR,
+        "encoding": "f32-base64" if float32 else "json",
+        "dates": columns["dates"],
+        "portfolio": {name: encode_series(values, float32) for name, values in columns["portfolio"].items()},
+        "benchmark": {name: encode_series(values, float32) for name, values in columns["benchmark"].items()},
+    })
+    return payload
+
+# --- 3. 압축 / ETag ---
+
+def make_etag(body):
+    """본문 바이트 해시 (따옴표 없는 strong ETag 값)"""
+    return hashlib.sha1(body).hexdigest()
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 헤더(쉼표 구분, W/ 접두사, * 허용)에 etag가 포함되는지"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/').strip('"') == etag for tag in tags)
+
+def compress(body, encoding):
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip" # ⭐️ 헤더 시각 고정: 같은 데이터 → 같은 바이트(ETag)
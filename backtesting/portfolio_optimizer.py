@@ -0,0 +1,126 @@
+# portfolio_optimizer.py (비중 탐색 / 효율적 투자선 계산)
+
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backtest_engine import run_batch_backtest
+
+# price_df에서 자산이 아닌 컬럼 (벤치마크, 기준금리)
+NON_ASSET_COLUMNS = ('benchmark', 'base_rate')
+
+# 프로세스 풀 워커가 공유하는 가격 데이터 (initializer에서 한 번만 전달받음)
+_worker_price_df = None
+
+# --- 1. 후보 비중 생성 ---
+
+def asset_columns(price_df):
+    """price_df에 존재하는 투자 가능 자산 컬럼 목록"""
+    return [col for col in price_df.columns if col not in NON_ASSET_COLUMNS]
+
+def simplex_grid_size(num_weights, step=0.05):
+    """simplex_grid가 만들 후보 수 C(1/step + n - 1, n - 1) (생성 전에 요청 크기를 검사할 때 사용)"""
+    return math.comb(int(round(1 / step)) + num_weights - 1, num_weights - 1)
+
+def simplex_grid(num_weights, step=0.05):
+    """합이 1인 비중 벡터를 step 간격으로 모두 생성합니다. (마지막 열이 Cash)"""
+    units = int(round(1 / step))
+    # ⭐️ '막대와 구분자' 방식: units개 단위를 num_weights칸에 나누는 모든 경우
+    rows = []
+    for dividers in itertools.combinations(range(units + num_weights - 1), num_weights - 1):
+        bounds = (-1,) + dividers + (units + num_weights - 1,)
+        rows.append([bounds[i + 1] - bounds[i] - 1 for i in range(num_weights)])
+    return np.array(rows, dtype=float) / units
+
+def random_simplex(num_weights, num_samples, seed=None):
+    """디리클레 분포로 심플렉스 위의 비중 벡터를 무작위 샘플링합니다."""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.ones(num_weights), size=num_samples)
+
+# --- 2. 후보 평가 (프로세스 풀 병렬) ---
+
+def _init_worker(price_df):
+    global _worker_price_df
+    _worker_price_df = price_df
+
+def _evaluate_chunk(args):
+    weight_chunk, asset_keys, initial_capital, rebalance_idx = args
+    return run_batch_backtest(_worker_price_df, weight_chunk, asset_keys, initial_capital, rebalance_idx)
+
+def evaluate_candidates(price_df, weight_matrix, asset_keys, initial_capital, workers=None, chunk_size=2000, rebalance_idx=None,
+                        progress=None):
+    """
+    후보 비중 행렬을 청크로 나눠 일괄 백테스트 엔진으로 평가합니다.
+    청크가 2개 이상이고 workers가 1이 아니면 프로세스 풀로 병렬 처리합니다.
+    progress(done, total)가 주어지면 청크가 끝날 때마다 평가한 후보 수를 전달합니다.
+    """
+    weight_matrix = np.atleast_2d(weight_matrix)
+    chunks = [weight_matrix[i:i + chunk_size] for i in range(0, len(weight_matrix), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    def collect(chunk_results):
+        results = []
+        for chunk, result in zip(chunks, chunk_results):
+            results.append(result)
+            if progress is not None:
+                progress(sum(len(c) for c in chunks[:len(results)]), len(weight_matrix))
+        return results
+
+    if len(chunks) <= 1 or workers == 1:
+        results = collect(run_batch_backtest(price_df, chunk, asset_keys, initial_capital, rebalance_idx) for chunk in chunks)
+    else:
+        # ⭐️ 가격 데이터는 워커당 한 번만 전달하고, 작업 단위로는 비중 청크만 보냄
+        needed_df = price_df[list(asset_keys) + ['base_rate']]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                 initializer=_init_worker, initargs=(needed_df,)) as pool:
+            tasks = [(chunk, asset_keys, initial_capital, rebalance_idx) for chunk in chunks]
+            results = collect(pool.map(_evaluate_chunk, tasks))
+
+    return {key: np.concatenate([r[key] for r in results]) for key in ('CAGR', 'MDD', 'Final Value')}
+
+# --- 3. 최적화 / 효율적 투자선 ---
+
+def pareto_frontier(cagr, mdd):
+    """CAGR은 높고 MDD(음수)는 0에 가까울수록 좋은 비지배 해의 인덱스를 MDD가 작은 순으로 반환합니다."""
+    order = np.lexsort((-cagr, -mdd)) # MDD 내림차순(손실 작은 순), 같은 MDD면 CAGR 내림차순
+    best_cagr = np.maximum.accumulate(cagr[order])
+    # ⭐️ 앞선(더 안전한) 후보들보다 CAGR이 엄격히 높을 때만 투자선에 포함
+    is_frontier = np.concatenate(([True], cagr[order][1:] > best_cagr[:-1]))
+    return order[is_frontier]
+
+def optimize_portfolio(price_df, initial_capital, asset_keys=None, max_mdd=None, step=0.05,
+                       num_random=0, seed=None, workers=None, rebalance_idx=None, progress=None):
+    """
+    자산 + Cash 비중 심플렉스를 탐색하여
+    (1) MDD 제약(max_mdd, 예: -0.2) 하에서 CAGR이 최대인 포트폴리오와
+    (2) CAGR–MDD 효율적 투자선을 함께 반환합니다.
+    """
+    asset_keys = list(asset_keys or asset_columns(price_df))
+    num_weights = len(asset_keys) + 1
+    candidates = simplex_grid(num_weights, step)
+    if num_random:
+        candidates = np.vstack([candidates, random_simplex(num_weights, num_random, seed)])
+
+    results = evaluate_candidates(price_df, candidates, asset_keys, initial_capital, workers=workers, rebalance_idx=rebalance_idx,
+                                  progress=progress)
+    cagr, mdd = results['CAGR'], results['MDD']
+
+    def to_portfolio(i):
+        return {
+            "weights": dict(zip(asset_keys + ['Cash'], candidates[i].round(6).tolist())),
+            "CAGR": float(cagr[i]), "MDD": float(mdd[i]), "Final Value": float(results['Final Value'][i]),
+        }
+
+    feasible = np.flatnonzero(mdd >= max_mdd) if max_mdd is not None else np.arange(len(cagr))
+    best = to_portfolio(feasible[np.argmax(cagr[feasible])]) if len(feasible) else None
+
+    return {
+        "assets": asset_keys + ['Cash'],
+        "num_candidates": int(len(candidates)),
+        "max_mdd": max_mdd,
+        "best": best,
+        "frontier": [to_portfolio(i) for i in pareto_frontier(cagr, mdd)],
+    }
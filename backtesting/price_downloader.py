@@ -0,0 +1,225 @@
+# price_downloader.py (한투 일별 시세 동시 수집: 토큰 버킷 속도 제한 / 세션 풀 / 재시도)
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+# ⭐️ 조회 API별 설정 (종목 일별 시세 / 업종·지수 일별 시세)
+STOCK_DAILY = {
+    "path": "/uapi/domestic-stock/v1/quotations/inquire-daily-price", "tr_id": "FHKST03010100",
+    "market": "J", "price_key": "stck_clpr", "params": {"FID_ORG_ADJ_PRC": "0"}, "headers": {},
+    "page_size": 100, # 1회 응답 최대 건수 (이보다 적게 오면 마지막 페이지)
+}
+INDEX_DAILY = {
+    "path": "/uapi/domestic-stock/v1/quotations/inquire-daily-indexchartprice", "tr_id": "FHKUP03500100",
+    "market": "U", "price_key": "bstp_nmix_prpr", "params": {}, "headers": {"custtype": "P"},
+    "page_size": None, # ⭐️ 응답 건수가 종목 API보다 적고 일정하지 않음 → 짧은 페이지로 끝을 판단하지 않음
+}
+
+WINDOW_DAYS = 130      # ⭐️ 달력 130일 ≈ 거래일 90일 이하 → 대부분의 구간이 요청 1번으로 끝남
+DEFAULT_RATE_PER_SEC = float(os.getenv("KIS_RATE_LIMIT", "15")) # 실전 계좌 초당 20건 한도에 여유를 둠 (모의투자는 2)
+DEFAULT_MAX_WORKERS = 8
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+RATE_LIMIT_MSG_CD = "EGW00201" # 초당 거래건수를 초과하였습니다.
+RETRYABLE_HTTP_STATUS = (429, 500, 502, 503, 504)
+
+class KISAPIError(Exception):
+    """재시도해도 해결되지 않는 API 오류 (rt_cd != '0')"""
+
+def normalize_page(page, price_key):
+    """output2 행 목록 → (날짜 datetime64[D] 배열, 가격 float64 배열). 날짜/가격이 없는 행은 제외"""
+    pairs = [(row['stck_bsop_date'], row[price_key]) for row in page
+             if row.get('stck_bsop_date') and row.get(price_key) not in (None, '')]
+    dates = np.array([f"{d[:4]}-{d[4:6]}-{d[6:8]}" for d, _ in pairs], dtype='datetime64[D]')
+    prices = np.array([p for _, p in pairs], dtype=float)
+    return dates, prices
+
+def _to_day(dt):
+    return np.datetime64(dt.strftime("%Y-%m-%d"), 'D')
+
+def _day_str(day):
+    return str(day).replace('-', '')
+
+# --- 1. 속도 제한 (토큰 버킷) ---
+
+class TokenBucket:
+    """
+    초당 rate개의 토큰이 채워지는 스레드 안전 토큰 버킷. 모든 워커가 하나를 공유합니다.
+    임의의 1초 구간 호출 수는 최대 capacity + rate이므로, 기본 capacity=1로 버스트 없이 고르게 호출합니다.
+    """
+
+    def __init__(self, rate_per_sec, capacity=1.0):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# --- 2. API 클라이언트 (세션 풀 + 재시도) ---
+
+class KISDailyPriceClient:
+    """
+    일별 시세 호출 클라이언트 (endpoint: STOCK_DAILY 또는 INDEX_DAILY).
+    연결 풀을 공유하는 세션 하나를 여러 스레드가 함께 사용합니다.
+    """
+
+    def __init__(self, base_url, app_key, app_secret, access_token, endpoint=STOCK_DAILY,
+                 rate_per_sec=DEFAULT_RATE_PER_SEC, pool_size=DEFAULT_MAX_WORKERS, max_retries=MAX_RETRIES):
+        self.endpoint = endpoint
+        self.price_key = endpoint["price_key"]
+        self.url = f"{base_url}{endpoint['path']}"
+        self.bucket = TokenBucket(rate_per_sec)
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        authorization = access_token if access_token and access_token.startswith("Bearer ") else f"Bearer {access_token}"
+        self.session.headers.update({
+            "authorization": authorization, "appkey": app_key or "", "appsecret": app_secret or "",
+            "tr_id": endpoint["tr_id"], **endpoint["headers"],
+        })
+
+    def fetch_page(self, symbol, start_date_str, end_date_str):
+        """[start, end] 구간의 최근 날짜부터 한 페이지 (output2, 최신순). 속도 제한/일시 오류는 백오프 후 재시도"""
+        params = {
+            "FID_COND_MRKT_DIV_CODE": self.endpoint["market"],
+            "FID_INPUT_ISCD": symbol,
+            "FID_INPUT_DATE_1": start_date_str,
+            "FID_INPUT_DATE_2": end_date_str,
+            "FID_PERIOD_DIV_CODE": "D",
+            **self.endpoint["params"],
+        }
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                res = self.session.get(self.url, params=params, timeout=10)
+                data = res.json() if res.content else {}
+            except (requests.RequestException, ValueError) as e:
+                reason = f"HTTP 오류: {e}"
+            else:
+                if data.get('rt_cd') == '0':
+                    return [row for row in data.get('output2') or [] if row.get('stck_bsop_date')]
+                if data.get('msg_cd') == RATE_LIMIT_MSG_CD:
+                    reason = "초당 호출 한도 초과"
+                elif res.status_code in RETRYABLE_HTTP_STATUS:
+                    reason = f"HTTP {res.status_code}"
+                else:
+                    raise KISAPIError(f"{symbol} ({end_date_str}): {data.get('msg1', res.status_code)}")
+            if attempt == self.max_retries:
+                raise KISAPIError(f"{symbol} ({end_date_str}): 재시도 {self.max_retries}회 초과 ({reason})")
+            # ⭐️ 지수 백오프 + 지터 (동시에 실패한 워커들이 같은 시각에 다시 몰리지 않도록)
+            time.sleep(BACKOFF_BASE_SECONDS * (2 ** attempt) * (0.5 + random.random()))
+
+    def iter_pages(self, symbol, start_dt, end_dt):
+        """
+        ⭐️ [start, end] 구간을 최신 페이지부터 조회하며 페이지마다 (날짜, 가격) 배열을 바로 내보냅니다.
+        경계일(다음 페이지에 들어올 수 있는 가장 늦은 날짜)을 추적해, 이전 페이지와 겹치는 행은 처음부터 버립니다.
+        빈 페이지, 시작일 이전까지 도달한 페이지, (page_size가 정해진 API에서) 짧은 페이지를 받으면 끝냅니다.
+        (전체 응답을 쌓아 두었다가 drop_duplicates 하지 않으므로 메모리는 페이지 하나 분량)
+        """
+        start = _to_day(start_dt)
+        boundary = _to_day(end_dt)
+        while boundary >= start:
+            page = self.fetch_page(symbol, _day_str(start), _day_str(boundary))
+            dates, prices = normalize_page(page, self.price_key)
+            keep = (dates >= start) & (dates <= boundary)
+            if keep.any():
+                yield dates[keep], prices[keep]
+            if not len(dates) or dates.min() <= start:
+                return
+            page_size = self.endpoint.get("page_size")
+            if page_size and len(page) < page_size:
+                return
+            boundary = dates.min() - np.timedelta64(1, 'D')
+
+# --- 3. 동시 수집 ---
+
+def split_windows(start_date_str, end_date_str, window_days=WINDOW_DAYS):
+    """[start, end]를 최신 구간부터 window_days 단위로 나눕니다. (각 구간은 독립적으로 조회 가능)"""
+    start_dt = datetime.strptime(start_date_str, "%Y%m%d")
+    window_end = datetime.strptime(end_date_str, "%Y%m%d")
+    windows = []
+    while window_end >= start_dt:
+        window_start = max(start_dt, window_end - timedelta(days=window_days - 1))
+        windows.append((window_start, window_end))
+        window_end = window_start - timedelta(days=1)
+    return windows
+
+def download_prices(client, symbols, start_date_str, end_date_str, sink, max_workers=DEFAULT_MAX_WORKERS,
+                    start_dates=None):
+    """
+    여러 종목의 시세를 (종목 × 기간 구간) 단위 작업으로 나눠 스레드 풀에서 동시에 수집하고,
+    받은 페이지는 sink(종목, 날짜 배열, 가격 배열)로 즉시 넘깁니다. (구간끼리, 페이지끼리 날짜가 겹치지 않음)
+    호출 속도는 client의 토큰 버킷 하나로 전체 제한됩니다.
+    start_dates: {종목: 시작일} (증분 동기화처럼 종목마다 시작일이 다를 때, 없으면 start_date_str)
+    반환: {종목: 수신 건수}. 실패한 종목은 포함되지 않습니다.
+    """
+    start_dates = start_dates or {}
+    tasks = [(symbol, window) for symbol in symbols
+             for window in split_windows(start_dates.get(symbol, start_date_str), end_date_str)]
+    counts = {symbol: 0 for symbol in symbols}
+    failed = set()
+    lock = threading.Lock() # counts / failed는 여러 워커가 함께 갱신
+
+    def run(task):
+        symbol, (window_start, window_end) = task
+        with lock:
+            if symbol in failed: # 이미 실패한 종목의 나머지 구간은 건너뜀
+                return
+        try:
+            for dates, prices in client.iter_pages(symbol, window_start, window_end):
+                sink(symbol, dates, prices)
+                with lock:
+                    counts[symbol] += len(dates)
+        except KISAPIError as e:
+            print(f"❌ [API 오류] {e}")
+            with lock:
+                failed.add(symbol)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(run, tasks))
+
+    for symbol in symbols:
+        print(f"   -> {symbol}: {counts[symbol]}일치 수집" if symbol not in failed else f"   -> {symbol}: 수집 실패")
+    return {symbol: count for symbol, count in counts.items() if symbol not in failed}
+
+def download_price_histories(client, symbols, start_date_str, end_date_str, max_workers=DEFAULT_MAX_WORKERS,
+                             start_dates=None):
+    """
+    download_prices의 리스트 반환 버전 (기존 호출부 호환).
+    반환: {종목: [{'stck_bsop_date', 가격 키}, ...] (최신순)}. 실패한 종목은 빈 리스트입니다.
+    """
+    pages = {symbol: [] for symbol in symbols}
+    received = download_prices(client, symbols, start_date_str, end_date_str,
+                               lambda symbol, dates, prices: pages[symbol].append((dates, prices)),
+                               max_workers=max_workers, start_dates=start_dates)
+    histories = {}
+    for symbol in symbols:
+        if symbol not in received or not pages[symbol]:
+            histories[symbol] = []
+            continue
+        dates = np.concatenate([d for d, _ in pages[symbol]]); prices = np.concatenate([p for _, p in pages[symbol]])
+        order = np.argsort(dates)[::-1]
+        histories[symbol] = [{'stck_bsop_date': _day_str(d), client.price_key: p}
+                             for d, p in zip(dates[order], prices[order].tolist())]
+    return histories
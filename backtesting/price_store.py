@@ -0,0 +1,227 @@
+# price_store.py (CSV → 컬럼별 .npy 바이너리 가격 저장소)
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR_NAME = ".price_store"
+META_FILE = "meta.json"
+DATES_FILE = "dates.npy"
+
+# ⭐️ load_data는 스레드 풀에서 동시에 불리므로 저장소 재생성/교체는 한 스레드씩 (RLock: 재생성 중 다시 열 수 있도록)
+_g_store_lock = threading.RLock()
+_g_stores = {} # CSV 절대 경로 -> PriceStore (원본 CSV 정보가 같으면 meta/날짜 인덱스를 다시 읽지 않음)
+
+# --- 1. 경로 / 원본 파일 정보 ---
+
+def store_dir_for(csv_path):
+    """CSV와 같은 폴더의 .price_store/<파일명> 디렉터리"""
+    base_dir = os.path.dirname(os.path.abspath(csv_path))
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(base_dir, STORE_DIR_NAME, name)
+
+def source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+def _replace_atomic(path, write):
+    """같은 폴더의 고유한 임시 파일에 write(파일 객체)로 쓴 뒤 os.replace로 교체 (동시에 써도 임시 파일이 겹치지 않음)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp_path, 0o644) # mkstemp는 0600으로 만듦
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _save_npy_atomic(path, array):
+    _replace_atomic(path, lambda f: np.save(f, array))
+
+# --- 2. 저장소 생성 ---
+
+def build_store(csv_path, store_dir=None):
+    """CSV를 한 번 파싱하여 날짜 인덱스 + 컬럼별 .npy 파일로 변환합니다. (meta.json을 마지막에 써서 완료 표시)"""
+    signature = source_signature(csv_path) # ⭐️ 파싱 전에 읽어야 변환 중 CSV가 바뀌어도 다음 번에 재생성됨
+    df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+    return write_store(df, store_dir or store_dir_for(csv_path), signature)
+
+def write_store(df, store_dir, signature):
+    """DataFrame을 날짜 인덱스 + 컬럼별 .npy 파일로 저장합니다. (signature: 원본 CSV 정보)"""
+    with _g_store_lock:
+        os.makedirs(store_dir, exist_ok=True)
+        _save_npy_atomic(os.path.join(store_dir, DATES_FILE), df.index.values)
+        column_files = {}
+        for i, col in enumerate(df.columns):
+            file_name = f"col_{i}.npy" # 종목코드 등 임의의 컬럼명을 파일명으로 쓰지 않음
+            _save_npy_atomic(os.path.join(store_dir, file_name), df[col].to_numpy())
+            column_files[str(col)] = file_name
+
+        meta = {"source": signature, "index_name": df.index.name, "rows": len(df), "columns": column_files}
+        _replace_atomic(os.path.join(store_dir, META_FILE),
+                        lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode('utf-8')))
+        return meta
+
+def _read_meta(store_dir):
+    try:
+        with open(os.path.join(store_dir, META_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# --- 3. 저장소 읽기 (mmap) ---
+
+class PriceStore:
+    """CSV 가격 파일의 컬럼형 사본. 원본 CSV가 바뀌면 열 때 자동으로 재생성합니다. (open_store로 열기)"""
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.store_dir = store_dir_for(csv_path)
+        with _g_store_lock: # 다른 스레드가 재생성 중이면 끝난 뒤 그 결과를 읽음
+            meta = _read_meta(self.store_dir)
+            if meta is None or meta["source"] != source_signature(csv_path):
+                print(f"⏳ 가격 저장소 생성: {os.path.basename(csv_path)}")
+                meta = build_store(csv_path, self.store_dir)
+        self.meta = meta
+        self.columns = list(meta["columns"].keys())
+        self.dates = pd.DatetimeIndex(
+            np.load(os.path.join(self.store_dir, DATES_FILE), mmap_mode='r'), name=meta["index_name"]
+        )
+
+    def column(self, name):
+        """컬럼 하나를 메모리 매핑 배열로 반환합니다. (실제 읽기는 접근 시점에 발생)"""
+        return np.load(os.path.join(self.store_dir, self.meta["columns"][name]), mmap_mode='r')
+
+    def to_frame(self, columns=None):
+        """요청한 컬럼만 읽어 DataFrame으로 만듭니다. (수백 개 종목 파일이어도 비용은 요청 컬럼 수에 비례)"""
+        columns = self.columns if columns is None else list(columns)
+        missing = [col for col in columns if col not in self.meta["columns"]]
+        if missing:
+            raise KeyError(f"가격 파일에 없는 종목입니다: {missing}")
+        return pd.DataFrame({col: self.column(col) for col in columns}, index=self.dates, columns=columns)
+
+def open_store(csv_path):
+    """
+    ⭐️ 가격 저장소를 엽니다. 원본 CSV 정보(os.stat 한 번)가 그대로면 열어 둔 PriceStore를 재사용하고,
+    바뀌었으면 잠금 안에서 한 스레드만 재생성합니다. (동시에 들어온 요청은 그 결과를 같이 사용)
+    """
+    key = os.path.abspath(csv_path)
+    signature = source_signature(csv_path)
+    store = _g_stores.get(key)
+    if store is not None and store.meta["source"] == signature:
+        return store
+    with _g_store_lock:
+        store = _g_stores.get(key)
+        if store is None or store.meta["source"] != signature:
+            store = PriceStore(csv_path)
+            _g_stores[key] = store
+        return store
+
+def load_price_frame(csv_path, columns=None):
+    """read_csv 대신 사용하는 가격 DataFrame 로더 (날짜 인덱스, 요청한 컬럼만)"""
+    return open_store(csv_path).to_frame(columns)
+
+def last_valid_dates(csv_path):
+    """컬럼(종목)별 마지막으로 값이 있는 날짜 {컬럼: Timestamp} (값이 하나도 없는 컬럼은 제외)"""
+    store = open_store(csv_path)
+    last_dates = {}
+    for col in store.columns:
+        valid = np.flatnonzero(~pd.isna(np.asarray(store.column(col))))
+        if len(valid):
+            last_dates[col] = store.dates[valid[-1]]
+    return last_dates
+
+def append_prices(csv_path, new_df, replace_columns=False):
+    """
+    ⭐️ 새로 받은 가격(날짜 인덱스 × 종목)을 기존 CSV에 병합합니다.
+    - 같은 날짜는 새 값으로 덮어써서 중복 행이 생기지 않고, 새 종목은 오른쪽에 컬럼으로 추가됩니다.
+    - ⭐️ [신규] replace_columns: new_df에 있는 종목은 기존 값을 모두 버리고 새 이력으로 교체합니다. (전체 재수집용)
+      new_df에 없는 종목(요청하지 않았거나 수집에 실패한 종목)의 컬럼은 그대로 유지됩니다.
+    - 임시 파일에 쓴 뒤 os.replace로 교체하고, 병합 결과로 컬럼 저장소도 바로 갱신합니다. (CSV 재파싱 없음)
+    반환: 병합 후 전체 행 수
+    """
+    if os.path.exists(csv_path):
+        existing = open_store(csv_path).to_frame()
+        if replace_columns:
+            kept = existing.drop(columns=[col for col in new_df.columns if col in existing.columns])
+            existing = kept.dropna(how='all').reindex(columns=existing.columns) # 교체 종목만 있던 날짜는 제거
+        columns = list(existing.columns) + [col for col in new_df.columns if col not in existing.columns]
+        merged = new_df.combine_first(existing)[columns].rename_axis(existing.index.name)
+    else:
+        merged = new_df
+    return write_prices(csv_path, merged)
+
+def write_prices(csv_path, df):
+    """가격 DataFrame으로 CSV를 원자적으로 교체하고 컬럼 저장소도 바로 갱신합니다. 반환: 전체 행 수"""
+    df = df.rename_axis(df.index.name or 'Date').sort_index()
+    with _g_store_lock: # CSV 교체와 저장소 갱신 사이에 다른 스레드가 재생성하지 않도록
+        _replace_atomic(os.path.abspath(csv_path), lambda f: f.write(df.to_csv().encode('utf-8')))
+        write_store(df, store_dir_for(csv_path), source_signature(csv_path))
+        _g_stores.pop(os.path.abspath(csv_path), None)
+    return len(df)
+
+def price_columns(csv_path):
+    """가격 파일의 전체 컬럼(종목) 목록. 데이터는 읽지 않고 meta.json만 사용합니다."""
+    return open_store(csv_path).columns
+
+# --- 4. 수집 페이지 스풀 ---
+
+class PageSpool:
+    """
+    ⭐️ 수집 중인 페이지(날짜 배열, 가격 배열)를 종목별 임시 바이너리 파일(int64 날짜 / float64 가격)에 바로 이어 씁니다.
+    수집하는 동안 메모리에는 현재 페이지만 있고, 끝난 뒤 종목별로 한 번 읽어 정렬합니다.
+    (download_prices의 sink로 사용. 여러 스레드가 동시에 write해도 안전)
+    """
+
+    def __init__(self, base_dir=None):
+        self.dir = tempfile.mkdtemp(prefix="price_spool_", dir=base_dir)
+        self._files = {} # 종목 -> 파일 번호
+        self._lock = threading.Lock()
+
+    def _paths(self, index):
+        return (os.path.join(self.dir, f"{index}.dates.bin"), os.path.join(self.dir, f"{index}.prices.bin"))
+
+    def write(self, symbol, dates, prices):
+        with self._lock:
+            dates_path, prices_path = self._paths(self._files.setdefault(symbol, len(self._files)))
+            with open(dates_path, 'ab') as f:
+                dates.astype('datetime64[D]').astype('<i8').tofile(f)
+            with open(prices_path, 'ab') as f:
+                prices.astype('<f8').tofile(f)
+
+    def symbols(self):
+        return list(self._files)
+
+    def series(self, symbol, name=None):
+        """종목의 수집 결과 (날짜 오름차순 Series). 페이지끼리 날짜가 겹치지 않으므로 정렬만 합니다."""
+        dates_path, prices_path = self._paths(self._files[symbol])
+        dates = np.fromfile(dates_path, dtype='<i8').astype('datetime64[D]')
+        prices = np.fromfile(prices_path, dtype='<f8')
+        order = np.argsort(dates, kind='stable')
+        return pd.Series(prices[order], index=pd.DatetimeIndex(dates[order].astype('datetime64[ns]'), name='Date'),
+                         name=name if name is not None else symbol)
+
+    def to_frame(self, column_map=None, symbols=None):
+        """날짜 인덱스 × 종목 가격 DataFrame (column_map: 종목코드 → 컬럼명, symbols: 컬럼 순서)"""
+        column_map = column_map or {}
+        series = [self.series(symbol, column_map.get(symbol, symbol))
+                  for symbol in (self.symbols() if symbols is None else symbols) if symbol in self._files]
+        if not series:
+            return pd.DataFrame()
+        return pd.concat(series, axis=1, sort=True).rename_axis('Date') # 종목마다 날짜가 달라도 날짜 오름차순
+
+    def close(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,56 @@
+# price_sync.py (증분 시세 동기화: 가격 저장소의 마지막 날짜 이후만 수집해 추가)
+
+import os
+from datetime import datetime, timedelta
+
+from price_downloader import download_prices, DEFAULT_MAX_WORKERS
+from price_store import PageSpool, append_prices, last_valid_dates
+
+def plan_sync(csv_path, tickers, start_date_str, end_date_str, column_map=None):
+    """종목별 조회 시작일: 저장된 마지막 날짜 다음 날 (저장된 값이 없으면 start_date_str). 이미 최신인 종목은 제외"""
+    column_map = column_map or {}
+    last_dates = last_valid_dates(csv_path) if os.path.exists(csv_path) else {}
+    end_dt = datetime.strptime(end_date_str, "%Y%m%d")
+    start_dates = {}
+    for ticker in tickers:
+        last_date = last_dates.get(column_map.get(ticker, ticker))
+        start_dt = last_date + timedelta(days=1) if last_date is not None else datetime.strptime(start_date_str, "%Y%m%d")
+        if start_dt <= end_dt:
+            start_dates[ticker] = start_dt.strftime("%Y%m%d")
+    return start_dates
+
+def sync_price_file(client, csv_path, tickers, start_date_str, end_date_str=None, column_map=None,
+                    max_workers=DEFAULT_MAX_WORKERS, full_refresh=False):
+    """
+    ⭐️ 가격 CSV(+컬럼 저장소)를 증분 갱신합니다.
+    종목별로 마지막 저장일 이후만 조회하므로, 매일 갱신하면 종목당 요청 1번이면 됩니다.
+    받은 페이지는 PageSpool에 바로 기록되고, 수집이 끝나면 한 번에 저장소에 병합됩니다.
+    full_refresh: 저장된 날짜를 무시하고 전체 기간을 받아 요청 종목의 컬럼을 새 이력으로 교체합니다.
+       ⭐️ [수정] 요청하지 않았거나 수집에 실패한 종목의 기존 컬럼은 그대로 유지합니다. (파일 전체를 덮어쓰지 않음)
+    ⭐️ 수집 도중 실패한 종목은 이미 받은 페이지도 병합하지 않습니다. (중간에 빈 구간이 저장되면
+       다음 동기화가 마지막 날짜 이후만 받으므로 그 구간이 영영 채워지지 않음 → 다음 실행에서 같은 구간부터 재시도)
+    반환: (새로 추가/갱신된 (날짜, 종목) 값 개수, 실패한 종목 리스트)
+    """
+    end_date_str = end_date_str or datetime.now().strftime("%Y%m%d")
+    if full_refresh:
+        start_dates = {ticker: start_date_str for ticker in tickers}
+    else:
+        start_dates = plan_sync(csv_path, tickers, start_date_str, end_date_str, column_map)
+    if not start_dates:
+        print(f"✅ {os.path.basename(csv_path)}: 모든 종목이 최신 상태입니다.")
+        return 0, []
+
+    print(f"--- {'전체' if full_refresh else '증분'} 수집: {len(start_dates)}개 종목 (~ {end_date_str}) ---")
+    with PageSpool(os.path.dirname(os.path.abspath(csv_path))) as spool:
+        received = download_prices(client, list(start_dates), start_date_str, end_date_str, spool.write,
+                                   max_workers=max_workers, start_dates=start_dates)
+        failed = [ticker for ticker in start_dates if ticker not in received]
+        new_df = spool.to_frame(column_map, symbols=[ticker for ticker in start_dates if ticker in received])
+    if new_df.empty:
+        print(f"✅ {os.path.basename(csv_path)}: 새 거래일 데이터가 없습니다.")
+        return 0, failed
+
+    total_rows = append_prices(csv_path, new_df, replace_columns=full_refresh)
+    added = int(new_df.notna().sum().sum())
+    print(f"✅ {os.path.basename(csv_path)}: {added}개 값 저장 ({new_df.index[0]:%Y-%m-%d} ~ {new_df.index[-1]:%Y-%m-%d}, 총 {total_rows}일)")
+    return added, failed
@@ -0,0 +1,48 @@
+# rate_curve.py (기준금리 계단 함수 → 일별 금리 시리즈)
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 한국은행 기준금리 변경 이력 (변경일: 연 %)
+BASE_RATE_HISTORY = {
+    '2021-11-25': 1.00, '2022-01-14': 1.25, '2022-04-14': 1.50,
+    '2022-05-26': 1.75, '2022-07-13': 2.25, '2022-08-25': 2.50,
+    '2022-10-12': 3.00, '2022-11-24': 3.25, '2023-01-13': 3.50,
+    '2024-10-11': 3.25, '2024-11-28': 3.00, '2025-02-25': 2.75,
+    '2025-05-29': 2.50,
+}
+
+class RateCurve:
+    """금리 변경일/금리 배열을 들고, 임의 기간의 일별 금리를 searchsorted 한 번으로 만듭니다."""
+
+    def __init__(self, rate_history, name="base_rate"):
+        history = pd.Series(rate_history, dtype=float)
+        history.index = pd.to_datetime(history.index)
+        history = history.sort_index()
+        self.change_dates = history.index.values
+        self.rates = history.to_numpy() / 100.0 # ⭐️ % → 소수
+        self.name = name
+        self._daily_values = lru_cache(maxsize=64)(self._build_daily_values)
+
+    @classmethod
+    def from_csv(cls, path, date_column='date', rate_column='rate'):
+        """date, rate(연 %) 컬럼을 가진 CSV에서 금리 이력을 읽습니다."""
+        df = pd.read_csv(path)
+        return cls(dict(zip(df[date_column].astype(str), df[rate_column])))
+
+    def _build_daily_values(self, start_date, end_date):
+        all_days = pd.date_range(start=start_date, end=end_date, freq='D')
+        # 각 날짜 이전(포함)의 마지막 변경일 위치. 첫 변경일 이전은 -1 → NaN (기존 동작과 동일)
+        pos = np.searchsorted(self.change_dates, all_days.values, side='right') - 1
+        values = np.where(pos >= 0, self.rates[np.maximum(pos, 0)], np.nan)
+        values.flags.writeable = False # ⭐️ 캐시된 배열이 호출자에 의해 바뀌지 않도록 보호
+        return all_days, values
+
+    def daily_series(self, start_date, end_date):
+        """start_date ~ end_date의 일별(달력일) 금리 시리즈. 같은 기간은 캐시된 배열을 재사용합니다."""
+        all_days, values = self._daily_values(str(start_date), str(end_date))
+        return pd.Series(values, index=all_days, name=self.name)
+
+DEFAULT_RATE_CURVE = RateCurve(BASE_RATE_HISTORY)
@@ -0,0 +1,102 @@
+# rebalance_schedule.py (리밸런싱 일정: 달력 주기 / 비중 이탈 밴드)
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import cash_growth_factors, monthly_rebalance_indices
+
+# 달력 주기 → pandas Period 주기
+CALENDAR_FREQS = {'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q', 'annual': 'Y'}
+LEGACY_SCHEDULE = 'legacy_month_end' # 기존 규칙: 다음 '달력일'이 다른 달이면 리밸런싱 (주말 월말은 건너뜀)
+
+# 같은 날짜 인덱스 + 같은 주기에 대해서는 인덱스 배열을 재사용 (파라미터 스윕에서 수천 번 호출됨)
+_calendar_cache = {}
+_CALENDAR_CACHE_MAX = 256
+
+# --- 1. 달력 기반 일정 ---
+
+def _dates_key(dates):
+    return (len(dates), hash(dates.asi8.tobytes()))
+
+def calendar_rebalance_indices(dates, freq='monthly'):
+    """실제 거래일 인덱스 기준으로 각 주/월/분기/연도의 '마지막 거래일' 인덱스를 구합니다."""
+    dates = pd.DatetimeIndex(dates)
+    cache_key = (freq, _dates_key(dates))
+    cached = _calendar_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if freq == LEGACY_SCHEDULE:
+        indices = monthly_rebalance_indices(dates)
+    else:
+        periods = dates.to_period(CALENDAR_FREQS[freq]).asi8
+        # ⭐️ 다음 거래일의 기간이 바뀌는 날 = 그 기간의 마지막 거래일 (데이터 마지막 날은 제외)
+        is_period_end = periods[:-1] != periods[1:]
+        is_period_end[0] = False # 첫날은 초기 매수일
+        indices = np.flatnonzero(is_period_end)
+
+    indices.flags.writeable = False
+    if len(_calendar_cache) >= _CALENDAR_CACHE_MAX:
+        _calendar_cache.clear()
+    _calendar_cache[cache_key] = indices
+    return indices
+
+# --- 2. 비중 이탈 밴드 일정 ---
+
+def drift_band_rebalance_indices(price_df, target_weights, asset_keys, band, check_idx=None, block_size=256):
+    """
+    어느 자산(현금 포함)이든 목표 비중에서 band(예: 0.05 = 5%p) 넘게 벗어나는 첫 날 리밸런싱합니다.
+    check_idx를 주면 해당 날짜(예: 월말)에만 이탈 여부를 검사합니다.
+    ⭐️ 비중은 자본 규모와 무관하므로 직전 리밸런싱일 대비 가격 비율만으로 계산하고,
+       다음 리밸런싱일은 block_size 일씩 배열로 훑어 찾습니다.
+    """
+    asset_keys = list(asset_keys)
+    prices = price_df[asset_keys].to_numpy(dtype=float)
+    cash_index = np.cumprod(cash_growth_factors(price_df.index, price_df['base_rate'])) # 엔진과 같은 현금 증가
+    weights = np.array([target_weights[asset] for asset in asset_keys], dtype=float)
+    all_weights = np.append(weights, target_weights['Cash'])
+    num_days = len(prices)
+
+    can_check = np.ones(num_days, dtype=bool)
+    if check_idx is not None:
+        can_check[:] = False; can_check[np.asarray(check_idx)] = True
+
+    rebalances = []
+    start = 0
+    while start < num_days - 1:
+        found = None
+        block_start = start + 1
+        while block_start < num_days and found is None:
+            block = slice(block_start, min(block_start + block_size, num_days))
+            asset_rel = weights * prices[block] / prices[start]
+            cash_rel = target_weights['Cash'] * cash_index[block] / cash_index[start]
+            total_rel = asset_rel.sum(axis=1) + cash_rel
+            drift = np.abs(np.column_stack((asset_rel, cash_rel)) / total_rel[:, None] - all_weights).max(axis=1)
+            hits = np.flatnonzero((drift > band) & can_check[block])
+            if len(hits):
+                found = block_start + hits[0]
+            block_start = block.stop
+        if found is None or found >= num_days - 1:
+            break
+        rebalances.append(found)
+        start = found
+    return np.array(rebalances, dtype=int)
+
+# --- 3. 일정 해석 ---
+
+def resolve_rebalance_indices(price_df, schedule, target_weights=None, asset_keys=None):
+    """
+    schedule 예시:
+      - 'weekly' / 'monthly' / 'quarterly' / 'annual' / 'legacy_month_end'
+      - {'type': 'band', 'band': 0.05, 'check': 'monthly'}  (check 생략 시 매 거래일 검사)
+    """
+    if isinstance(schedule, str):
+        if schedule != LEGACY_SCHEDULE and schedule not in CALENDAR_FREQS:
+            raise ValueError(f"지원하지 않는 리밸런싱 주기입니다: {schedule}")
+        return calendar_rebalance_indices(price_df.index, schedule)
+
+    if schedule.get('type') == 'band':
+        check = schedule.get('check')
+        check_idx = calendar_rebalance_indices(price_df.index, check) if check else None
+        return drift_band_rebalance_indices(price_df, target_weights, asset_keys, schedule['band'], check_idx)
+    raise ValueError(f"지원하지 않는 리밸런싱 일정입니다: {schedule}")
@@ -0,0 +1,97 @@
+# risk_metrics.py (위험 지표: 한 번의 벡터화 계산)
+
+import numpy as np
+
+from backtest_engine import cash_growth_factors
+from crash_analytics import underwater_segments
+
+TRADING_DAYS_PER_YEAR = 252
+
+# --- 1. 기간별 수익률 표 ---
+
+def period_return_table(dates, values, freq):
+    """각 기간(M: 월, Y: 연) 마지막 거래일 가치 기준 수익률. 첫 기간은 시작 가치 대비."""
+    periods = dates.to_period(freq)
+    codes = periods.asi8
+    is_last = np.concatenate((codes[:-1] != codes[1:], [True]))
+    last_idx = np.flatnonzero(is_last)
+    period_end_values = values[last_idx]
+    base_values = np.concatenate(([values[0]], period_end_values[:-1]))
+    return periods[last_idx], period_end_values / base_values - 1
+
+def monthly_return_table(dates, values):
+    """{'2024': {'1': 0.012, '2': -0.03, ...}, ...}"""
+    periods, returns = period_return_table(dates, values, 'M')
+    table = {}
+    for period, ret in zip(periods, returns.tolist()):
+        table.setdefault(str(period.year), {})[str(period.month)] = ret
+    return table
+
+def annual_return_table(dates, values):
+    periods, returns = period_return_table(dates, values, 'Y')
+    return {str(period.year): ret for period, ret in zip(periods, returns.tolist())}
+
+# --- 2. 위험 지표 ---
+
+def compute_risk_metrics(dates, values, risk_free_rates=None, benchmark_values=None):
+    """
+    일별 가치 배열로 CAGR/MDD/변동성/Sharpe/Sortino/Calmar/드로다운 기간/회복 기간과
+    (benchmark_values가 있으면) 베타/알파/추적오차/정보비율, 월별·연도별 수익률 표를 함께 계산합니다.
+    risk_free_rates: 일별 연율 무위험 금리 (price_df['base_rate']). 행마다 엔진의 현금과 같은 수익률로 환산합니다.
+    """
+    values = np.asarray(values, dtype=float)
+    returns = values[1:] / values[:-1] - 1
+    # ⭐️ 무위험 수익률 = 엔진의 현금 수익률 (직전 거래일 이후 달력일 복리). 연율화는 거래일 252 기준
+    rf = np.zeros_like(returns) if risk_free_rates is None else cash_growth_factors(dates, risk_free_rates)[1:] - 1
+    excess = returns - rf
+    ann = np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    num_years = (dates[-1] - dates[0]).days / 365.25
+    cagr = (values[-1] / values[0]) ** (1 / num_years) - 1
+    starts, ends, troughs, drawdown = underwater_segments(values)
+    mdd = float(drawdown.min())
+
+    volatility = returns.std(ddof=1) * ann
+    excess_std = excess.std(ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2)) * ann
+
+    metrics = {
+        "CAGR": cagr, "MDD": mdd, "Final Value": values[-1],
+        "Volatility": volatility,
+        "Sharpe": excess.mean() / excess_std * ann if excess_std > 0 else None,
+        "Sortino": excess.mean() * TRADING_DAYS_PER_YEAR / downside if downside > 0 else None,
+        "Calmar": cagr / abs(mdd) if mdd < 0 else None,
+    }
+
+    # 드로다운 기간 (달력일): 가장 긴 수면 아래 구간, MDD 구간의 저점 → 회복
+    if len(starts):
+        end_dates = dates.values[np.minimum(ends, len(values) - 1)]
+        durations = (end_dates - dates.values[starts - 1]).astype('timedelta64[D]').astype(int)
+        mdd_seg = int(np.argmin(drawdown[troughs]))
+        recovered = ends[mdd_seg] < len(values)
+        metrics["Max Drawdown Duration Days"] = int(durations.max())
+        metrics["MDD Recovery Days"] = int((dates[ends[mdd_seg]] - dates[troughs[mdd_seg]]).days) if recovered else None
+    else:
+        metrics["Max Drawdown Duration Days"] = 0
+        metrics["MDD Recovery Days"] = 0
+
+    if benchmark_values is not None:
+        benchmark_values = np.asarray(benchmark_values, dtype=float)
+        bm_returns = benchmark_values[1:] / benchmark_values[:-1] - 1
+        bm_excess = bm_returns - rf
+        cov = np.cov(excess, bm_excess) # ⭐️ 공분산 행렬 한 번으로 베타 계산
+        beta = cov[0, 1] / cov[1, 1]
+        active = returns - bm_returns
+        tracking_error = active.std(ddof=1) * ann
+        metrics.update({
+            "Beta": beta,
+            "Alpha": (excess.mean() - beta * bm_excess.mean()) * TRADING_DAYS_PER_YEAR, # 젠센 알파 (연율)
+            "Tracking Error": tracking_error,
+            "Information Ratio": active.mean() * TRADING_DAYS_PER_YEAR / tracking_error if tracking_error > 0 else None,
+            "Correlation": cov[0, 1] / np.sqrt(cov[0, 0] * cov[1, 1]) if cov[0, 0] > 0 and cov[1, 1] > 0 else None,
+        })
+
+    metrics = {key: (float(value) if isinstance(value, (float, np.floating)) else value) for key, value in metrics.items()}
+    metrics["Monthly Returns"] = monthly_return_table(dates, values)
+    metrics["Annual Returns"] = annual_return_table(dates, values)
+    return metrics
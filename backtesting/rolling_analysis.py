@@ -0,0 +1,134 @@
+# rolling_analysis.py (롤링 윈도우 / 워크포워드 분석)
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import run_rebalancing_backtest_vectorized, monthly_rebalance_indices
+
+DEFAULT_HORIZONS_YEARS = (1, 3, 5)
+SUMMARY_PERCENTILES = (5, 25, 50, 75, 95)
+
+# --- 1. 구간 MDD 테이블 (2^k 길이 블록별 최고점/최저점/MDD) ---
+
+def build_drawdown_table(values):
+    """
+    levels[k] = (max, min, mdd) : 각 시작점 i에서 길이 2^k 블록 [i, i + 2^k)의 통계.
+    두 블록 (L, R)을 이으면 mdd = min(L.mdd, R.mdd, R.min / L.max - 1) 이므로
+    레벨마다 넘파이 연산 한 번으로 만들 수 있습니다. (전체 O(days × log days))
+    """
+    values = np.asarray(values, dtype=float)
+    levels = [(values, values, np.zeros_like(values))]
+    width = 1
+    while width * 2 <= len(values):
+        prev_max, prev_min, prev_mdd = levels[-1]
+        count = len(values) - width * 2 + 1
+        left = slice(0, count); right = slice(width, width + count)
+        levels.append((
+            np.maximum(prev_max[left], prev_max[right]),
+            np.minimum(prev_min[left], prev_min[right]),
+            np.minimum(np.minimum(prev_mdd[left], prev_mdd[right]), prev_min[right] / prev_max[left] - 1),
+        ))
+        width *= 2
+    return levels
+
+def query_window_mdd(levels, starts, ends):
+    """
+    여러 윈도우 [start, end]의 MDD를 한꺼번에 구합니다.
+    각 윈도우를 서로 겹치지 않는 2^k 블록으로 왼쪽부터 쪼개어 누적하므로, 윈도우 수와 무관하게
+    넘파이 연산은 log(days)번만 수행됩니다.
+    """
+    starts = np.asarray(starts); lengths = np.asarray(ends) - starts + 1
+    pos = starts.copy()
+    acc_max = np.full(len(starts), np.nan) # ⭐️ nan으로 시작해 fmin/fmax가 첫 블록을 그대로 채택
+    acc_mdd = np.zeros(len(starts))
+    for k in range(len(levels) - 1, -1, -1):
+        use = ((lengths >> k) & 1).astype(bool)
+        if not use.any():
+            continue
+        block_max, block_min, block_mdd = levels[k]
+        idx = pos[use]
+        cross = block_min[idx] / acc_max[use] - 1 # 이전 블록의 고점 → 이번 블록의 저점
+        acc_mdd[use] = np.fmin(np.fmin(acc_mdd[use], block_mdd[idx]), cross)
+        acc_max[use] = np.fmax(acc_max[use], block_max[idx])
+        pos[use] += 1 << k
+    return acc_mdd
+
+# --- 2. 롤링 윈도우 분석 ---
+
+def window_bounds(dates, start_idx, horizon_years):
+    """각 시작 인덱스에서 horizon_years 뒤(이하의 마지막 거래일)까지의 끝 인덱스. 데이터가 부족한 윈도우는 제외합니다."""
+    start_dates = dates[start_idx]
+    target_end = start_dates + pd.DateOffset(years=horizon_years)
+    complete = target_end <= dates[-1]
+    end_idx = np.searchsorted(dates.values, target_end.values, side='right') - 1
+    return start_idx[complete], end_idx[complete]
+
+def max_horizon_years(dates):
+    """첫 날부터 시작해 윈도우가 하나 이상 나오는 가장 긴 기간(연, 정수)"""
+    years = dates[-1].year - dates[0].year
+    return years if dates[0] + pd.DateOffset(years=years) <= dates[-1] else years - 1
+
+def validate_horizons(dates, horizons_years):
+    """기간은 1년 이상, 데이터 기간 이하의 정수여야 합니다. (아니면 ValueError)"""
+    longest = max_horizon_years(dates)
+    for horizon in horizons_years:
+        if isinstance(horizon, bool) or not isinstance(horizon, (int, np.integer)) or not 1 <= horizon <= longest:
+            raise ValueError(f"horizons는 1 ~ {longest} 사이의 정수(연 단위)여야 합니다: {horizon}")
+
+def summarize(values):
+    if len(values) == 0:
+        return None
+    summary = {"count": int(len(values)), "mean": float(values.mean()), "std": float(values.std()),
+               "min": float(values.min()), "max": float(values.max())}
+    for p, v in zip(SUMMARY_PERCENTILES, np.percentile(values, SUMMARY_PERCENTILES)):
+        summary[f"p{p}"] = float(v)
+    return summary
+
+def rolling_window_stats(values, dates, start_idx, end_idx, levels=None):
+    """윈도우별 CAGR / MDD 배열 (values는 전체 기간 가치 경로)"""
+    values = np.asarray(values, dtype=float)
+    levels = levels if levels is not None else build_drawdown_table(values)
+    years = (dates[end_idx] - dates[start_idx]).days.to_numpy() / 365.25
+    cagr = (values[end_idx] / values[start_idx]) ** (1 / years) - 1
+    mdd = query_window_mdd(levels, start_idx, end_idx)
+    return cagr, mdd
+
+def run_rolling_analysis(price_df, initial_capital, target_weights, assets_by_group,
+                         horizons_years=DEFAULT_HORIZONS_YEARS, include_windows=False, rebalance_idx=None):
+    """
+    각 리밸런싱 직후 시점(기본: 월말 리밸런싱 직후 = 매월 시작)마다 horizons_years 기간의 리밸런싱 전략을
+    실행한 것과 같은 CAGR / MDD 분포를 계산합니다.
+    ⭐️ 리밸런싱 직후에는 보유 비중이 목표 비중과 같으므로, 그 시점에 새로 시작한 백테스트의 가치 경로는
+       전체 기간 경로를 비례 축소한 것과 같습니다. 따라서 전체 경로를 한 번만 계산하고 윈도우는 구간 질의로 처리합니다.
+    """
+    dates = price_df.index
+    validate_horizons(dates, horizons_years) # ⭐️ 0/음수 기간은 0 나눗셈·음수 인덱스, 너무 긴 기간은 빈 분포
+    if rebalance_idx is None:
+        rebalance_idx = monthly_rebalance_indices(dates)
+    history = run_rebalancing_backtest_vectorized(price_df, initial_capital, target_weights, assets_by_group, rebalance_idx)
+    portfolio_values = history['value'].to_numpy()
+    benchmark_values = price_df['benchmark'].to_numpy(dtype=float)
+
+    start_idx = np.concatenate(([0], rebalance_idx))
+    pf_levels = build_drawdown_table(portfolio_values)
+    bm_levels = build_drawdown_table(benchmark_values)
+
+    results = {}
+    for horizon in horizons_years:
+        starts, ends = window_bounds(dates, start_idx, horizon)
+        pf_cagr, pf_mdd = rolling_window_stats(portfolio_values, dates, starts, ends, pf_levels)
+        bm_cagr, bm_mdd = rolling_window_stats(benchmark_values, dates, starts, ends, bm_levels)
+        horizon_result = {
+            "portfolio": {"CAGR": summarize(pf_cagr), "MDD": summarize(pf_mdd)},
+            "benchmark": {"CAGR": summarize(bm_cagr), "MDD": summarize(bm_mdd)},
+            "outperform_ratio": float((pf_cagr > bm_cagr).mean()) if len(starts) else None,
+        }
+        if include_windows:
+            horizon_result["windows"] = {
+                "start": dates[starts].strftime('%Y-%m-%d').tolist(),
+                "end": dates[ends].strftime('%Y-%m-%d').tolist(),
+                "portfolio_cagr": pf_cagr.tolist(), "portfolio_mdd": pf_mdd.tolist(),
+                "benchmark_cagr": bm_cagr.tolist(), "benchmark_mdd": bm_mdd.tolist(),
+            }
+        results[f"{horizon}y"] = horizon_result
+    return results
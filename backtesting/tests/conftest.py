@@ -0,0 +1,22 @@
+# conftest.py (backtesting 모듈은 같은 폴더 기준 import를 사용하므로 상위 폴더를 경로에 추가)
+
+import os
+import sys
+
+import pytest
+
+BACKTESTING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKTESTING_DIR)
+
+@pytest.fixture(scope="session")
+def client():
+    """app.py TestClient (가짜 AI 모델, 가격 파일 상대 경로 기준인 backtesting 폴더에서 실행)"""
+    os.environ.setdefault("AI_MODEL", "fake")
+    os.environ.setdefault("AI_FAKE_DELAY", "0")
+    cwd = os.getcwd()
+    os.chdir(BACKTESTING_DIR)
+    from fastapi.testclient import TestClient
+    import app
+    with TestClient(app.app) as test_client:
+        yield test_client
+    os.chdir(cwd)
@@ -0,0 +1,60 @@
+# test_ai_cache.py (AI 응답 캐시: 프롬프트 키 / TTL / 동시 요청 병합 / 실패 시 미저장)
+
+import asyncio
+
+import pytest
+
+from ai_cache import CACHE_COALESCED, CACHE_HIT, CACHE_MISS, AIResponseCache, prompt_key
+from ai_stream import FakeStreamingModel, stream_text
+
+@pytest.fixture
+def cache(tmp_path):
+    return AIResponseCache(cache_dir=str(tmp_path), ttl_seconds=60, model_name="fake")
+
+async def drain(chunks):
+    return [text async for text in chunks]
+
+def test_prompt_key_depends_on_model_and_prompt():
+    assert prompt_key("a", "m1") == prompt_key("a", "m1")
+    assert prompt_key("a", "m1") != prompt_key("a", "m2")
+    assert prompt_key("a", "m1") != prompt_key("b", "m1")
+
+def test_concurrent_requests_share_one_upstream_call(cache):
+    model = FakeStreamingModel(chunks=["x", "y", "z"], chunk_delay=0.01)
+
+    async def run():
+        opened = [cache.open_stream("p", lambda: stream_text(model, "p")) for _ in range(20)]
+        results = await asyncio.gather(*(drain(chunks) for _, chunks in opened))
+        return [status for status, _ in opened], results
+
+    statuses, results = asyncio.run(run())
+    assert statuses[0] == CACHE_MISS and set(statuses[1:]) == {CACHE_COALESCED}
+    assert all(r == ["x", "y", "z"] for r in results) and model.calls == 1
+
+    async def replay():
+        status, chunks = cache.open_stream("p", lambda: stream_text(model, "p"))
+        return status, await drain(chunks)
+
+    assert asyncio.run(replay()) == (CACHE_HIT, ["x", "y", "z"])
+    assert model.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["inflight"] == 0
+
+def test_expired_entry_is_removed(cache, monkeypatch):
+    key = prompt_key("p", "fake")
+    cache.save(key, ["a"])
+    assert cache.load(key) == ["a"]
+    monkeypatch.setattr("ai_cache.time.time", lambda: 1e12)
+    assert cache.load(key) is None
+
+def test_failed_generation_is_not_cached(cache):
+    async def failing():
+        yield "부분"
+        raise RuntimeError("끊김")
+
+    async def run():
+        _, chunks = cache.open_stream("p", failing)
+        return await drain(chunks)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert cache.load(prompt_key("p", "fake")) is None
@@ -0,0 +1,56 @@
+# test_ai_stream.py (AI 응답 비동기 스트리밍: 가짜 모델 / 동기 스트림 브리지 / SSE 엔드포인트)
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from ai_stream import DEFAULT_FAKE_CHUNKS, FakeStreamingModel, stream_text
+
+class SyncModel:
+    """generate_content(stream=True)만 있는 동기 클라이언트"""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    def generate_content(self, prompt, stream=True):
+        for i, text in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise RuntimeError("업스트림 오류")
+            yield type("Chunk", (), {"text": text})()
+
+async def collect(model, prompt="p"):
+    return [text async for text in stream_text(model, prompt)]
+
+def test_async_model_streams_chunks():
+    assert asyncio.run(collect(FakeStreamingModel(chunk_delay=0))) == list(DEFAULT_FAKE_CHUNKS)
+
+def test_sync_model_is_bridged_and_skips_empty_chunks():
+    assert asyncio.run(collect(SyncModel(["a", "", "b"]))) == ["a", "b"]
+
+def test_sync_model_error_is_raised():
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect(SyncModel(["a", "b"], fail_after=1)))
+
+def test_concurrent_streams_share_event_loop():
+    model = FakeStreamingModel(chunks=["a", "b", "c"], chunk_delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*(collect(model) for _ in range(50)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    assert time.perf_counter() - started < 1.0 # 직렬이면 50 × 0.1초
+    assert all(r == ["a", "b", "c"] for r in results) and model.calls == 50
+
+def read_sse(client, url):
+    with client.stream('GET', url) as stream:
+        return [json.loads(line[len("data: "):]) for line in stream.iter_lines() if line.startswith("data: ")]
+
+def test_analyze_stream_endpoint(client):
+    assert client.get('/api/backtest').status_code == 200
+    events = read_sse(client, '/api/analyze_stream')
+    assert events[-1] == {"event": "done"}
+    assert "".join(e["text"] for e in events[:-1]) == "".join(DEFAULT_FAKE_CHUNKS)
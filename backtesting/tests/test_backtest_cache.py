@@ -0,0 +1,60 @@
+# test_backtest_cache.py (파라미터 키 / LRU·TTL 캐시 / 원본 파일 변경 시 키 변경)
+
+import os
+
+import backtest_cache
+from backtest_cache import BacktestCache, make_cache_key
+
+def test_cache_key_ignores_dict_order_but_not_values():
+    a = {"target_weights": {"226490": 0.6, "Cash": 0.4}, "initial_capital": 100}
+    b = {"initial_capital": 100, "target_weights": {"Cash": 0.4, "226490": 0.6}}
+    assert make_cache_key(a) == make_cache_key(b)
+    assert make_cache_key(a) != make_cache_key(dict(a, initial_capital=101))
+
+def test_cache_key_changes_when_source_file_changes(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("date,rate\n2024-01-01,3.5\n")
+    key = make_cache_key({}, source_files=[str(path)])
+    assert make_cache_key({}, source_files=[str(path)]) == key
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert make_cache_key({}, source_files=[str(path)]) != key
+
+def test_lru_evicts_least_recently_used():
+    cache = BacktestCache(max_entries=2, ttl_seconds=None)
+    cache.set("a", 1); cache.set("b", 2)
+    assert cache.get("a") == 1 # a를 최근 사용으로
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["size"] == 2 and stats["hits"] == 3 and stats["misses"] == 1
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(backtest_cache.time, "monotonic", lambda: now[0])
+    cache = BacktestCache(max_entries=4, ttl_seconds=60)
+    cache.set("a", 1)
+    now[0] += 59
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_backtest_key_includes_base_rate_file(client, tmp_path, monkeypatch):
+    import app
+    params = app.current_backtest_params()
+    rate_file = tmp_path / "base_rate.csv"
+    rate_file.write_text("date,rate\n2019-01-01,1.75\n")
+    monkeypatch.setattr(app, "BASE_RATE_FILE", str(rate_file))
+    key = app.backtest_cache_key(params)
+    stat = os.stat(rate_file)
+    os.utime(rate_file, (stat.st_atime, stat.st_mtime + 10))
+    assert app.backtest_cache_key(params) != key
+
+def test_backtest_endpoint_reuses_cached_result(client):
+    import app
+    client.get('/api/backtest')
+    hits = app.g_backtest_cache.stats()["hits"]
+    res = client.get('/api/backtest')
+    assert res.status_code == 200
+    assert app.g_backtest_cache.stats()["hits"] == hits + 1
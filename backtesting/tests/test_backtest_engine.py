@@ -0,0 +1,98 @@
+# test_backtest_engine.py (벡터화 엔진 ↔ 일별 루프 결과 일치 / 현금 이자 / 매매 비용 반영)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import (
+    HISTORY_COLUMNS, cash_growth_factors, monthly_rebalance_indices, run_rebalancing_backtest_vectorized,
+)
+
+STOCKS = ['226490']; BONDS = ['114260', '363570']
+ASSETS_BY_GROUP = {'Stocks': STOCKS, 'Bonds': BONDS}
+TARGET_WEIGHTS = {'226490': 0.60, '114260': 0.15, '363570': 0.15, 'Cash': 0.10}
+INITIAL_CAPITAL = 100_000_000
+
+def loop_backtest(price_df, initial_capital, target_weights, assets_by_group):
+    """
+    기존 app.py의 run_monthly_rebalancing_backtest (날짜별 루프).
+    현금 이자만 직전 거래일 이후 달력일 수만큼 일복리로 붙도록 바꿨습니다.
+    """
+    dates = price_df.index
+    asset_keys = assets_by_group['Stocks'] + assets_by_group['Bonds']
+    cash_weight = target_weights['Cash']
+    current_shares = {}
+    first_prices = price_df.loc[dates[0]]
+    current_cash_value = initial_capital * cash_weight
+    stock_value = 0.0; bond_value = 0.0
+    for asset in asset_keys:
+        target_value = initial_capital * target_weights[asset]
+        current_shares[asset] = target_value / first_prices[asset]
+        if asset in assets_by_group['Stocks']:
+            stock_value += target_value
+        else:
+            bond_value += target_value
+    portfolio_history = [{'value': initial_capital, 'stock_value': stock_value, 'bond_value': bond_value, 'cash_value': current_cash_value}]
+    for i in range(1, len(dates)):
+        date = dates[i]
+        today_prices = price_df.loc[date]
+        days = (date - dates[i - 1]).days
+        current_cash_value *= (1 + price_df.loc[date, 'base_rate'] / 365.0) ** days
+        stock_value = sum(current_shares[asset] * today_prices[asset] for asset in assets_by_group['Stocks'])
+        bond_value = sum(current_shares[asset] * today_prices[asset] for asset in assets_by_group['Bonds'])
+        current_total_value = stock_value + bond_value + current_cash_value
+        portfolio_history.append({'value': current_total_value, 'stock_value': stock_value, 'bond_value': bond_value, 'cash_value': current_cash_value})
+        if date.month != (date + pd.Timedelta(days=1)).month:
+            current_cash_value = current_total_value * cash_weight
+            for asset in asset_keys:
+                current_shares[asset] = current_total_value * target_weights[asset] / today_prices[asset]
+    return pd.DataFrame(portfolio_history, index=dates, columns=HISTORY_COLUMNS)
+
+def make_price_df(start='2022-01-03', end='2023-12-29', assets=STOCKS + BONDS, seed=7):
+    """영업일 랜덤워크 가격 + 계단형 기준금리 (주말 월말이 섞여 있음)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    returns = rng.normal(0.0003, 0.012, size=(len(dates), len(assets)))
+    df = pd.DataFrame(10_000 * np.cumprod(1 + returns, axis=0), index=dates, columns=list(assets))
+    df['base_rate'] = np.where(dates < '2023-01-13', 0.0325, 0.035)
+    return df
+
+@pytest.fixture
+def price_df():
+    return make_price_df()
+
+def test_vectorized_matches_loop(price_df):
+    expected = loop_backtest(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP)
+    result = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP)
+    assert list(result.columns) == HISTORY_COLUMNS
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+
+def test_monthly_rebalance_skips_weekend_month_ends():
+    dates = pd.bdate_range('2022-04-25', '2022-08-05') # 4월 30일(토), 7월 31일(일)은 거래일이 아님
+    assert [str(dates[i].date()) for i in monthly_rebalance_indices(dates)] == ['2022-05-31', '2022-06-30']
+
+def test_cash_accrues_calendar_days():
+    dates = pd.bdate_range('2023-01-02', '2024-01-01') # 2023-01-02 → 2024-01-01: 364일
+    growth = cash_growth_factors(dates, np.full(len(dates), 0.0365))
+    assert growth[0] == 1.0
+    assert growth[5] == pytest.approx((1 + 0.0365 / 365) ** 3) # 금요일 → 월요일
+    assert np.prod(growth) == pytest.approx((1 + 0.0365 / 365) ** 364)
+
+def test_all_cash_portfolio_earns_base_rate(price_df):
+    weights = {'226490': 0.0, '114260': 0.0, '363570': 0.0, 'Cash': 1.0}
+    result = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, weights, ASSETS_BY_GROUP)
+    expected = INITIAL_CAPITAL * np.prod(cash_growth_factors(price_df.index, price_df['base_rate']))
+    assert result['value'].iloc[-1] == pytest.approx(expected, rel=1e-12)
+
+def test_cost_rows_show_post_cost_value(price_df):
+    costs = {'commission': 0.001, 'slippage': 0.0, 'sell_tax': 0.0}
+    result = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP, costs=costs)
+    # 초기 매수: 현금을 뺀 90%를 사면서 0.1% 비용
+    assert result['value'].iloc[0] == pytest.approx(INITIAL_CAPITAL - 0.9 * INITIAL_CAPITAL * 0.001)
+    assert result['trading_cost'].iloc[0] == pytest.approx(0.9 * INITIAL_CAPITAL * 0.001)
+    first_rebalance = monthly_rebalance_indices(price_df.index)[0]
+    row = result.iloc[first_rebalance]
+    # 리밸런싱일 행: 비용 차감 후 총액, 구성 합계도 같고 비중은 목표 비중
+    assert row['value'] == pytest.approx(row[['stock_value', 'bond_value', 'cash_value']].sum())
+    assert row['cash_value'] == pytest.approx(row['value'] * TARGET_WEIGHTS['Cash'])
+    assert row['trading_cost'] > result['trading_cost'].iloc[first_rebalance - 1]
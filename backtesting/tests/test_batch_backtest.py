@@ -0,0 +1,51 @@
+# test_batch_backtest.py (다중 포트폴리오 일괄 백테스트: 단일 엔진과 일치 / API 입력 검증)
+
+import numpy as np
+import pytest
+
+from backtest_engine import run_batch_backtest, run_rebalancing_backtest_vectorized
+from test_backtest_engine import ASSETS_BY_GROUP, BONDS, INITIAL_CAPITAL, STOCKS, TARGET_WEIGHTS, make_price_df
+
+PORTFOLIOS = [TARGET_WEIGHTS, {'226490': 0.2, '114260': 0.5, '363570': 0.0, 'Cash': 0.3}]
+
+@pytest.mark.parametrize("costs", [None, {'commission': 0.00015, 'slippage': 0.0005, 'sell_tax': 0.0015, 'taxed_assets': ['226490']}])
+def test_batch_matches_single_backtests(costs):
+    price_df = make_price_df()
+    asset_keys = STOCKS + BONDS
+    weight_matrix = [[weights[key] for key in asset_keys + ['Cash']] for weights in PORTFOLIOS]
+    batch = run_batch_backtest(price_df, weight_matrix, asset_keys, INITIAL_CAPITAL, costs=costs)
+
+    num_years = (price_df.index[-1] - price_df.index[0]).days / 365.25
+    for i, weights in enumerate(PORTFOLIOS):
+        history = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, weights, ASSETS_BY_GROUP, costs=costs)
+        values = history['value']
+        assert batch['Final Value'][i] == pytest.approx(values.iloc[-1], rel=1e-12)
+        assert batch['CAGR'][i] == pytest.approx((values.iloc[-1] / INITIAL_CAPITAL) ** (1 / num_years) - 1, rel=1e-12)
+        if costs is None:
+            assert batch['MDD'][i] == pytest.approx((values / values.cummax() - 1).min(), rel=1e-9)
+        else:
+            assert batch['Total Cost'][i] == pytest.approx(history['trading_cost'].iloc[-1], rel=1e-12)
+
+def test_batch_api_evaluates_all_rows(client):
+    res = client.post('/api/backtest/batch', json={
+        "assets": ["Cash", "226490", "114260"], "weights": [[0.1, 0.6, 0.3], [1.0, 0.0, 0.0]],
+    })
+    assert res.status_code == 200
+    body = res.json()
+    assert body["assets"] == ["226490", "114260", "Cash"] and body["count"] == 2
+    assert np.all(np.array(body["results"]["Final Value"]) > 0)
+    assert body["results"]["MDD"][1] == pytest.approx(0.0)
+
+@pytest.mark.parametrize("payload", [
+    [1, 2, 3],
+    {"weights": [[0.6, 0.15, 0.15, 0.1]], "initial_capital": -5},
+    {"weights": [[0.6, 0.15, 0.15, 0.1]], "initial_capital": True},
+    {"weights": [[0.6, 0.15, 0.15, 0.1]], "initial_capital": "nan"},
+    {"assets": "226490", "weights": [[1.0]]},
+    {"assets": ["226490", "Cash"], "weights": [[0.5, 0.4]]},
+    {"assets": ["226490", "Cash"], "weights": [[0.5, 0.3, 0.2]]},
+    {"assets": ["226490"], "weights": [[1.0]]},
+    {"assets": ["999999", "Cash"], "weights": [[0.5, 0.5]]},
+])
+def test_batch_api_rejects_invalid_input(client, payload):
+    assert client.post('/api/backtest/batch', json=payload).status_code == 400
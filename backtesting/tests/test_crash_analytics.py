@@ -0,0 +1,88 @@
+# test_crash_analytics.py (기간 수익률 = 기존 asof 방식 / 드로다운 에피소드 / 스트레스 API 검증)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from crash_analytics import analyze_crash_periods, drawdown_episodes, period_returns
+
+def get_period_return(series, start_date_str, end_date_str):
+    """기존 app.py find_analysis_data의 get_period_return"""
+    start_date = pd.to_datetime(start_date_str); end_date = pd.to_datetime(end_date_str)
+    if end_date < series.index.min() or start_date > series.index.max():
+        return np.nan
+    start_val = series.asof(start_date); end_val = series.asof(end_date)
+    if pd.isna(start_val) or pd.isna(end_val): return np.nan
+    return (end_val / start_val) - 1
+
+@pytest.fixture
+def series():
+    dates = pd.bdate_range('2020-01-01', '2020-12-31')
+    values = 100 * np.cumprod(1 + np.random.default_rng(5).normal(0, 0.02, len(dates)))
+    return pd.Series(values, index=dates)
+
+def test_period_returns_match_asof_lookup(series):
+    starts = ['2020-02-14', '2020-03-07', '2019-06-01', '2020-12-31', '2021-02-01', '2019-12-01', '2020-05-01']
+    ends = ['2020-03-19', '2020-03-08', '2019-07-01', '2021-01-15', '2021-03-01', '2020-01-10', '2020-05-01']
+    result = period_returns(series.index, series.to_numpy(), starts, ends)[:, 0]
+    expected = [get_period_return(series, s, e) for s, e in zip(starts, ends)]
+    np.testing.assert_allclose(result, expected, rtol=1e-12, equal_nan=True)
+
+def brute_force_episodes(values):
+    episodes, peak_idx, trough_idx = [], 0, None
+    for i in range(1, len(values)):
+        if values[i] >= values[peak_idx]:
+            if trough_idx is not None:
+                episodes.append((peak_idx, trough_idx, i))
+            peak_idx, trough_idx = i, None
+        elif trough_idx is None or values[i] < values[trough_idx]:
+            trough_idx = i
+    if trough_idx is not None:
+        episodes.append((peak_idx, trough_idx, None))
+    return sorted(episodes, key=lambda e: values[e[1]] / values[e[0]] - 1)
+
+def test_drawdown_episodes_match_brute_force(series):
+    values = series.to_numpy(); dates = series.index
+    episodes = drawdown_episodes(values, dates, top_n=5)
+    expected = brute_force_episodes(values)[:5]
+    assert len(episodes) == len(expected)
+    for episode, (peak, trough, recovery) in zip(episodes, expected):
+        assert episode["peak_date"] == dates[peak].strftime('%Y-%m-%d')
+        assert episode["trough_date"] == dates[trough].strftime('%Y-%m-%d')
+        assert episode["recovery_date"] == (dates[recovery].strftime('%Y-%m-%d') if recovery is not None else None)
+        assert episode["drawdown"] == pytest.approx(values[trough] / values[peak] - 1)
+
+def test_drawdown_episodes_empty_for_rising_series():
+    dates = pd.bdate_range('2020-01-01', periods=5)
+    assert drawdown_episodes(np.arange(1.0, 6.0), dates) == []
+
+def test_analyze_crash_periods(series):
+    dates = series.index
+    columns = {key: series.to_numpy() * scale for key, scale in
+               (('value', 1.0), ('stock_value', 0.6), ('bond_value', 0.3), ('cash_value', 0.1))}
+    benchmark = series.to_numpy()[::-1].copy()
+    mdd, worst_day, user = analyze_crash_periods(dates, columns, benchmark, [
+        {"name": "in", "start": "2020-02-14", "end": "2020-03-19"}, {"name": "out", "start": "2021-02-01", "end": "2021-03-01"},
+    ])
+    bm = pd.Series(benchmark, index=dates)
+    trough = (bm / bm.cummax() - 1).idxmin(); peak = bm.loc[:trough].idxmax()
+    assert (mdd["start_date"], mdd["end_date"]) == (peak.strftime('%Y-%m-%d'), trough.strftime('%Y-%m-%d'))
+    assert mdd["portfolio_return"] == pytest.approx(get_period_return(series, peak, trough))
+    assert worst_day["date"] == bm.pct_change().idxmin().strftime('%Y-%m-%d')
+    assert [p["name"] for p in user] == ["in"]
+    assert user[0]["stock_return"] == pytest.approx(get_period_return(series, "2020-02-14", "2020-03-19"))
+
+def test_stress_api(client):
+    res = client.post('/api/stress', json={"periods": [{"name": "코로나", "start": "2020-02-14", "end": "2020-03-19"}], "top_n": "3"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["periods"][0]["benchmark_return"] < 0
+    assert len(body["benchmark_drawdowns"]) == 3
+
+@pytest.mark.parametrize("payload", [
+    {"top_n": 0}, {"top_n": True}, {"top_n": 2.5}, {"top_n": "abc"}, {"top_n": 10 ** 6},
+    {"periods": {"start": "2020-01-01"}}, {"periods": [{"start": "2020-01-01"}]},
+    {"periods": [{"start": "not-a-date", "end": "2020-01-01"}]},
+])
+def test_stress_api_rejects_invalid_input(client, payload):
+    assert client.post('/api/stress', json=payload).status_code == 400
@@ -0,0 +1,117 @@
+# test_job_queue.py (작업 큐: 제출 검증 / 비동기 이벤트 구독 / 저장소 재생 / SSE API)
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+import job_queue
+from job_queue import JOB_DONE, JOB_FAILED, JobQueue
+
+def collect(queue, job_id, start=0):
+    async def run():
+        return [event async for event in queue.events(job_id, start)]
+    return asyncio.run(run())
+
+@pytest.fixture
+def gate():
+    return threading.Event()
+
+@pytest.fixture
+def queue(tmp_path, gate):
+    def slow(spec, progress):
+        for i in range(3):
+            progress(i + 1, 3, {"step": i})
+        gate.wait(5)
+        if spec.get("fail"):
+            raise ValueError("잘못된 입력")
+        return {"answer": spec["x"] * 2}
+
+    def validate(spec):
+        if "x" not in spec:
+            raise ValueError("x가 필요합니다.")
+
+    q = JobQueue({"slow": slow}, max_workers=2, store_dir=str(tmp_path), validators={"slow": validate})
+    yield q
+    gate.set()
+    q.shutdown(wait=True)
+
+def test_events_stream_progress_then_result(queue, gate):
+    job_id = queue.submit("slow", {"x": 21})
+    gate.set()
+    events = collect(queue, job_id)
+    assert [e["event"] for e in events] == ["status", "status", "progress", "progress", "progress", "done"]
+    assert events[-1] == {"event": "done", "status": JOB_DONE, "result": {"answer": 42}}
+    assert queue.get(job_id)["result"] == {"answer": 42}
+    assert collect(queue, job_id, start=5) == [events[-1]] # 중간부터 구독
+
+def test_failed_job_reports_error(queue, gate):
+    job_id = queue.submit("slow", {"x": 1, "fail": True})
+    gate.set()
+    assert collect(queue, job_id)[-1] == {"event": "done", "status": JOB_FAILED, "error": "잘못된 입력"}
+
+def test_submit_validates_before_creating_job(queue):
+    with pytest.raises(ValueError):
+        queue.submit("slow", {})
+    with pytest.raises(ValueError):
+        queue.submit("unknown", {"x": 1})
+    assert queue.list_jobs() == []
+
+def test_many_subscribers_do_not_hold_threads(queue, gate):
+    job_id = queue.submit("slow", {"x": 1})
+
+    async def run():
+        tasks = [asyncio.ensure_future(asyncio.wait_for(collect_async(), 10)) for _ in range(100)]
+        await asyncio.sleep(0.2)
+        threads = threading.active_count()
+        gate.set()
+        results = await asyncio.gather(*tasks)
+        return threads, results
+
+    async def collect_async():
+        return [event async for event in queue.events(job_id)]
+
+    before = threading.active_count()
+    threads, results = asyncio.run(run())
+    assert threads <= before + 2 # 구독자 100명이 스레드를 만들지 않음
+    assert all(events[-1]["result"] == {"answer": 2} for events in results)
+    assert queue._listeners == {}
+
+def test_heartbeat_when_idle(queue, gate, monkeypatch):
+    monkeypatch.setattr(job_queue, "HEARTBEAT_SECONDS", 0.05)
+    job_id = queue.submit("slow", {"x": 1})
+    threading.Timer(0.3, gate.set).start()
+    events = collect(queue, job_id)
+    assert None in events and events[-1]["status"] == JOB_DONE
+
+def test_evicted_job_replays_stored_result(tmp_path):
+    q = JobQueue({"echo": lambda spec, progress: spec}, max_workers=1, store_dir=str(tmp_path), max_jobs_in_memory=1)
+    first = q.submit("echo", {"n": 1})
+    assert collect(q, first)[-1]["status"] == JOB_DONE
+    second = q.submit("echo", {"n": 2}) # 첫 작업은 메모리에서 제거됨
+    collect(q, second)
+    assert collect(q, first) == [{"event": "done", "status": JOB_DONE, "result": {"n": 1}}]
+    assert q.get(first)["result"] == {"n": 1}
+    q.shutdown(wait=True)
+
+def test_job_api_submit_and_stream(client):
+    res = client.post('/api/jobs', json={"kind": "simulate", "spec": {"paths": 200, "seed": 1}})
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+    with client.stream('GET', f'/api/jobs/{job_id}/events') as stream:
+        events = [json.loads(line[len("data: "):]) for line in stream.iter_lines() if line.startswith("data: ")]
+    assert events[-1]["status"] == JOB_DONE
+    assert events[-1]["result"]["portfolio"]["Final Value"]["count"] == 200
+    assert client.get(f'/api/jobs/{job_id}').json()["status"] == JOB_DONE
+
+@pytest.mark.parametrize("payload", [
+    [], {"kind": "simulate", "spec": []}, {"kind": "nope"}, {"kind": "simulate", "spec": {"paths": 0}},
+    {"kind": "optimize", "spec": {"step": 0.001}}, {"kind": "backtest", "spec": {"initial_capital": -1}},
+])
+def test_job_api_rejects_invalid_specs(client, payload):
+    assert client.post('/api/jobs', json=payload).status_code == 400
+
+def test_job_api_unknown_job(client):
+    assert client.get('/api/jobs/0123abcd').status_code == 404
+    assert client.get('/api/jobs/0123abcd/events').status_code == 404
@@ -0,0 +1,42 @@
+# test_load_data.py (넓은 가격 파일에서 포트폴리오 종목만 로드 / 종목 목록 / 없는 종목 거부)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+@pytest.fixture
+def app_module(client):
+    import app
+    return app
+
+@pytest.fixture
+def wide_files(tmp_path):
+    dates = pd.DatetimeIndex(pd.bdate_range('2024-01-01', periods=30), name='Date')
+    rng = np.random.default_rng(3)
+    etf = pd.DataFrame({f"{i:06d}": 100 + rng.normal(size=len(dates)).cumsum() for i in range(200)}, index=dates)
+    etf_path = tmp_path / "etf.csv"; kospi_path = tmp_path / "kospi.csv"
+    etf.to_csv(etf_path)
+    pd.DataFrame({"KOSPI": np.linspace(2500, 2600, len(dates))}, index=dates).to_csv(kospi_path)
+    return str(etf_path), str(kospi_path), etf
+
+def test_load_data_reads_only_requested_assets(app_module, wide_files):
+    etf_path, kospi_path, etf = wide_files
+    price_df = app_module.load_data(etf_path, kospi_path, '2024-01-01', '2024-02-09', assets=['000007', '000150'])
+    assert list(price_df.columns) == ['000007', '000150', 'benchmark', 'base_rate']
+    np.testing.assert_allclose(price_df['000150'].to_numpy(), etf['000150'].to_numpy())
+
+def test_load_data_defaults_to_portfolio_assets(app_module):
+    price_df = app_module.load_data(app_module.ETF_FILE, app_module.KOSPI_FILE, app_module.START_DATE, app_module.END_DATE)
+    assert list(price_df.columns[:3]) == app_module.portfolio_assets(app_module.TARGET_WEIGHTS)
+    assert price_df.notna().all().all()
+
+def test_load_data_unknown_asset_returns_none(app_module, wide_files):
+    etf_path, kospi_path, _ = wide_files
+    assert app_module.load_data(etf_path, kospi_path, '2024-01-01', '2024-02-09', assets=['999999']) is None
+
+def test_universe_and_missing_assets(app_module, client):
+    body = client.get('/api/universe').json()
+    assert body == {"assets": ['226490', '114260', '363570'], "portfolio": ['226490', '114260', '363570']}
+    assert app_module.missing_assets(['226490', '999999']) == ['999999']
+    res = client.post('/api/backtest/batch', json={"assets": ['999999', 'Cash'], "weights": [[0.5, 0.5]]})
+    assert res.status_code == 400 and '999999' in res.json()["error"]
@@ -0,0 +1,68 @@
+# test_monte_carlo.py (부트스트랩 몬테카를로: 과거 경로 재현 / seed 재현성 / 동시 실행 / API 입력 검증)
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backtest_engine import monthly_rebalance_indices, run_rebalancing_backtest_vectorized
+from monte_carlo import run_monte_carlo
+from test_backtest_engine import ASSETS_BY_GROUP, BONDS, INITIAL_CAPITAL, STOCKS, TARGET_WEIGHTS, make_price_df
+
+ASSET_KEYS = STOCKS + BONDS
+
+def make_mc_price_df(seed=7):
+    price_df = make_price_df(end='2022-12-30', seed=seed)
+    price_df['benchmark'] = price_df['226490']
+    return price_df
+
+def test_full_length_block_reproduces_history():
+    # 블록 길이 = 전체 일수이면 모든 경로가 과거 경로 그대로 → 백테스트 엔진과 같은 최종 가치
+    price_df = make_mc_price_df()
+    rebalance_idx = monthly_rebalance_indices(price_df.index)
+    result = run_monte_carlo(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSET_KEYS, rebalance_idx,
+                             num_paths=4, block_size=len(price_df) - 1, seed=1)
+    history = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP)
+    final = result["portfolio"]["Final Value"]
+    assert final["min"] == pytest.approx(history['value'].iloc[-1], rel=1e-12)
+    assert final["max"] == pytest.approx(final["min"], rel=1e-12)
+    assert result["portfolio"]["MDD"]["mean"] == pytest.approx((history['value'] / history['value'].cummax() - 1).min(), rel=1e-9)
+
+def test_same_seed_same_result_regardless_of_workers():
+    price_df = make_mc_price_df()
+    rebalance_idx = monthly_rebalance_indices(price_df.index)
+    kwargs = dict(num_paths=500, block_size=5, seed=42, chunk_size=100)
+    single = run_monte_carlo(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSET_KEYS, rebalance_idx, workers=1, **kwargs)
+    pooled = run_monte_carlo(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSET_KEYS, rebalance_idx, workers=2, **kwargs)
+    assert single == pooled
+    assert single["num_paths"] == 500 and single["method"] == "block"
+
+def test_concurrent_runs_do_not_share_inputs():
+    frames = [make_mc_price_df(seed) for seed in (1, 2, 3, 4)]
+    def run(price_df):
+        return run_monte_carlo(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSET_KEYS, monthly_rebalance_indices(price_df.index),
+                               num_paths=400, seed=0, chunk_size=20, workers=1)
+    expected = [run(price_df) for price_df in frames]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(run, frames * 2)) == expected * 2
+
+def test_progress_reports_each_chunk():
+    price_df = make_mc_price_df()
+    calls = []
+    run_monte_carlo(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSET_KEYS, monthly_rebalance_indices(price_df.index),
+                    num_paths=250, seed=0, chunk_size=100, progress=lambda done, total, partial: calls.append((done, total)))
+    assert calls == [(100, 250), (200, 250), (250, 250)]
+
+def test_simulate_spec_clamps_workers(client):
+    import app
+    assert app.parse_simulate_spec({"workers": "200"})[3] == (os.cpu_count() or 1)
+    assert app.parse_simulate_spec({"workers": "0"})[3] == 1
+
+@pytest.mark.parametrize("params", [{"paths": "0"}, {"paths": "1000000"}, {"block": "0"}, {"seed": "x"}, {"block": "100000"}])
+def test_simulate_api_rejects_invalid_input(client, params):
+    assert client.get('/api/simulate', params=params).status_code == 400
+
+def test_simulate_api(client):
+    res = client.get('/api/simulate', params={"paths": "200", "seed": "3"})
+    assert res.status_code == 200
+    assert res.json()["portfolio"]["Final Value"]["count"] == 200
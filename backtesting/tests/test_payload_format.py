@@ -0,0 +1,54 @@
+# test_payload_format.py (/api/backtest 응답 포맷: 컬럼형 변환 / float32 / 압축 / ETag / 304)
+
+import base64
+import gzip
+
+import numpy as np
+import pytest
+
+from payload_format import (
+    COLUMNAR_MIME, FORMAT_COLUMNAR, FORMAT_ROWS, compress, dumps_json, etag_matches, make_etag, negotiate_format,
+    to_columnar_payload,
+)
+
+def test_negotiate_format():
+    assert negotiate_format("columnar", None) == FORMAT_COLUMNAR
+    assert negotiate_format("rows", COLUMNAR_MIME) == FORMAT_ROWS
+    assert negotiate_format(None, f"{COLUMNAR_MIME}, application/json") == FORMAT_COLUMNAR
+    assert negotiate_format(None, "application/json") == FORMAT_ROWS
+
+def test_columnar_payload_keeps_other_fields_and_encodes_f32():
+    columns = {"dates": ["2024-01-02", "2024-01-03"], "portfolio": {"value": np.array([1.5, 2.25])}, "benchmark": {"value": [3.0, 4.0]}}
+    result = {"stats": {"CAGR": 0.1}, "portfolio_history": [{}], "benchmark_history": [{}]}
+    payload = to_columnar_payload(columns, result, float32=True)
+    assert "portfolio_history" not in payload and payload["stats"] == {"CAGR": 0.1}
+    decoded = np.frombuffer(base64.b64decode(payload["portfolio"]["value"]), dtype='<f4')
+    assert decoded.tolist() == [1.5, 2.25]
+    assert to_columnar_payload(columns, result)["benchmark"]["value"] == [3.0, 4.0]
+
+def test_gzip_is_deterministic_and_small_bodies_are_not_compressed():
+    body = dumps_json({"values": list(range(1000))})
+    first, encoding = compress(body, "gzip")
+    second, _ = compress(body, "gzip")
+    assert encoding == "gzip" and first == second and make_etag(first) == make_etag(second)
+    assert gzip.decompress(first) == body
+    assert compress(b"{}", "gzip") == (b"{}", None)
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False), ('"abc"', True), ('W/"abc"', True), ('"x", "abc"', True), ('*', True), ('"abcd"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, "abc") is expected
+
+def test_backtest_endpoint_formats_and_304(client):
+    rows = client.get('/api/backtest')
+    columnar = client.get('/api/backtest', params={"format": "columnar", "precision": "f32"})
+    assert rows.status_code == columnar.status_code == 200
+    assert columnar.headers["content-type"].startswith(COLUMNAR_MIME)
+    body = columnar.json()
+    assert len(body["dates"]) == len(rows.json()["portfolio_history"])
+    assert len(base64.b64decode(body["portfolio"]["value"])) == 4 * len(body["dates"])
+    assert rows.headers["ETag"] != columnar.headers["ETag"]
+
+    again = client.get('/api/backtest', headers={"If-None-Match": rows.headers["ETag"]})
+    assert again.status_code == 304 and again.content == b""
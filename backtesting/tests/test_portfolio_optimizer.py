@@ -0,0 +1,54 @@
+# test_portfolio_optimizer.py (비중 격자 / 파레토 투자선 / 최적화 API 검증)
+
+import numpy as np
+import pytest
+
+from backtest_engine import run_batch_backtest
+from portfolio_optimizer import evaluate_candidates, optimize_portfolio, pareto_frontier, simplex_grid, simplex_grid_size
+from test_backtest_engine import BONDS, INITIAL_CAPITAL, STOCKS, make_price_df
+
+@pytest.mark.parametrize("num_weights, step", [(2, 0.5), (3, 0.1), (4, 0.05)])
+def test_simplex_grid_covers_simplex(num_weights, step):
+    grid = simplex_grid(num_weights, step)
+    assert len(grid) == simplex_grid_size(num_weights, step)
+    assert np.allclose(grid.sum(axis=1), 1.0)
+    assert (grid >= 0).all()
+    assert len(np.unique(grid.round(9), axis=0)) == len(grid)
+
+def test_pareto_frontier_keeps_only_non_dominated():
+    cagr = np.array([0.05, 0.08, 0.04, 0.10, 0.07])
+    mdd = np.array([-0.10, -0.20, -0.15, -0.30, -0.05])
+    # 4: 손실이 가장 작고 CAGR 0.07 → 0(0.05)는 지배됨, 2는 0/4에 지배됨
+    assert pareto_frontier(cagr, mdd).tolist() == [4, 1, 3]
+
+def test_chunked_evaluation_matches_single_batch():
+    price_df = make_price_df(end='2022-12-30')
+    asset_keys = STOCKS + BONDS
+    candidates = simplex_grid(len(asset_keys) + 1, 0.25)
+    chunked = evaluate_candidates(price_df, candidates, asset_keys, INITIAL_CAPITAL, workers=1, chunk_size=7)
+    whole = run_batch_backtest(price_df, candidates, asset_keys, INITIAL_CAPITAL)
+    for key in ('CAGR', 'MDD', 'Final Value'):
+        np.testing.assert_allclose(chunked[key], whole[key], rtol=1e-12)
+
+def test_best_portfolio_respects_mdd_limit():
+    price_df = make_price_df(end='2022-12-30')
+    result = optimize_portfolio(price_df, INITIAL_CAPITAL, asset_keys=STOCKS + BONDS, max_mdd=-0.05, step=0.25, workers=1)
+    assert result["num_candidates"] == simplex_grid_size(4, 0.25)
+    assert result["best"]["MDD"] >= -0.05
+    assert all(p["CAGR"] <= result["best"]["CAGR"] for p in result["frontier"] if p["MDD"] >= -0.05)
+
+def test_optimize_api_returns_frontier(client):
+    res = client.get('/api/optimize', params={"assets": "226490,114260", "step": "0.25", "max_mdd": "-0.3"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["assets"] == ["226490", "114260", "Cash"] and body["num_candidates"] == simplex_grid_size(3, 0.25)
+
+@pytest.mark.parametrize("params", [
+    {"step": "abc"},
+    {"step": "0.001"},
+    {"assets": "226490,114260,363570,105190,069500", "step": "0.01"}, # 격자 후보 수 초과
+    {"assets": "999999"},
+    {"schedule": "daily"},
+])
+def test_optimize_api_rejects_invalid_input(client, params):
+    assert client.get('/api/optimize', params=params).status_code == 400
@@ -0,0 +1,111 @@
+# test_price_downloader.py (한투 일별 시세 동시 수집: 토큰 버킷 / 재시도 / 페이지 종료 조건 / 실패 종목 처리)
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_downloader
+from price_downloader import (INDEX_DAILY, STOCK_DAILY, KISAPIError, KISDailyPriceClient, TokenBucket,
+                              download_price_histories, download_prices, split_windows)
+
+class PagedClient(KISDailyPriceClient):
+    """영업일마다 종가가 있는 가짜 API. 한 페이지 rows_per_page건 (최신순), failing 종목은 오류"""
+
+    def __init__(self, endpoint=STOCK_DAILY, rows_per_page=None, failing=()):
+        super().__init__("http://kis.invalid", "key", "secret", "token", endpoint=endpoint, rate_per_sec=1e6)
+        self.rows_per_page = rows_per_page or endpoint["page_size"]
+        self.failing = set(failing)
+        self.calls = []
+
+    def fetch_page(self, symbol, start_date_str, end_date_str):
+        self.calls.append((symbol, start_date_str, end_date_str))
+        if symbol in self.failing:
+            raise KISAPIError(f"{symbol} ({end_date_str}): 테스트 오류")
+        days = pd.bdate_range(start_date_str, end_date_str)[::-1][:self.rows_per_page]
+        return [{'stck_bsop_date': day.strftime("%Y%m%d"), self.price_key: str(float(day.day))} for day in days]
+
+def pages_of(client, symbol, start, end):
+    return list(client.iter_pages(symbol, pd.Timestamp(start).to_pydatetime(), pd.Timestamp(end).to_pydatetime()))
+
+def test_iter_pages_stops_on_short_page_for_stock_api():
+    client = PagedClient(rows_per_page=100)
+    pages = pages_of(client, '005930', '2024-01-01', '2024-03-29')
+    assert len(client.calls) == 1 and len(pages[0][0]) == len(pd.bdate_range('2024-01-01', '2024-03-29'))
+
+def test_iter_pages_keeps_paging_without_page_size():
+    # 지수 API는 응답 건수가 적어도 끝이 아님 → 시작일에 닿을 때까지 계속 조회
+    client = PagedClient(endpoint=INDEX_DAILY, rows_per_page=20)
+    pages = pages_of(client, '0001', '2024-01-01', '2024-03-29')
+    dates = np.concatenate([d for d, _ in pages])
+    assert len(client.calls) == len(pages) > 1
+    np.testing.assert_array_equal(np.sort(dates), pd.bdate_range('2024-01-01', '2024-03-29').values.astype('datetime64[D]'))
+
+def test_split_windows_cover_range_without_overlap():
+    windows = split_windows('20230101', '20240229', window_days=100)
+    days = [pd.date_range(start, end) for start, end in windows]
+    covered = days[0].append(days[1:])
+    assert covered.is_unique and covered.sort_values().equals(pd.date_range('2023-01-01', '2024-02-29'))
+
+def test_token_bucket_limits_rate_across_threads():
+    bucket = TokenBucket(rate_per_sec=100)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(10)]) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert time.perf_counter() - started >= 0.38 # 40건 / 초당 100건 (첫 토큰 1개)
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data; self.status_code = status_code; self.content = b"{}"
+
+    def json(self):
+        return self.data
+
+def test_fetch_page_retries_rate_limit_then_raises(monkeypatch):
+    monkeypatch.setattr(price_downloader, "BACKOFF_BASE_SECONDS", 0)
+    client = KISDailyPriceClient("http://kis.invalid", "key", "secret", "token", rate_per_sec=1e6, max_retries=2)
+    responses = [FakeResponse({"rt_cd": "1", "msg_cd": "EGW00201"}), FakeResponse({}, 503),
+                 FakeResponse({"rt_cd": "0", "output2": [{"stck_bsop_date": "20240102", "stck_clpr": "10"}, {}]})]
+    monkeypatch.setattr(client.session, "get", lambda *args, **kwargs: responses.pop(0))
+    assert client.fetch_page('005930', '20240101', '20240102') == [{"stck_bsop_date": "20240102", "stck_clpr": "10"}]
+
+    monkeypatch.setattr(client.session, "get", lambda *args, **kwargs: FakeResponse({"rt_cd": "1", "msg_cd": "EGW00201"}))
+    with pytest.raises(KISAPIError, match="재시도"):
+        client.fetch_page('005930', '20240101', '20240102')
+    monkeypatch.setattr(client.session, "get", lambda *args, **kwargs: FakeResponse({"rt_cd": "1", "msg1": "잘못된 종목"}))
+    with pytest.raises(KISAPIError, match="잘못된 종목"):
+        client.fetch_page('005930', '20240101', '20240102')
+
+def test_download_prices_skips_failed_symbol():
+    client = PagedClient(failing=['000660'])
+    received = []
+    counts = download_prices(client, ['005930', '000660'], '20230101', '20240229',
+                             lambda symbol, dates, prices: received.append(symbol), max_workers=1)
+    assert counts == {'005930': len(pd.bdate_range('2023-01-01', '2024-02-29'))}
+    assert set(received) == {'005930'}
+    assert sum(1 for symbol, _, _ in client.calls if symbol == '000660') == 1 # 나머지 구간은 건너뜀
+
+def test_download_price_histories_returns_newest_first():
+    histories = download_price_histories(PagedClient(failing=['000660']), ['005930', '000660'], '20240101', '20240110')
+    assert histories['000660'] == []
+    assert [row['stck_bsop_date'] for row in histories['005930']] == [d.strftime("%Y%m%d") for d in pd.bdate_range('2024-01-01', '2024-01-10')[::-1]]
+    assert histories['005930'][0]['stck_clpr'] == 10.0
+
+class OverlappingClient(PagedClient):
+    """경계일 이후 행도 섞어 보내는 API (페이지끼리 날짜가 겹침)"""
+
+    def fetch_page(self, symbol, start_date_str, end_date_str):
+        self.calls.append((symbol, start_date_str, end_date_str))
+        end = pd.Timestamp(end_date_str) + pd.Timedelta(days=5)
+        days = pd.bdate_range(start_date_str, end)[::-1][:self.rows_per_page]
+        return [{'stck_bsop_date': day.strftime("%Y%m%d"), self.price_key: str(float(day.day))} for day in days]
+
+def test_iter_pages_drops_rows_overlapping_previous_page():
+    client = OverlappingClient()
+    pages = pages_of(client, '005930', '2023-01-01', '2024-03-29')
+    dates = np.concatenate([d for d, _ in pages])
+    assert len(pages) > 1 and len(np.unique(dates)) == len(dates)
+    np.testing.assert_array_equal(np.sort(dates), pd.bdate_range('2023-01-01', '2024-03-29').values.astype('datetime64[D]'))
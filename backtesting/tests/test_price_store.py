@@ -0,0 +1,75 @@
+# test_price_store.py (컬럼형 가격 저장소: CSV와 같은 값 / 캐시 재사용 / CSV 변경 시 재생성 / 병합 / 동시 접근)
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import PageSpool, append_prices, load_price_frame, open_store, price_columns, write_prices
+
+@pytest.fixture
+def csv_path(tmp_path):
+    df = pd.DataFrame({"226490": [100.0, 101.5, np.nan, 99.0], "114260": [50.0, 50.1, 50.2, 50.3]},
+                      index=pd.DatetimeIndex(pd.bdate_range('2024-01-01', periods=4), name='Date'))
+    path = tmp_path / "prices.csv"
+    df.to_csv(path)
+    return str(path)
+
+def test_store_matches_csv(csv_path):
+    expected = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+    pd.testing.assert_frame_equal(load_price_frame(csv_path), expected, check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(load_price_frame(csv_path, ["114260"]), expected[["114260"]],
+                                  check_freq=False, check_index_type=False)
+    assert price_columns(csv_path) == ["226490", "114260"]
+    with pytest.raises(KeyError):
+        load_price_frame(csv_path, ["999999"])
+
+def test_open_store_reuses_until_csv_changes(csv_path):
+    store = open_store(csv_path)
+    assert open_store(csv_path) is store
+    df = pd.read_csv(csv_path, index_col=0)
+    df["069500"] = 1.0
+    df.to_csv(csv_path)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reopened = open_store(csv_path)
+    assert reopened is not store and "069500" in reopened.columns
+
+def test_append_prices_overwrites_same_dates_and_adds_columns(csv_path):
+    new_df = pd.DataFrame({"226490": [98.0, 97.0], "069500": [10.0, 11.0]},
+                          index=pd.DatetimeIndex(pd.to_datetime(['2024-01-04', '2024-01-05']), name='Date'))
+    assert append_prices(csv_path, new_df) == 5
+    merged = load_price_frame(csv_path)
+    assert list(merged.columns) == ["226490", "114260", "069500"]
+    assert merged.loc['2024-01-04', "226490"] == 98.0
+    assert np.isnan(merged.loc['2024-01-03', "226490"])
+    assert np.isnan(merged.loc['2024-01-05', "114260"]) # 새 날짜의 기존 종목은 NaN
+    pd.testing.assert_frame_equal(pd.read_csv(csv_path, index_col=0, parse_dates=True), merged,
+                                  check_freq=False, check_index_type=False)
+    assert not [name for name in os.listdir(os.path.dirname(csv_path)) if name.endswith(".tmp")]
+
+def test_concurrent_writes_and_reads(csv_path):
+    df = load_price_frame(csv_path)
+    def work(i):
+        if i % 2:
+            write_prices(csv_path, df * (1 + i))
+        return load_price_frame(csv_path).shape
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        shapes = list(pool.map(work, range(16)))
+    assert set(shapes) == {df.shape}
+
+
+def test_page_spool_sorts_pages(tmp_path):
+    with PageSpool(str(tmp_path)) as spool:
+        spool.write("A", np.array(['2024-01-05', '2024-01-04'], dtype='datetime64[D]'), np.array([5.0, 4.0]))
+        spool.write("A", np.array(['2024-01-02'], dtype='datetime64[D]'), np.array([2.0]))
+        spool.write("B", np.array(['2024-01-03'], dtype='datetime64[D]'), np.array([3.0]))
+        frame = spool.to_frame({"B": "bond"})
+        assert spool.to_frame(symbols=[]).empty
+        spool_dir = spool.dir
+    assert not os.path.exists(spool_dir) # 닫으면 임시 파일 삭제
+    assert list(frame.columns) == ["A", "bond"]
+    assert frame.index.strftime('%m-%d').tolist() == ['01-02', '01-03', '01-04', '01-05']
+    assert frame["A"].tolist()[::3] == [2.0, 5.0]
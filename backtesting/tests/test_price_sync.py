@@ -0,0 +1,101 @@
+# test_price_sync.py (증분 동기화: plan_sync / sync_price_file, 가짜 KIS 클라이언트 사용)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_downloader import KISAPIError, KISDailyPriceClient
+from price_store import load_price_frame, write_prices
+from price_sync import plan_sync, sync_price_file
+
+def price_on(symbol, day):
+    """종목/날짜로 정해지는 가짜 종가"""
+    return float(1000 + int(symbol) % 97 + day.toordinal() % 500)
+
+class FakeClient(KISDailyPriceClient):
+    """영업일마다 종가가 있는 가짜 API. fail_before 이전 구간을 조회하면 해당 종목은 오류를 냅니다."""
+
+    def __init__(self, fail_before=None):
+        super().__init__("http://kis.invalid", "key", "secret", "token", rate_per_sec=1e6)
+        self.fail_before = fail_before or {}
+        self.calls = []
+
+    def fetch_page(self, symbol, start_date_str, end_date_str):
+        self.calls.append((symbol, start_date_str, end_date_str))
+        fail_before = self.fail_before.get(symbol)
+        if fail_before and start_date_str < fail_before:
+            raise KISAPIError(f"{symbol} ({end_date_str}): 테스트 오류")
+        days = pd.bdate_range(start_date_str, end_date_str)[::-1][:self.endpoint["page_size"]]
+        return [{'stck_bsop_date': day.strftime("%Y%m%d"), self.price_key: str(price_on(symbol, day))} for day in days]
+
+def expected_frame(symbols, start, end):
+    days = pd.bdate_range(start, end)
+    return pd.DataFrame({symbol: [price_on(symbol, day) for day in days] for symbol in symbols},
+                        index=days.rename('Date'))
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """005930은 2024-01-31까지, 000660은 2024-01-15까지 저장된 가격 파일"""
+    df = expected_frame(['005930', '000660'], '2024-01-02', '2024-01-31')
+    df.loc['2024-01-16':, '000660'] = np.nan
+    path = str(tmp_path / "prices.csv")
+    write_prices(path, df)
+    return path
+
+def test_plan_sync_starts_after_last_stored_date(csv_path):
+    start_dates = plan_sync(csv_path, ['005930', '000660', '035420'], '20230101', '20240205')
+    assert start_dates == {'005930': '20240201', '000660': '20240116', '035420': '20230101'}
+
+def test_plan_sync_skips_up_to_date_and_maps_columns(csv_path):
+    assert plan_sync(csv_path, ['005930'], '20230101', '20240131') == {}
+    assert plan_sync(csv_path, ['A005930'], '20230101', '20240205', column_map={'A005930': '005930'}) == {'A005930': '20240201'}
+    assert plan_sync(csv_path + ".missing", ['005930'], '20230101', '20240105') == {'005930': '20230101'}
+
+def test_sync_price_file_appends_only_new_days(csv_path):
+    client = FakeClient()
+    added, failed = sync_price_file(client, csv_path, ['005930', '000660'], '20230101', '20240229', max_workers=2)
+
+    assert failed == []
+    assert added == len(pd.bdate_range('2024-02-01', '2024-02-29')) + len(pd.bdate_range('2024-01-16', '2024-02-29'))
+    assert {symbol for symbol, _, _ in client.calls} == {'005930', '000660'}
+    assert min(start for symbol, start, _ in client.calls if symbol == '005930') == '20240201'
+    pd.testing.assert_frame_equal(load_price_frame(csv_path), expected_frame(['005930', '000660'], '2024-01-02', '2024-02-29'),
+                                  check_freq=False, check_index_type=False)
+
+    client.calls.clear() # 다시 실행하면 이미 최신이므로 호출하지 않음
+    assert sync_price_file(client, csv_path, ['005930', '000660'], '20230101', '20240229') == (0, [])
+    assert client.calls == []
+
+def test_sync_price_file_drops_failed_symbol_pages(csv_path):
+    # 새 종목 035420은 최근 구간은 받다가 오래된 구간에서 실패 → 받은 페이지도 저장하지 않아야 함
+    client = FakeClient(fail_before={'035420': '20231001'})
+    added, failed = sync_price_file(client, csv_path, ['005930', '035420'], '20230101', '20240229', max_workers=1)
+
+    assert failed == ['035420']
+    assert any(symbol == '035420' and start >= '20231001' for symbol, start, _ in client.calls)
+    assert added == len(pd.bdate_range('2024-02-01', '2024-02-29'))
+    stored = load_price_frame(csv_path)
+    assert '035420' not in stored.columns
+    # 실패한 종목은 다음 실행에서 처음부터 다시 수집
+    assert plan_sync(csv_path, ['035420'], '20230101', '20240229') == {'035420': '20230101'}
+
+def test_full_refresh_keeps_failed_and_unrequested_columns(csv_path):
+    # 000660은 재수집에 실패, 035420은 파일에만 있는 종목 → 두 컬럼 모두 기존 값 유지
+    before = load_price_frame(csv_path)
+    before['035420'] = 5.0
+    write_prices(csv_path, before)
+    client = FakeClient(fail_before={'000660': '20240301'})
+    added, failed = sync_price_file(client, csv_path, ['005930', '000660'], '20240102', '20240209', full_refresh=True)
+
+    assert failed == ['000660'] and added == len(pd.bdate_range('2024-01-02', '2024-02-09'))
+    stored = load_price_frame(csv_path)
+    assert list(stored.columns) == ['005930', '000660', '035420']
+    pd.testing.assert_frame_equal(stored.loc[:'2024-01-31', ['000660', '035420']], before[['000660', '035420']],
+                                  check_freq=False, check_index_type=False)
+    pd.testing.assert_series_equal(stored['005930'], expected_frame(['005930'], '2024-01-02', '2024-02-09')['005930'],
+                                   check_freq=False, check_index_type=False)
+
+def test_full_refresh_drops_stale_rows_of_replaced_column(csv_path):
+    # 재수집 기간보다 앞선 날짜는 교체된 종목만 값이 있었으므로 행째 제거
+    sync_price_file(FakeClient(), csv_path, ['005930', '000660'], '20240110', '20240131', full_refresh=True)
+    assert load_price_frame(csv_path).index[0] == pd.Timestamp('2024-01-10')
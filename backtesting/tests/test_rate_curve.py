@@ -0,0 +1,36 @@
+# test_rate_curve.py (기준금리 계단 함수: 기존 마스크 방식과 일치 / CSV 이력 / 캐시 배열 보호)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rate_curve import BASE_RATE_HISTORY, DEFAULT_RATE_CURVE, RateCurve
+
+def masked_rate_series(start_date, end_date, rate_history=BASE_RATE_HISTORY):
+    """기존 app.py의 create_daily_base_rate_series (변경일마다 전체 날짜 마스크)"""
+    all_days = pd.date_range(start=start_date, end=end_date, freq='D')
+    rate_series = pd.Series(index=all_days, name="base_rate", dtype=float)
+    for date_str, rate in rate_history.items():
+        rate_series.loc[rate_series.index >= pd.to_datetime(date_str)] = rate
+    rate_series.ffill(inplace=True)
+    return rate_series / 100.0
+
+@pytest.mark.parametrize("start, end", [("2019-12-01", "2025-11-07"), ("2023-01-13", "2023-01-13"), ("2024-10-10", "2024-12-01")])
+def test_daily_series_matches_masked_loop(start, end):
+    pd.testing.assert_series_equal(DEFAULT_RATE_CURVE.daily_series(start, end), masked_rate_series(start, end), check_freq=False)
+
+def test_rates_before_first_change_are_nan():
+    series = DEFAULT_RATE_CURVE.daily_series("2021-11-24", "2021-11-25")
+    assert np.isnan(series.iloc[0]) and series.iloc[1] == pytest.approx(0.01)
+
+def test_from_csv_sorts_history(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("date,rate\n2024-03-01,2.0\n2024-01-01,3.0\n")
+    series = RateCurve.from_csv(str(path)).daily_series("2024-02-28", "2024-03-02")
+    assert series.tolist() == pytest.approx([0.03, 0.03, 0.02, 0.02])
+
+def test_cached_values_are_read_only():
+    series = DEFAULT_RATE_CURVE.daily_series("2024-01-01", "2024-01-31")
+    with pytest.raises(ValueError):
+        series.to_numpy()[0] = 1.0
+    assert DEFAULT_RATE_CURVE.daily_series("2024-01-01", "2024-01-31").iloc[0] == pytest.approx(0.035)
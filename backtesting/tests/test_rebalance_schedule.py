@@ -0,0 +1,62 @@
+# test_rebalance_schedule.py (달력 주기 일정 / 비중 이탈 밴드 일정 / 일정 해석)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import cash_growth_factors
+from rebalance_schedule import (
+    LEGACY_SCHEDULE, calendar_rebalance_indices, drift_band_rebalance_indices, resolve_rebalance_indices,
+)
+from test_backtest_engine import STOCKS, BONDS, TARGET_WEIGHTS, make_price_df
+
+ASSET_KEYS = STOCKS + BONDS
+
+def test_monthly_uses_last_trading_day_even_on_weekend_month_ends():
+    dates = pd.bdate_range('2022-04-25', '2022-08-05') # 4월 30일(토), 7월 31일(일)
+    monthly = [str(dates[i].date()) for i in calendar_rebalance_indices(dates, 'monthly')]
+    legacy = [str(dates[i].date()) for i in calendar_rebalance_indices(dates, LEGACY_SCHEDULE)]
+    assert monthly == ['2022-04-29', '2022-05-31', '2022-06-30', '2022-07-29']
+    assert legacy == ['2022-05-31', '2022-06-30']
+
+def test_quarterly_and_cached_indices_are_read_only():
+    dates = pd.bdate_range('2022-01-03', '2022-12-30')
+    quarterly = calendar_rebalance_indices(dates, 'quarterly')
+    assert [str(dates[i].date()) for i in quarterly] == ['2022-03-31', '2022-06-30', '2022-09-30'] # 마지막 날은 제외
+    assert calendar_rebalance_indices(dates, 'quarterly') is quarterly
+    with pytest.raises(ValueError):
+        quarterly[0] = 1
+
+def brute_force_band(price_df, band, check_idx=None):
+    """매일 현재 비중을 계산해 밴드를 벗어나면 리밸런싱하는 루프"""
+    prices = price_df[ASSET_KEYS].to_numpy()
+    cash_growth = cash_growth_factors(price_df.index, price_df['base_rate'])
+    weights = np.array([TARGET_WEIGHTS[a] for a in ASSET_KEYS] + [TARGET_WEIGHTS['Cash']])
+    checkable = set(range(len(prices))) if check_idx is None else set(check_idx.tolist())
+    shares = weights[:-1] / prices[0]; cash = weights[-1]
+    rebalances = []
+    for i in range(1, len(prices) - 1):
+        cash *= cash_growth[i]
+        holdings = np.append(shares * prices[i], cash)
+        if i in checkable and np.abs(holdings / holdings.sum() - weights).max() > band:
+            rebalances.append(i)
+            total = holdings.sum()
+            shares = total * weights[:-1] / prices[i]; cash = total * weights[-1]
+    return rebalances
+
+@pytest.mark.parametrize("band, check", [(0.02, None), (0.05, None), (0.02, 'monthly')])
+def test_drift_band_matches_daily_loop(band, check):
+    price_df = make_price_df()
+    check_idx = calendar_rebalance_indices(price_df.index, check) if check else None
+    found = drift_band_rebalance_indices(price_df, TARGET_WEIGHTS, ASSET_KEYS, band, check_idx, block_size=16)
+    assert found.tolist() == brute_force_band(price_df, band, check_idx)
+    assert len(found) > 0
+
+def test_resolve_rebalance_indices():
+    price_df = make_price_df()
+    assert resolve_rebalance_indices(price_df, 'annual').tolist() == calendar_rebalance_indices(price_df.index, 'annual').tolist()
+    band = resolve_rebalance_indices(price_df, {'type': 'band', 'band': 0.05, 'check': 'monthly'}, TARGET_WEIGHTS, ASSET_KEYS)
+    assert set(band.tolist()) <= set(calendar_rebalance_indices(price_df.index, 'monthly').tolist())
+    for schedule in ('daily', {'type': 'threshold'}):
+        with pytest.raises(ValueError):
+            resolve_rebalance_indices(price_df, schedule)
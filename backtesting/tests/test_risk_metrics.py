@@ -0,0 +1,68 @@
+# test_risk_metrics.py (위험 지표: 무위험 수익률 일관성 / pandas 기준 계산과 비교 / 기간별 수익률 표)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import run_rebalancing_backtest_vectorized
+from risk_metrics import TRADING_DAYS_PER_YEAR, compute_risk_metrics
+from test_backtest_engine import ASSETS_BY_GROUP, INITIAL_CAPITAL, TARGET_WEIGHTS, make_price_df
+
+@pytest.fixture
+def price_df():
+    return make_price_df()
+
+@pytest.fixture
+def values(price_df):
+    return run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP)['value']
+
+def test_all_cash_portfolio_has_no_excess_return(price_df):
+    cash = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, {'226490': 0, '114260': 0, '363570': 0, 'Cash': 1.0},
+                                               ASSETS_BY_GROUP)['value']
+    benchmark = price_df['226490'].to_numpy()
+    metrics = compute_risk_metrics(price_df.index, cash.to_numpy(), price_df['base_rate'].to_numpy(), benchmark)
+    assert metrics["Alpha"] == pytest.approx(0.0, abs=1e-12)
+    assert metrics["Beta"] == pytest.approx(0.0, abs=1e-9)
+    # 현금 CAGR = 기준금리 (달력일 복리) → 거래일 252 기준으로 연율화한 무위험 수익률과 같은 규모
+    assert metrics["CAGR"] == pytest.approx(np.exp(np.log1p(price_df['base_rate'] / 365).mean() * 365) - 1, rel=0.01)
+
+def test_metrics_match_pandas_reference(price_df, values):
+    rates = price_df['base_rate']
+    metrics = compute_risk_metrics(price_df.index, values.to_numpy(), rates.to_numpy())
+    returns = values.pct_change().dropna()
+    days = price_df.index.to_series().diff().dt.days.dropna()
+    rf = (1 + rates.iloc[1:] / 365) ** days - 1
+    excess = returns - rf
+    ann = np.sqrt(TRADING_DAYS_PER_YEAR)
+    assert metrics["Volatility"] == pytest.approx(returns.std() * ann)
+    assert metrics["Sharpe"] == pytest.approx(excess.mean() / excess.std() * ann)
+    downside = np.sqrt((excess.clip(upper=0) ** 2).mean()) * ann
+    assert metrics["Sortino"] == pytest.approx(excess.mean() * TRADING_DAYS_PER_YEAR / downside)
+    assert metrics["MDD"] == pytest.approx((values / values.cummax() - 1).min())
+    assert metrics["Calmar"] == pytest.approx(metrics["CAGR"] / abs(metrics["MDD"]))
+    # 무위험 수익률의 연간 합계 = 기준금리 (거래일만 세어 252/365로 줄어들지 않음)
+    num_years = (price_df.index[-1] - price_df.index[0]).days / 365
+    assert rf.sum() / num_years == pytest.approx(rates.mean(), rel=0.01)
+
+def test_benchmark_against_itself(price_df, values):
+    metrics = compute_risk_metrics(price_df.index, values.to_numpy(), price_df['base_rate'].to_numpy(), values.to_numpy())
+    assert metrics["Beta"] == pytest.approx(1.0) and metrics["Correlation"] == pytest.approx(1.0)
+    assert metrics["Alpha"] == pytest.approx(0.0, abs=1e-12)
+    assert metrics["Tracking Error"] == 0.0 and metrics["Information Ratio"] is None
+
+def test_period_tables_match_resample(price_df, values):
+    metrics = compute_risk_metrics(price_df.index, values.to_numpy())
+    month_end = values.resample('ME').last()
+    monthly = month_end.pct_change()
+    monthly.iloc[0] = month_end.iloc[0] / values.iloc[0] - 1
+    for period, ret in monthly.items():
+        assert metrics["Monthly Returns"][str(period.year)][str(period.month)] == pytest.approx(ret)
+    assert metrics["Annual Returns"]["2023"] == pytest.approx(values.iloc[-1] / values.loc[:'2022-12-31'].iloc[-1] - 1)
+
+def test_drawdown_durations():
+    dates = pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-05', '2024-01-10', '2024-01-20', '2024-01-25'])
+    values = np.array([100.0, 90.0, 95.0, 101.0, 99.0, 98.0])
+    metrics = compute_risk_metrics(dates, values)
+    assert metrics["MDD"] == pytest.approx(-0.1)
+    assert metrics["MDD Recovery Days"] == 8           # 저점(1/2) → 회복(1/10)
+    assert metrics["Max Drawdown Duration Days"] == 15 # 고점(1/10) → 데이터 끝(1/25), 미회복
@@ -0,0 +1,60 @@
+# test_rolling_analysis.py (구간 MDD 질의 / 롤링 윈도우 = 각 시점에서 새로 시작한 백테스트 / 기간 검증)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import monthly_rebalance_indices, run_rebalancing_backtest_vectorized
+from rolling_analysis import (
+    build_drawdown_table, max_horizon_years, query_window_mdd, run_rolling_analysis, validate_horizons, window_bounds,
+)
+from test_backtest_engine import ASSETS_BY_GROUP, INITIAL_CAPITAL, TARGET_WEIGHTS, make_price_df
+
+def brute_force_mdd(values, start, end):
+    window = values[start:end + 1]
+    return (window / np.maximum.accumulate(window) - 1).min()
+
+def test_query_window_mdd_matches_brute_force():
+    values = 100 * np.cumprod(1 + np.random.default_rng(3).normal(0, 0.02, 300))
+    levels = build_drawdown_table(values)
+    starts = np.array([0, 0, 5, 17, 120, 299]); ends = np.array([299, 0, 6, 200, 250, 299])
+    expected = [brute_force_mdd(values, s, e) for s, e in zip(starts, ends)]
+    np.testing.assert_allclose(query_window_mdd(levels, starts, ends), expected, rtol=1e-12, atol=1e-15)
+
+def test_windows_match_fresh_backtests():
+    price_df = make_price_df(start='2020-01-01', end='2023-12-29')
+    price_df['benchmark'] = price_df['226490']
+    result = run_rolling_analysis(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP, horizons_years=[2], include_windows=True)
+    windows = result["2y"]["windows"]
+    dates = price_df.index
+    for i in (0, 5, len(windows["start"]) - 1):
+        window_df = price_df.loc[windows["start"][i]:windows["end"][i]]
+        values = run_rebalancing_backtest_vectorized(window_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP)['value']
+        years = (window_df.index[-1] - window_df.index[0]).days / 365.25
+        assert windows["portfolio_cagr"][i] == pytest.approx((values.iloc[-1] / INITIAL_CAPITAL) ** (1 / years) - 1, rel=1e-9)
+        assert windows["portfolio_mdd"][i] == pytest.approx((values / values.cummax() - 1).min(), rel=1e-9)
+    assert result["2y"]["portfolio"]["CAGR"]["count"] == len(windows["start"])
+    assert pd.Timestamp(windows["end"][-1]) <= dates[-1]
+
+def test_window_bounds_drop_incomplete_windows():
+    dates = pd.bdate_range('2020-01-01', '2021-06-30')
+    start_idx = np.concatenate(([0], monthly_rebalance_indices(dates)))
+    starts, ends = window_bounds(dates, start_idx, 1)
+    assert (dates[starts] + pd.DateOffset(years=1) <= dates[-1]).all()
+    assert (dates[ends] <= dates[starts] + pd.DateOffset(years=1)).all()
+
+@pytest.mark.parametrize("horizons", [[0], [-1], [3], [1, 2.5], [True]])
+def test_validate_horizons_rejects_out_of_range(horizons):
+    dates = pd.bdate_range('2020-01-01', '2022-06-30')
+    assert max_horizon_years(dates) == 2
+    with pytest.raises(ValueError):
+        validate_horizons(dates, horizons)
+
+def test_rolling_api(client):
+    res = client.get('/api/rolling', params={"horizons": "1,3"})
+    assert res.status_code == 200
+    assert set(res.json()) == {"1y", "3y"}
+
+@pytest.mark.parametrize("horizons", ["-1", "0", "100", "1,abc"])
+def test_rolling_api_rejects_invalid_horizons(client, horizons):
+    assert client.get('/api/rolling', params={"horizons": horizons}).status_code == 400
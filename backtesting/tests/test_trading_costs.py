@@ -0,0 +1,43 @@
+# test_trading_costs.py (수수료 / 슬리피지 / 매도세: 비용률, 리밸런싱 비용, 엔진 반영)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import (
+    HISTORY_COLUMNS, cost_rates, monthly_rebalance_indices, rebalance_cost, run_rebalancing_backtest_vectorized,
+)
+from test_backtest_engine import ASSETS_BY_GROUP, INITIAL_CAPITAL, TARGET_WEIGHTS, make_price_df
+
+COSTS = {'commission': 0.00015, 'slippage': 0.0005, 'sell_tax': 0.0015, 'taxed_assets': ['226490']}
+
+def test_sell_tax_applies_only_to_taxed_assets():
+    buy_rates, sell_rates = cost_rates(['226490', '114260'], COSTS)
+    assert buy_rates.tolist() == pytest.approx([0.00065, 0.00065])
+    assert sell_rates.tolist() == pytest.approx([0.00215, 0.00065])
+
+def test_rebalance_cost_charges_buys_and_sells():
+    buy_rates, sell_rates = np.array([0.001, 0.001]), np.array([0.003, 0.001])
+    cost, turnover = rebalance_cost(np.array([600.0, 400.0]), np.array([500.0, 500.0]), buy_rates, sell_rates)
+    assert turnover == pytest.approx(200.0)
+    assert cost == pytest.approx(100 * 0.003 + 100 * 0.001)
+
+def test_zero_costs_match_no_costs():
+    price_df = make_price_df()
+    expected = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP)
+    result = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP,
+                                                 costs={'commission': 0.0, 'slippage': 0.0, 'sell_tax': 0.0})
+    # 총액은 같고, 구성은 리밸런싱일만 (비용 모델 경로는 매매 후 목표 비중으로 기록) 다름
+    np.testing.assert_allclose(result['value'], expected['value'], rtol=1e-12)
+    other_days = ~np.isin(np.arange(len(price_df)), np.concatenate(([0], monthly_rebalance_indices(price_df.index))))
+    pd.testing.assert_frame_equal(result[HISTORY_COLUMNS][other_days], expected[other_days], check_exact=False, rtol=1e-12)
+    assert (result['trading_cost'] == 0).all() and result['turnover'].iloc[0] == pytest.approx(0.9 * INITIAL_CAPITAL)
+
+def test_costs_reduce_value_by_accumulated_cost_drag():
+    price_df = make_price_df()
+    free = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP)
+    costly = run_rebalancing_backtest_vectorized(price_df, INITIAL_CAPITAL, TARGET_WEIGHTS, ASSETS_BY_GROUP, costs=COSTS)
+    assert (np.diff(costly['trading_cost']) >= 0).all() and (np.diff(costly['turnover']) >= 0).all()
+    assert costly['value'].iloc[-1] < free['value'].iloc[-1]
+    # 비용은 작으므로 최종 가치 차이는 누적 비용과 같은 규모 (복리 효과만큼만 차이)
+    assert free['value'].iloc[-1] - costly['value'].iloc[-1] == pytest.approx(costly['trading_cost'].iloc[-1], rel=0.2)
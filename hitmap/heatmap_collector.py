@@ -0,0 +1,190 @@
+# heatmap_collector.py (KOSPI 200 히트맵 스냅샷 비동기 수집: 공유 세션 / 토큰 버킷 / 동시 요청 제한 / 재시도)
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pandas as pd
+
+PRICE_PATH = "/uapi/domestic-stock/v1/quotations/inquire-price"                    # 현재가
+HISTORY_PATH = "/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"   # 일봉 (최근 30거래일)
+PRICE_TR_ID = "FHKST01010100"
+HISTORY_TR_ID = "FHKST01010400"
+
+DEFAULT_RATE_PER_SEC = float(os.getenv("KIS_RATE_LIMIT", "15")) # 실전 계좌 초당 20건 한도에 여유를 둠 (모의투자는 2)
+DEFAULT_MAX_CONCURRENCY = 16
+HISTORY_RECHECK_SECONDS = 600 # 캐시된 일봉에 오늘 봉이 없을 때(장 시작 전/휴장일) 다시 조회하는 최소 간격
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.3
+REQUEST_TIMEOUT_SECONDS = 10
+RATE_LIMIT_MSG_CD = "EGW00201" # 초당 거래건수를 초과하였습니다.
+RETRYABLE_HTTP_STATUS = (429, 500, 502, 503, 504)
+
+KST = timezone(timedelta(hours=9)) # 일봉의 영업일(stck_bsop_date)은 한국 시간 기준
+
+UNIVERSE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_2200_20251103.csv")
+
+class QuoteAPIError(Exception):
+    """재시도해도 해결되지 않는 시세 API 오류"""
+
+def load_universe(csv_path=UNIVERSE_FILE):
+    """KOSPI 200 구성 종목 CSV(cp949) → {종목코드(6자리): 종목명} (파일 순서 유지)"""
+    df = pd.read_csv(csv_path, dtype={'종목코드': str}, encoding='cp949')
+    df['종목코드'] = df['종목코드'].str.zfill(6)
+    return df.set_index('종목코드')['종목명'].to_dict()
+
+# --- 1. 응답 가공 (get_all_data.py와 같은 스키마) ---
+
+def parse_price_output(symbol, output):
+    """inquire-price의 output → {symbol, sector, market_cap, change_rate, price}"""
+    price_str = output.get('stck_prpr', '0').replace(',', '')
+    return {
+        "symbol": symbol.zfill(6),
+        "sector": output.get('bstp_kor_isnm', 'N/A'),
+        "market_cap": int(output.get('hts_avls', 0)) * 100_000_000, # 억 원 → 원
+        "change_rate": float(output.get('prdy_ctrt', 0.0)),
+        "price": int(price_str) if price_str.isdigit() else 0,
+    }
+
+def parse_history_output(output):
+    """inquire-daily-itemchartprice의 output → [(영업일 YYYYMMDD, 종가), ...] (최신순)"""
+    return [(day.get('stck_bsop_date', ''), int(day['stck_clpr'].replace(',', '')))
+            for day in output or [] if day.get('stck_clpr')]
+
+def merge_today_close(dated_history, today, price):
+    """
+    ⭐️ 일봉의 오늘 봉만 현재가로 갱신합니다. 맨 앞 봉이 오늘이 아니면(장 시작 전에 조회한 일봉 = 맨 앞이 전일)
+    None을 반환합니다. (전일 종가를 덮어쓰지 않도록 → 호출부가 일봉을 다시 조회해 오늘 봉을 받음)
+    """
+    if dated_history and dated_history[0][0] == today:
+        return [(today, price)] + dated_history[1:]
+    return None
+
+# --- 2. 속도 제한 (비동기 토큰 버킷) ---
+
+class AsyncTokenBucket:
+    """
+    초당 rate개의 토큰이 채워지는 토큰 버킷. 한 이벤트 루프의 모든 요청이 하나를 공유합니다.
+    capacity=1이면 버스트 없이 1/rate초 간격으로 고르게 호출합니다.
+    """
+
+    def __init__(self, rate_per_sec, capacity=1.0):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock: # ⭐️ 대기도 잠금 안에서: 먼저 온 요청부터 순서대로 토큰을 받음
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+# --- 3. 비동기 수집기 ---
+
+class HeatmapCollector:
+    """
+    종목별 현재가 + 30일 일봉을 동시에 조회해 히트맵 스냅샷(heatmap_complete_data.json 형식)을 만듭니다.
+    - httpx.AsyncClient 하나(연결 재사용)를 모든 요청이 공유
+    - 전체 호출 속도는 토큰 버킷 하나로, 동시 진행 요청 수는 세마포어로 제한
+    - 호출 한도 초과/일시 오류는 지수 백오프 + 지터로 재시도
+    - history_cache: {종목: (조회 시각, [(영업일, 종가), ...])}. 캐시된 일봉에 오늘 봉이 있으면 일봉 조회를 생략하고
+      그 봉만 현재가로 갱신. 오늘 봉이 아직 없으면(장 시작 전/휴장일) 일봉은 그대로 두고 HISTORY_RECHECK_SECONDS마다 다시 조회
+    """
+
+    def __init__(self, base_url, app_key, app_secret, access_token, rate_per_sec=DEFAULT_RATE_PER_SEC,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=MAX_RETRIES, history_cache=None):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.rate_per_sec = rate_per_sec
+        self.max_concurrency = max_concurrency
+        self.history_cache = history_cache if history_cache is not None else {}
+        authorization = access_token if access_token and access_token.startswith("Bearer ") else f"Bearer {access_token}"
+        self.headers = {"authorization": authorization, "appkey": app_key or "", "appsecret": app_secret or ""}
+        self.requests_sent = 0
+
+    async def _get(self, client, bucket, semaphore, path, tr_id, params, symbol):
+        """API 1회 호출 (output 반환). 속도 제한/일시 오류는 백오프 후 재시도"""
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                await bucket.acquire()
+                self.requests_sent += 1
+                try:
+                    res = await client.get(path, params=params, headers={"tr_id": tr_id})
+                    data = res.json() if res.content else {}
+                except (httpx.HTTPError, ValueError) as e:
+                    reason = f"HTTP 오류: {e}"
+                else:
+                    if data.get('rt_cd') == '0':
+                        return data.get('output')
+                    if data.get('msg_cd') == RATE_LIMIT_MSG_CD:
+                        reason = "초당 호출 한도 초과"
+                    elif res.status_code in RETRYABLE_HTTP_STATUS:
+                        reason = f"HTTP {res.status_code}"
+                    else:
+                        raise QuoteAPIError(f"{symbol}: {data.get('msg1', res.status_code)}")
+            if attempt == self.max_retries:
+                raise QuoteAPIError(f"{symbol}: 재시도 {self.max_retries}회 초과 ({reason})")
+            # ⭐️ 세마포어를 놓고 대기 (백오프 중인 요청이 다른 종목의 자리를 막지 않도록)
+            await asyncio.sleep(BACKOFF_BASE_SECONDS * (2 ** attempt) * (0.5 + random.random()))
+
+    async def _collect_one(self, client, bucket, semaphore, symbol, name, today):
+        symbol = symbol.zfill(6)
+        try:
+            output = await self._get(client, bucket, semaphore, PRICE_PATH, PRICE_TR_ID,
+                                     {"fid_cond_mrkt_div_code": "J", "fid_input_iscd": symbol}, symbol)
+            stock_data = parse_price_output(symbol, output or {})
+        except QuoteAPIError as e:
+            print(f"  [API Error - Price] {e} -> {name}({symbol}) 건너뜁니다.")
+            return None
+
+        checked_at, dated_history = self.history_cache.get(symbol, (None, []))
+        merged = merge_today_close(dated_history, today, stock_data["price"])
+        if merged is not None: # 오늘 종가(장중이면 현재가)만 갱신
+            dated_history = merged
+            self.history_cache[symbol] = (checked_at, dated_history)
+        elif checked_at is None or time.monotonic() - checked_at >= HISTORY_RECHECK_SECONDS:
+            try:
+                output = await self._get(client, bucket, semaphore, HISTORY_PATH, HISTORY_TR_ID, {
+                    "FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": symbol,
+                    "FID_PERIOD_DIV_CODE": "D", "FID_ORG_ADJ_PRC": "1",
+                }, symbol)
+                dated_history = parse_history_output(output)
+            except QuoteAPIError as e:
+                print(f"  [API Error - History] {e}")
+                dated_history = []
+            if dated_history:
+                self.history_cache[symbol] = (time.monotonic(), dated_history)
+
+        stock_data['name'] = name
+        stock_data['history'] = [close for _, close in dated_history]
+        return stock_data
+
+    async def collect(self, stock_dict):
+        """
+        stock_dict: {종목코드: 종목명} (순서 유지)
+        반환: 스냅샷 리스트 (현재가 조회에 실패한 종목은 제외)
+        """
+        today = datetime.now(KST).strftime("%Y%m%d")
+        bucket = AsyncTokenBucket(self.rate_per_sec)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, headers=self.headers, limits=limits,
+                                     timeout=REQUEST_TIMEOUT_SECONDS) as client:
+            results = await asyncio.gather(*(self._collect_one(client, bucket, semaphore, symbol, name, today)
+                                             for symbol, name in stock_dict.items()))
+        return [stock_data for stock_data in results if stock_data is not None]
+
+def collect_snapshot(stock_dict, base_url, app_key, app_secret, access_token, **options):
+    """동기 코드용 진입점: 히트맵 스냅샷 리스트를 반환합니다."""
+    collector = HeatmapCollector(base_url, app_key, app_secret, access_token, **options)
+    return asyncio.run(collector.collect(stock_dict))
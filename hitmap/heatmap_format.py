@@ -0,0 +1,121 @@
+# heatmap_format.py (히트맵 스냅샷 바이너리 포맷: 타입 컬럼 + int32 일봉 행렬 / JSON 대체 / 압축)
+#
+# 바이너리 구조 (리틀엔디언)
+#   [0:4]   매직 b"HMB1"
+#   [4:8]   uint32 헤더 길이 H (8의 배수가 되도록 공백으로 채움)
+#   [8:8+H] 헤더 JSON: version, epoch, updated_at, count, days, sectors, names, change_rate_scale,
+#           columns {이름: [dtype, 데이터 영역 기준 오프셋, 원소 수]}
+#   [8+H:]  컬럼 데이터 (각 컬럼은 8바이트 경계에서 시작 → 브라우저에서 TypedArray로 복사 없이 읽음)
+#     symbol      u1  count × 6  (ASCII 종목코드)
+#     sector      u1  count      (header.sectors 인덱스)
+#     market_cap  f8  count      (원, 2^53 이하 정수라 손실 없음)
+#     change_rate i4  count      (등락률 × change_rate_scale)
+#     price       i4  count
+#     history_len u1  count      (종목별 일봉 개수)
+#     history     i4  count × days (종목 × 일 행렬, 최신순, 빈 칸은 0)
+
+import gzip
+import json
+import struct
+
+import numpy as np
+
+BINARY_MIME = "application/vnd.heatmap.snapshot"
+FORMAT_JSON = "json"
+FORMAT_BINARY = "bin"
+MAGIC = b"HMB1"
+SYMBOL_WIDTH = 6
+CHANGE_RATE_SCALE = 100 # 등락률은 소수 둘째 자리까지
+GZIP_LEVEL = 6
+MIN_COMPRESS_BYTES = 1024
+
+# --- 1. 포맷 협상 ---
+
+def negotiate_format(format_arg, accept_header):
+    """?format=bin 또는 Accept 헤더의 BINARY_MIME이 있으면 바이너리, 아니면 JSON"""
+    if format_arg:
+        return FORMAT_BINARY if format_arg == FORMAT_BINARY else FORMAT_JSON
+    return FORMAT_BINARY if accept_header and BINARY_MIME in accept_header else FORMAT_JSON
+
+def gzip_if_accepted(body, accept_encoding):
+    """(본문, Content-Encoding 또는 None)"""
+    if len(body) >= MIN_COMPRESS_BYTES and "gzip" in (accept_encoding or "").lower():
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip" # 헤더 시각 고정 (같은 스냅샷 → 같은 바이트)
+    return body, None
+
+# --- 2. 인코딩 ---
+
+def _pad8(length):
+    return -length % 8
+
+def encode_json(records):
+    """기존 heatmap_complete_data.json과 같은 종목 리스트 (공백 없는 JSON)"""
+    return json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def encode_snapshot(records, version=0, updated_at=None, epoch=None):
+    """스냅샷 레코드 리스트 → 바이너리 바이트"""
+    count = len(records)
+    histories = [record.get("history") or [] for record in records]
+    days = max(map(len, histories), default=0)
+    sectors = list(dict.fromkeys(record.get("sector", "N/A") for record in records))
+    sector_index = {name: i for i, name in enumerate(sectors)}
+
+    history = np.zeros((count, days), dtype='<i4')
+    for i, closes in enumerate(histories):
+        history[i, :len(closes)] = closes
+    symbols = b"".join(record["symbol"].encode('ascii')[:SYMBOL_WIDTH].ljust(SYMBOL_WIDTH) for record in records)
+    columns = [
+        ("symbol", np.frombuffer(symbols, dtype='u1')),
+        ("sector", np.array([sector_index[record.get("sector", "N/A")] for record in records], dtype='u1')),
+        ("market_cap", np.array([record.get("market_cap", 0) for record in records], dtype='<f8')),
+        ("change_rate", np.rint(np.array([record.get("change_rate", 0.0) for record in records], dtype=float)
+                                * CHANGE_RATE_SCALE).astype('<i4')),
+        ("price", np.array([record.get("price", 0) for record in records], dtype='<i4')),
+        ("history_len", np.array(list(map(len, histories)), dtype='u1')),
+        ("history", history.ravel()),
+    ]
+
+    blocks, column_meta, offset = [], {}, 0
+    for name, values in columns:
+        data = values.tobytes()
+        column_meta[name] = [values.dtype.str.lstrip('<|'), offset, int(values.size)]
+        blocks.append(data + b"\0" * _pad8(len(data)))
+        offset += len(blocks[-1])
+
+    header = json.dumps({
+        "version": version, "epoch": epoch, "updated_at": updated_at, "count": count, "days": days,
+        "sectors": sectors, "names": [record.get("name", "") for record in records],
+        "change_rate_scale": CHANGE_RATE_SCALE, "symbol_width": SYMBOL_WIDTH, "columns": column_meta,
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    header += b" " * _pad8(8 + len(header)) # 데이터 영역이 8바이트 경계에서 시작하도록
+    return MAGIC + struct.pack('<I', len(header)) + header + b"".join(blocks)
+
+# --- 3. 디코딩 (검증/도구용. 브라우저는 heatmap_canvas.html의 decodeSnapshot 사용) ---
+
+def decode_snapshot(body):
+    """바이너리 바이트 → {"version", "epoch", "updated_at", "stocks": 레코드 리스트}"""
+    if body[:4] != MAGIC:
+        raise ValueError("히트맵 바이너리 스냅샷이 아닙니다.")
+    (header_length,) = struct.unpack_from('<I', body, 4)
+    header = json.loads(body[8:8 + header_length].decode('utf-8'))
+    base = 8 + header_length
+
+    def column(name):
+        dtype, offset, size = header["columns"][name]
+        return np.frombuffer(body, dtype=np.dtype(dtype).newbyteorder('<'), count=size, offset=base + offset)
+
+    count, days, width = header["count"], header["days"], header["symbol_width"]
+    symbols = column("symbol").tobytes()
+    sector, market_cap, price = column("sector"), column("market_cap"), column("price")
+    change_rate = column("change_rate") / header["change_rate_scale"]
+    history_len, history = column("history_len"), column("history").reshape(count, days)
+    stocks = [{
+        "symbol": symbols[i * width:(i + 1) * width].decode('ascii').rstrip(),
+        "sector": header["sectors"][sector[i]],
+        "market_cap": int(market_cap[i]),
+        "change_rate": round(float(change_rate[i]), 2),
+        "price": int(price[i]),
+        "name": header["names"][i],
+        "history": history[i, :history_len[i]].tolist(),
+    } for i in range(count)]
+    return {"version": header["version"], "epoch": header.get("epoch"), "updated_at": header["updated_at"], "stocks": stocks}
@@ -0,0 +1,201 @@
+# heatmap_layout.py (히트맵 트리맵 레이아웃: 섹터 → 종목 squarified 배치 / 뷰포트별 캐시 / 변화가 클 때만 재계산)
+
+import math
+from collections import OrderedDict
+
+# heatmap_canvas.html의 d3.treemap() 설정과 동일
+PADDING_INNER = 1.3
+PADDING_OUTER = 5
+PADDING_TOP = 18
+SQUARIFY_RATIO = (1 + math.sqrt(5)) / 2 # d3.treemapSquarify 기본 비율 (황금비)
+
+STANDARD_VIEWPORTS = ((1920, 1080), (1440, 900), (1366, 768), (1280, 720), (390, 844)) # 스냅샷마다 미리 계산
+DEFAULT_THRESHOLD = 0.02 # 시가총액이 레이아웃 기준값 대비 2% 이상 움직이거나 순위가 바뀌면 재배치
+MAX_CACHED_VIEWPORTS = 32
+
+# --- 1. squarified 배치 (d3.treemapSquarify 이식) ---
+
+def squarify(values, x0, y0, x1, y1, ratio=SQUARIFY_RATIO):
+    """
+    values(내림차순 정렬)를 (x0, y0)-(x1, y1) 사각형에 면적 비례로 배치합니다.
+    d3.treemapSquarify와 같은 순서로 행을 나누므로 브라우저에서 계산한 결과와 좌표가 같습니다.
+    반환: values 순서대로 [x0, y0, x1, y1] 리스트
+    """
+    rects = []
+    n = len(values)
+    remaining = sum(values)
+    i0 = i1 = 0
+    while i0 < n:
+        dx, dy = x1 - x0, y1 - y0
+        # 값이 0이 아닌 다음 항목부터 행 시작
+        sum_value = values[i1]; i1 += 1
+        while not sum_value and i1 < n:
+            sum_value = values[i1]; i1 += 1
+        min_value = max_value = sum_value
+        alpha = max(dy / dx, dx / dy) / (remaining * ratio) if dx and dy and remaining else 0
+        beta = sum_value * sum_value * alpha
+        min_ratio = max(max_value / beta, beta / min_value) if beta and min_value else math.inf
+        # 종횡비가 나빠지기 직전까지 같은 행에 추가
+        while i1 < n:
+            value = values[i1]
+            sum_value += value
+            min_value = min(min_value, value); max_value = max(max_value, value)
+            beta = sum_value * sum_value * alpha
+            new_ratio = max(max_value / beta, beta / min_value) if beta and min_value else math.inf
+            if new_ratio > min_ratio:
+                sum_value -= value
+                break
+            min_ratio = new_ratio
+            i1 += 1
+
+        row = values[i0:i1]
+        if dx < dy: # dice: 위쪽 띠를 가로로 나눔
+            y_end = y0 + dy * sum_value / remaining if remaining else y1
+            k = (x1 - x0) / sum_value if sum_value else 0
+            x = x0
+            for value in row:
+                rects.append([x, y0, x + value * k, y_end]); x += value * k
+            y0 = y_end
+        else:       # slice: 왼쪽 띠를 세로로 나눔
+            x_end = x0 + dx * sum_value / remaining if remaining else x1
+            k = (y1 - y0) / sum_value if sum_value else 0
+            y = y0
+            for value in row:
+                rects.append([x0, y, x_end, y + value * k]); y += value * k
+            x0 = x_end
+        remaining -= sum_value
+        i0 = i1
+    return rects
+
+def _shrink(rect, p):
+    """자식 사각형에 paddingInner / 2 적용 (뒤집히면 가운데로 접음)"""
+    x0, y0, x1, y1 = rect[0] + p, rect[1] + p, rect[2] - p, rect[3] - p
+    if x1 < x0: x0 = x1 = (x0 + x1) / 2
+    if y1 < y0: y0 = y1 = (y0 + y1) / 2
+    return [x0, y0, x1, y1]
+
+def tile_children(rect, values):
+    """부모 사각형 안(위쪽은 섹터명 자리)에 자식들을 배치합니다. (d3 treemap의 paddingOuter/Top/Inner 규칙)"""
+    p = PADDING_INNER / 2
+    x0, y0 = rect[0] + PADDING_OUTER - p, rect[1] + PADDING_TOP - p
+    x1, y1 = rect[2] - PADDING_OUTER + p, rect[3] - PADDING_OUTER + p
+    if x1 < x0: x0 = x1 = (x0 + x1) / 2
+    if y1 < y0: y0 = y1 = (y0 + y1) / 2
+    return [_shrink(child, p) for child in squarify(values, x0, y0, x1, y1)]
+
+# --- 2. 섹터 → 종목 계층 ---
+
+def group_by_sector(records):
+    """
+    레코드 → [(섹터명, [(종목, 시가총액), ...]), ...]
+    섹터는 합계 내림차순, 종목은 시가총액 내림차순 (d3 hierarchy.sort와 같은 순서, 동률은 등장 순서)
+    """
+    sectors = {}
+    for record in records:
+        name = record.get("sector") or "N/A"
+        sectors.setdefault('기타' if name == 'N/A' else name, []).append((record["symbol"], record.get("market_cap") or 0))
+    grouped = [(name, sorted(stocks, key=lambda stock: -stock[1])) for name, stocks in sectors.items()]
+    return sorted(grouped, key=lambda sector: -sum(cap for _, cap in sector[1]))
+
+def compute_layout(sector_totals, sector_stocks, width, height):
+    """
+    sector_totals: [(섹터명, 합계)] (배치 순서), sector_stocks: {섹터명: [(종목, 시가총액)]}
+    반환: {"sectors": {섹터명: 사각형}, "stocks": {종목: 사각형}}
+    """
+    root = [0, 0, width, height]
+    sector_rects = tile_children(root, [total for _, total in sector_totals])
+    layout = {"sectors": {}, "stocks": {}}
+    for (name, _), rect in zip(sector_totals, sector_rects):
+        layout["sectors"][name] = rect
+        _tile_sector(layout, name, rect, sector_stocks[name])
+    return layout
+
+def _tile_sector(layout, name, rect, stocks):
+    for (symbol, _), stock_rect in zip(stocks, tile_children(rect, [cap for _, cap in stocks])):
+        layout["stocks"][symbol] = stock_rect
+
+# --- 3. 뷰포트별 캐시 + 증분 재계산 ---
+
+class LayoutCache:
+    """
+    스냅샷의 시가총액으로 계산한 레이아웃을 뷰포트(width, height)별로 캐시합니다.
+    새 스냅샷이 와도 변화가 threshold 미만이면 기존 레이아웃을 그대로 쓰고(색상만 바뀜),
+    - 섹터 순위가 바뀌거나 섹터 합계가 threshold 이상 움직이면: 전체 재계산
+    - 섹터 안의 종목 순위/크기만 바뀌었으면: 해당 섹터 안의 종목만 재배치 (섹터 사각형은 유지)
+    version은 레이아웃이 바뀔 때만 올라갑니다. (클라이언트는 이 값이 바뀌었을 때만 다시 받음)
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, viewports=STANDARD_VIEWPORTS, max_viewports=MAX_CACHED_VIEWPORTS):
+        self.threshold = threshold
+        self.standard_viewports = tuple(viewports)
+        self.max_viewports = max_viewports
+        self.version = 0
+        self.full_recomputes = 0
+        self.partial_recomputes = 0
+        self._sector_totals = [] # 레이아웃 기준값: [(섹터명, 합계)]
+        self._sector_stocks = {} # 레이아웃 기준값: {섹터명: [(종목, 시가총액)]}
+        self._layouts = OrderedDict() # (width, height) -> 레이아웃 (LRU)
+
+    def _moved(self, old, new):
+        return abs(new - old) > self.threshold * abs(old) if old else new != old
+
+    def update(self, records):
+        """새 스냅샷 반영. 반환: 레이아웃이 바뀌었으면 True"""
+        grouped = group_by_sector(records)
+        sector_totals = [(name, sum(cap for _, cap in stocks)) for name, stocks in grouped]
+        sector_stocks = dict(grouped)
+
+        old_totals = dict(self._sector_totals)
+        same_sectors = ([name for name, _ in sector_totals] == [name for name, _ in self._sector_totals]
+                        and all(sorted(symbol for symbol, _ in stocks) == sorted(symbol for symbol, _ in self._sector_stocks[name])
+                                for name, stocks in grouped))
+        if not same_sectors or any(self._moved(old_totals[name], total) for name, total in sector_totals):
+            self._sector_totals, self._sector_stocks = sector_totals, sector_stocks
+            self._layouts.clear()
+            for width, height in self.standard_viewports:
+                self.get(width, height)
+            self.version += 1; self.full_recomputes += 1
+            return True
+
+        changed_sectors = []
+        for name, stocks in grouped:
+            old_stocks = self._sector_stocks[name]
+            old_caps = dict(old_stocks)
+            if ([symbol for symbol, _ in stocks] != [symbol for symbol, _ in old_stocks]
+                    or any(self._moved(old_caps[symbol], cap) for symbol, cap in stocks)):
+                changed_sectors.append(name)
+        if not changed_sectors:
+            return False
+
+        for name in changed_sectors:
+            self._sector_stocks[name] = sector_stocks[name]
+            for layout in self._layouts.values(): # 섹터 사각형은 그대로, 안쪽 종목만 다시 배치
+                _tile_sector(layout, name, layout["sectors"][name], sector_stocks[name])
+        self.version += 1; self.partial_recomputes += 1
+        return True
+
+    def get(self, width, height):
+        """뷰포트 크기의 레이아웃 (없으면 현재 기준값으로 계산 후 캐시)"""
+        key = (width, height)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = compute_layout(self._sector_totals, self._sector_stocks, width, height)
+            self._layouts[key] = layout
+            while len(self._layouts) > self.max_viewports:
+                self._layouts.popitem(last=False)
+        else:
+            self._layouts.move_to_end(key)
+        return layout
+
+    def payload(self, width, height, digits=1):
+        """API 응답용 압축 형식: 사각형은 [이름, x0, y0, x1, y1] 배열 (좌표는 소수 digits자리)"""
+        layout = self.get(width, height)
+        def rows(rects):
+            return [[name] + [round(v, digits) for v in rect] for name, rect in rects.items()]
+        return {"version": self.version, "width": width, "height": height,
+                "sectors": rows(layout["sectors"]), "stocks": rows(layout["stocks"])}
+
+    def stats(self):
+        return {"version": self.version, "cached_viewports": len(self._layouts),
+                "full_recomputes": self.full_recomputes, "partial_recomputes": self.partial_recomputes,
+                "threshold": self.threshold}
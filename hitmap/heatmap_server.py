@@ -0,0 +1,236 @@
+# heatmap_server.py (실시간 히트맵 서버: 스냅샷 메모리 보관 / 주기적 시세 갱신 / 변경 종목만 SSE로 전송)
+#
+#   uvicorn heatmap_server:app --port 8100                       # .env의 KIS 토큰으로 실제 시세 갱신
+#   HEATMAP_SOURCE=mock uvicorn heatmap_server:app --port 8100   # 모의 시세 서버로 오프라인 실행
+#   브라우저: http://localhost:8100/ (heatmap_canvas.html)
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from heatmap_collector import HeatmapCollector, load_universe
+from heatmap_format import BINARY_MIME, FORMAT_BINARY, encode_json, encode_snapshot, gzip_if_accepted, negotiate_format
+from heatmap_layout import LayoutCache
+from heatmap_state import HeatmapState, carry_over_missing
+from sector_stats import compute_sector_stats
+
+# --- 1. 설정 ---
+load_dotenv()
+APP_KEY = os.getenv("KIS_APP_KEY")
+APP_SECRET = os.getenv("KIS_APP_SECRET")
+BASE_URL = os.getenv("KIS_BASE_URL")
+token = os.getenv("KIS_ACCESS_TOKEN")
+
+HITMAP_DIR = os.path.dirname(os.path.abspath(__file__))
+SEED_FILE = os.path.join(HITMAP_DIR, "heatmap_complete_data.json") # 첫 갱신 전까지 보여줄 마지막 스냅샷
+REFRESH_SECONDS = float(os.getenv("HEATMAP_REFRESH_SECONDS", "60"))
+HEARTBEAT_SECONDS = 15
+SOURCE = os.getenv("HEATMAP_SOURCE", "kis" if token else "mock") # kis | mock
+
+def load_seed_records(path=SEED_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 초기 스냅샷 로드 실패 ({path}): {e}")
+        return []
+
+g_state = HeatmapState(load_seed_records())
+g_layouts = LayoutCache(float(os.getenv("HEATMAP_LAYOUT_THRESHOLD", "0.02"))) # ⭐️ [신규] 뷰포트별 트리맵 레이아웃 캐시
+g_layouts.update(g_state.records.values())
+g_stock_dict = load_universe()
+g_sector_stats = {"version": g_state.version, **compute_sector_stats(list(g_state.records.values()))} # ⭐️ [신규] 섹터 요약
+g_encoded_snapshots = {} # (버전, 포맷, 인코딩) -> 본문 (현재 버전만 보관)
+g_refresh_stats = {"refreshes": 0, "failures": 0, "last_duration": None, "last_changes": None, "last_stale": None}
+
+# --- 2. 주기적 갱신 ---
+
+async def refresh_loop(collector):
+    """REFRESH_SECONDS마다 전체 종목 시세를 수집해 스냅샷을 갱신하고 구독자에게 알립니다."""
+    global g_sector_stats
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        try:
+            records = await collector.collect(g_stock_dict)
+            if records:
+                # ⭐️ [수정] 조회에 실패한 종목은 이전 값 유지 (빠진 종목으로 보고 제거/재배치하지 않음)
+                records, stale = carry_over_missing(g_state.records, records, g_stock_dict)
+                g_layouts.update(records) # ⭐️ 알림 전에 갱신 (구독자가 새 레이아웃 버전을 바로 보도록)
+                changes = await g_state.apply(records)
+                # ⭐️ apply와 사이에 await가 없으므로 구독자가 깨어나기 전에 같은 버전의 섹터 요약이 준비됨
+                g_sector_stats = {"version": g_state.version, **compute_sector_stats(records)}
+                g_refresh_stats["refreshes"] += 1
+                g_refresh_stats["last_changes"] = len(changes)
+                g_refresh_stats["last_stale"] = stale
+                g_refresh_stats["last_duration"] = round(loop.time() - started, 2)
+                print(f"✅ 히트맵 갱신 v{g_state.version}: {len(records)}종목 중 {len(changes)}종목 변경, "
+                      f"{stale}종목 이전 값 유지 ({g_refresh_stats['last_duration']}초)")
+        except Exception as e: # 한 번 실패해도 다음 주기에 다시 시도
+            g_refresh_stats["failures"] += 1
+            print(f"❌ 히트맵 갱신 중 오류: {e}")
+        await asyncio.sleep(max(REFRESH_SECONDS - (loop.time() - started), 0))
+
+@asynccontextmanager
+async def lifespan(app):
+    mock = None
+    if SOURCE == "mock":
+        from mock_kis_quotes import MockQuoteServer
+        mock = MockQuoteServer(port=int(os.getenv("HEATMAP_MOCK_PORT", "5090")), rate_limit=1000)
+        collector = HeatmapCollector(mock.start(), "key", "secret", "token", rate_per_sec=500)
+    else:
+        collector = HeatmapCollector(BASE_URL, APP_KEY, APP_SECRET, token)
+    print(f"--- 히트맵 시세 갱신 시작 (source={SOURCE}, {REFRESH_SECONDS:g}초 간격) ---")
+    task = asyncio.create_task(refresh_loop(collector))
+    yield
+    task.cancel()
+    if mock is not None:
+        mock.stop()
+
+# --- 3. FastAPI 앱 ---
+# ⭐️ 스냅샷/레이아웃/섹터를 읽는 핸들러는 모두 async def: 갱신 루프와 같은 이벤트 루프에서 실행되므로
+#    g_state / g_layouts(LRU) / g_encoded_snapshots를 잠금 없이 공유해도 읽는 도중 바뀌지 않음
+#    (일반 def는 스레드 풀에서 돌아 갱신과 동시에 실행됨. 인코딩은 메모리 작업이라 루프에서 해도 짧음)
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["GET"], allow_headers=["*"])
+
+def sse_event(event, version, payload):
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {g_state.cursor(version)}\nevent: {event}\ndata: {data}\n\n"
+
+@app.get('/')
+def index():
+    return FileResponse(os.path.join(HITMAP_DIR, "heatmap_canvas.html"))
+
+@app.get('/d3')
+def index_d3():
+    return FileResponse(os.path.join(HITMAP_DIR, "heatmap_d3.html"))
+
+def encoded_snapshot(fmt, accept_encoding):
+    """현재 버전 스냅샷을 포맷/압축별로 한 번만 인코딩 (접속자가 많아도 갱신 주기당 1번)"""
+    encoding = "gzip" if "gzip" in (accept_encoding or "").lower() else None
+    key = (g_state.version, fmt, encoding)
+    cached = g_encoded_snapshots.get(key)
+    if cached is None:
+        records = list(g_state.records.values())
+        if fmt == FORMAT_BINARY:
+            body = encode_snapshot(records, g_state.version, g_state.updated_at, g_state.epoch)
+        else:
+            body = encode_json(records)
+        cached = gzip_if_accepted(body, accept_encoding)
+        if any(version != g_state.version for version, _, _ in g_encoded_snapshots):
+            g_encoded_snapshots.clear()
+        g_encoded_snapshots[key] = cached
+    return cached
+
+def snapshot_response(request, fmt):
+    etag = f'"{g_state.cursor()}-{fmt}"' # epoch 포함: 재시작 후 같은 버전 번호의 이전 본문과 구별
+    headers = {"ETag": etag, "X-Heatmap-Version": str(g_state.version), "X-Heatmap-Cursor": g_state.cursor(),
+               "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    body, encoding = encoded_snapshot(fmt, request.headers.get('accept-encoding'))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    media_type = BINARY_MIME if fmt == FORMAT_BINARY else "application/json"
+    return Response(body, media_type=media_type, headers=headers)
+
+@app.get('/heatmap_complete_data.json')
+async def snapshot_file(request: Request):
+    """기존 페이지가 읽던 파일 경로 그대로 현재 스냅샷(종목 리스트)을 제공합니다."""
+    return snapshot_response(request, "json")
+
+@app.get('/api/heatmap/snapshot')
+async def snapshot_binary_api(request: Request, format: str = None):
+    """
+    ⭐️ [신규] 스냅샷 (?format=bin 또는 Accept: application/vnd.heatmap.snapshot이면 바이너리, 아니면 JSON 리스트)
+    바이너리 구조는 heatmap_format.py 참고. X-Heatmap-Cursor(epoch-버전)로 SSE를 ?since=커서부터 이어 받으면 됩니다.
+    """
+    return snapshot_response(request, negotiate_format(format, request.headers.get('accept')))
+
+@app.get('/api/heatmap')
+async def snapshot_api():
+    return {**g_state.snapshot(), "layout_version": g_layouts.version}
+
+@app.get('/api/heatmap/sectors')
+async def sectors_api():
+    """ ⭐️ [신규] 섹터별 시총가중 등락률 / 상승·하락 종목 수 / 지수 기여도 / 30일 섹터 추이 (갱신마다 재계산) """
+    return g_sector_stats
+
+@app.get('/api/heatmap/layout')
+async def layout_api(request: Request, width: int, height: int):
+    """
+    ⭐️ [신규] 서버에서 계산한 섹터 → 종목 트리맵 레이아웃 (브라우저는 그리기만 함)
+    sectors/stocks: [이름, x0, y0, x1, y1] 배열. 시가총액 변화가 작으면 버전이 그대로라 304로 끝납니다.
+    """
+    if not (100 <= width <= 8000 and 100 <= height <= 8000):
+        return Response('{"error": "width/height는 100~8000 사이여야 합니다."}', status_code=400, media_type="application/json")
+    etag = f'"layout-{g_layouts.version}-{width}x{height}"'
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    body = json.dumps(g_layouts.payload(width, height), ensure_ascii=False, separators=(',', ':'))
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@app.get('/api/heatmap/stream')
+async def stream_api(request: Request, since: str = None):
+    """
+    ⭐️ 히트맵 변경분 SSE.
+    - since(또는 재접속 시 Last-Event-ID) 커서("epoch-버전") 이후의 변경분만 보내고,
+      기록 범위를 벗어났거나 서버가 재시작되어 epoch가 다르면 전체 스냅샷을 한 번 보냅니다.
+    - 이후에는 갱신될 때마다 바뀐 종목의 바뀐 필드(price, change_rate, market_cap, 일봉은 오늘 봉만 바뀌면 history_head)만 event: delta로 보냅니다.
+    - 트리맵 레이아웃이 바뀌면 event: layout으로 새 레이아웃 버전을 알립니다. (클라이언트가 /api/heatmap/layout 재요청)
+    - 섹터 요약(/api/heatmap/sectors와 같은 내용)은 스냅샷에 포함되고, 갱신될 때마다 event: sectors로 보냅니다.
+    """
+    # 재접속 시 EventSource는 처음 URL(?since=)을 그대로 쓰므로 더 최신인 Last-Event-ID를 우선
+    since = g_state.parse_cursor(request.headers.get('last-event-id') or since)
+
+    def full_snapshot():
+        return {**g_state.snapshot(), "layout_version": g_layouts.version, "sectors": g_sector_stats}
+
+    async def stream_deltas():
+        version = since
+        layout_version = sectors_version = None
+        deltas = g_state.deltas_since(version) if version is not None else None
+        if deltas is None:
+            snapshot = full_snapshot()
+            version, layout_version, sectors_version = snapshot["version"], snapshot["layout_version"], snapshot["sectors"]["version"]
+            yield sse_event("snapshot", version, snapshot)
+            deltas = []
+        while True:
+            for delta_version, changes in deltas:
+                yield sse_event("delta", delta_version, {"version": delta_version, "changes": changes})
+                version = delta_version
+            if g_layouts.version != layout_version:
+                layout_version = g_layouts.version
+                yield sse_event("layout", version, {"layout_version": layout_version})
+            if g_sector_stats["version"] != sectors_version:
+                sectors_version = g_sector_stats["version"]
+                yield sse_event("sectors", version, g_sector_stats)
+            if not await g_state.wait_for_version(version, HEARTBEAT_SECONDS):
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n" # ⭐️ 프록시 타임아웃 방지
+            deltas = g_state.deltas_since(version)
+            if deltas is None: # 너무 뒤처진 구독자는 전체 스냅샷부터 다시
+                snapshot = full_snapshot()
+                version, layout_version, sectors_version = snapshot["version"], snapshot["layout_version"], snapshot["sectors"]["version"]
+                yield sse_event("snapshot", version, snapshot)
+                deltas = []
+
+    return StreamingResponse(stream_deltas(), media_type='text/event-stream',
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get('/api/heatmap/stats')
+async def stats_api():
+    return {"source": SOURCE, "version": g_state.version, "symbols": len(g_state.records),
+            "refresh_seconds": REFRESH_SECONDS, **g_refresh_stats, "layout": g_layouts.stats()}
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=8100)
@@ -0,0 +1,116 @@
+# heatmap_state.py (메모리 히트맵 스냅샷: 버전 관리 / 변경 종목 추출 / 구독자 알림)
+
+import asyncio
+import time
+import uuid
+from collections import deque
+
+MAX_DELTA_LOG = 120 # 재접속 클라이언트에게 이어서 보내줄 수 있는 최근 버전 수
+
+def diff_snapshots(old_records, new_records):
+    """
+    {종목: 레코드} 두 개를 비교해 변경분 리스트를 만듭니다.
+    - 값이 바뀐 종목: {"symbol", 바뀐 필드만} (price/change_rate/market_cap 외에 name/sector 등 어떤 필드든)
+      일봉은 오늘 봉만 바뀌었으면 "history_head"(맨 앞 값)만, 날짜가 넘어가는 등 나머지도 바뀌었으면 "history" 전체
+    - 새 종목: 레코드 전체 + "added": True / 빠진 종목: {"symbol", "removed": True}
+    """
+    changes = []
+    for symbol, record in new_records.items():
+        old = old_records.get(symbol)
+        if old is None:
+            changes.append({**record, "added": True})
+            continue
+        fields = list(record) + [field for field in old if field not in record]
+        changed = {field: record.get(field) for field in fields
+                   if field not in ("symbol", "history") and record.get(field) != old.get(field)}
+        history, old_history = record.get("history") or [], old.get("history") or []
+        if history != old_history:
+            if len(history) == len(old_history) and history[1:] == old_history[1:]:
+                changed["history_head"] = history[0]
+            else:
+                changed["history"] = history
+        if changed:
+            changes.append({"symbol": symbol, **changed})
+    changes.extend({"symbol": symbol, "removed": True} for symbol in old_records if symbol not in new_records)
+    return changes
+
+def carry_over_missing(old_records, new_records, universe):
+    """
+    ⭐️ 이번 수집에서 빠진 종목(현재가 조회 실패)은 이전 레코드를 그대로 유지합니다.
+    유니버스에서 빠진 종목만 사라지므로, 일시적인 조회 실패가 "removed" 변경분과 레이아웃 재계산을 만들지 않습니다.
+    universe: 종목코드 목록 (이 순서로 반환). 반환: (레코드 리스트, 이전 레코드를 유지한 종목 수)
+    """
+    fresh = {record["symbol"]: record for record in new_records}
+    records, kept = [], 0
+    for symbol in universe:
+        symbol = symbol.zfill(6)
+        record = fresh.get(symbol)
+        if record is None:
+            record = old_records.get(symbol)
+            if record is None: # 이전에도 없던 종목
+                continue
+            kept += 1
+        records.append(record)
+    return records, kept
+
+class HeatmapState:
+    """
+    최신 스냅샷을 메모리에 보관하고, 갱신될 때마다 버전을 올려 변경분을 기록합니다.
+    구독자는 wait_for_version()으로 다음 버전을 기다렸다가 deltas_since()로 변경분만 받아 갑니다.
+    (단일 이벤트 루프 기준)
+    ⭐️ epoch: 서버 프로세스마다 새로 정하는 id. 재시작하면 버전이 처음부터 다시 시작하므로,
+       구독 위치는 버전 대신 "epoch-버전" 커서로 주고받아 다른 프로세스의 버전과 섞이지 않게 합니다.
+    """
+
+    def __init__(self, records=(), max_delta_log=MAX_DELTA_LOG):
+        self.records = {record["symbol"]: record for record in records}
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self.updated_at = time.time()
+        self._log = deque(maxlen=max_delta_log) # (버전, 변경분)
+        self._changed = asyncio.Condition()
+
+    def snapshot(self):
+        return {"version": self.version, "epoch": self.epoch, "cursor": self.cursor(),
+                "updated_at": self.updated_at, "stocks": list(self.records.values())}
+
+    def cursor(self, version=None):
+        """SSE 이벤트 id / ?since= 값: "epoch-버전" """
+        return f"{self.epoch}-{self.version if version is None else version}"
+
+    def parse_cursor(self, cursor):
+        """커서 → 버전. 다른 epoch(재시작 전 서버)이거나 형식이 틀리면 None (전체 스냅샷부터 보내야 함)"""
+        epoch, _, version = (cursor or "").rpartition("-")
+        return int(version) if epoch == self.epoch and version.isdigit() else None
+
+    async def apply(self, new_records):
+        """수집 결과로 스냅샷을 교체합니다. 반환: 변경분 (없으면 버전을 올리지 않음)"""
+        new_records = {record["symbol"]: record for record in new_records}
+        changes = diff_snapshots(self.records, new_records)
+        # ⭐️ 잠금을 얻은 뒤(대기로 양보할 수 있는 지점 이후) 레코드와 버전을 한 번에 교체:
+        #    같은 루프의 핸들러가 새 레코드를 이전 버전 번호로 읽는 일이 없도록
+        async with self._changed:
+            self.records = new_records
+            self.updated_at = time.time()
+            if changes:
+                self.version += 1
+                self._log.append((self.version, changes))
+                self._changed.notify_all()
+        return changes
+
+    def deltas_since(self, version):
+        """version 이후의 [(버전, 변경분), ...]. 기록 범위를 벗어났으면 None (전체 스냅샷을 다시 보내야 함)"""
+        if version == self.version:
+            return []
+        if version > self.version or not self._log or version < self._log[0][0] - 1:
+            return None
+        return [(v, changes) for v, changes in self._log if v > version]
+
+    async def wait_for_version(self, version, timeout):
+        """버전이 version보다 커질 때까지 최대 timeout초 대기. 반환: 새 버전이 있으면 True"""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self.version > version), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
@@ -0,0 +1,152 @@
+# mock_kis_quotes.py (오프라인 벤치마크용 한투 시세 API 모의 서버: 현재가 / 일봉 조회)
+#
+#   python mock_kis_quotes.py                 # 모의 서버 실행 (http://127.0.0.1:5090)
+#   python mock_kis_quotes.py --bench         # 모의 서버 + 비동기 수집기로 스냅샷 1회 수집 시간 측정
+#   python mock_kis_quotes.py --bench --rate 20 --quota 20 --latency 0.08 --errors 0.05
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from heatmap_collector import KST, HISTORY_PATH, PRICE_PATH, RATE_LIMIT_MSG_CD, HeatmapCollector
+
+SEED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "heatmap_complete_data.json")
+DEFAULT_PORT = 5090
+
+def recent_business_days(count):
+    """오늘(평일이면 포함)부터 거슬러 올라간 평일 count개 (YYYYMMDD, 최신순. 공휴일은 고려하지 않음)"""
+    day = datetime.now(KST).date()
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.strftime("%Y%m%d"))
+        day -= timedelta(days=1)
+    return days
+
+class MockQuoteServer:
+    """
+    heatmap_complete_data.json을 시드로 두 조회 API를 흉내 냅니다.
+    - latency: 응답 지연(초), rate_limit: 초당 허용 호출 수(초과 시 EGW00201), error_rate: 임의 HTTP 503 비율
+    """
+
+    def __init__(self, port=DEFAULT_PORT, latency=0.05, rate_limit=20, error_rate=0.0, seed_file=SEED_FILE):
+        with open(seed_file, encoding='utf-8') as f:
+            self.stocks = {stock['symbol']: stock for stock in json.load(f)}
+        self.port = port
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.calls = {PRICE_PATH: 0, HISTORY_PATH: 0}
+        self.rate_limited = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _over_limit(self):
+        """직전 1초 동안의 호출 수가 한도를 넘으면 True"""
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                self.rate_limited += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def respond(self, path, symbol):
+        """(HTTP 상태, 응답 본문)"""
+        if self._over_limit():
+            return 500, {"rt_cd": "1", "msg_cd": RATE_LIMIT_MSG_CD, "msg1": "초당 거래건수를 초과하였습니다."}
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            return 503, {}
+        stock = self.stocks.get(symbol)
+        if stock is None or path not in self.calls:
+            return 200, {"rt_cd": "1", "msg_cd": "MOCK404", "msg1": f"조회할 자료가 없습니다. ({symbol})"}
+        with self._lock:
+            self.calls[path] += 1
+        drift = 1 + random.uniform(-0.01, 0.01) # 수집할 때마다 조금씩 다른 현재가
+        price = int(stock['price'] * drift)
+        if path == PRICE_PATH:
+            return 200, {"rt_cd": "0", "output": {
+                "stck_prpr": str(price), "prdy_ctrt": f"{stock['change_rate'] + (drift - 1) * 100:.2f}",
+                "hts_avls": str(stock['market_cap'] // 100_000_000), "bstp_kor_isnm": stock['sector'],
+            }}
+        history = [price] + stock['history'][1:]
+        return 200, {"rt_cd": "0", "output": [{"stck_bsop_date": day, "stck_clpr": str(close)}
+                                              for day, close in zip(recent_business_days(len(history)), history)]}
+
+    def start(self):
+        """백그라운드 스레드에서 서버를 시작하고 base_url을 반환합니다."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive (수집기의 연결 재사용 확인용)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key.lower(): values[0] for key, values in parse_qs(url.query).items()}
+                status, body = mock.respond(url.path, query.get("fid_input_iscd", ""))
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.port = self._server.server_address[1] # port=0이면 OS가 고른 빈 포트
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+def _option(name, default):
+    return type(default)(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+def run_benchmark(rate_per_sec, latency, quota=20, error_rate=0.0, rounds=2):
+    """모의 서버로 스냅샷을 rounds회 수집하고 소요 시간을 출력합니다. (2회차부터는 일봉 캐시 사용)"""
+    import asyncio
+
+    mock = MockQuoteServer(latency=latency, rate_limit=quota, error_rate=error_rate)
+    base_url = mock.start()
+    stock_dict = {symbol: stock['name'] for symbol, stock in mock.stocks.items()}
+    collector = HeatmapCollector(base_url, "key", "secret", "token", rate_per_sec=rate_per_sec)
+    try:
+        for i in range(rounds):
+            sent_before = collector.requests_sent
+            started = time.perf_counter()
+            snapshot = asyncio.run(collector.collect(stock_dict))
+            elapsed = time.perf_counter() - started
+            print(f"[{i + 1}회차] {len(snapshot)}/{len(stock_dict)}종목, 요청 {collector.requests_sent - sent_before}건, "
+                  f"{elapsed:.2f}초 (한도 초과 응답 누적 {mock.rate_limited}건)")
+    finally:
+        mock.stop()
+
+if __name__ == "__main__":
+    latency = _option("--latency", 0.05)
+    if "--bench" in sys.argv:
+        run_benchmark(_option("--rate", 18.0), latency, _option("--quota", 20), _option("--errors", 0.0))
+    else:
+        mock = MockQuoteServer(port=_option("--port", DEFAULT_PORT), latency=latency,
+                               rate_limit=_option("--quota", 20), error_rate=_option("--errors", 0.0))
+        print(f"모의 시세 서버 실행 중: {mock.start()} (Ctrl+C로 종료)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            mock.stop()
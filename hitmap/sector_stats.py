@@ -0,0 +1,101 @@
+# sector_stats.py (히트맵 유니버스 섹터 집계: 시총가중 섹터 수익률 / 상승·하락 종목 수 / 지수 기여도 / 30일 섹터 추이)
+
+import numpy as np
+
+SPARKLINE_BASE = 100.0 # 섹터 추이는 첫날(가장 오래된 날) = 100으로 환산
+
+def records_to_columns(records):
+    """스냅샷 레코드 리스트 → 종목 축 numpy 컬럼 (일봉은 종목 × 일 행렬, 최신순, 빈 칸은 0)"""
+    count = len(records)
+    history_len = np.array([len(record.get("history") or []) for record in records], dtype=int)
+    days = int(history_len.max()) if count else 0
+    history = np.zeros((count, days))
+    for i, record in enumerate(records):
+        history[i, :history_len[i]] = record.get("history") or []
+    sectors = [record.get("sector") or "N/A" for record in records]
+    return {
+        "sector": np.array(['기타' if name == 'N/A' else name for name in sectors], dtype=object),
+        "market_cap": np.array([record.get("market_cap") or 0 for record in records], dtype=float),
+        "change_rate": np.array([record.get("change_rate") or 0.0 for record in records], dtype=float),
+        "price": np.array([record.get("price") or 0 for record in records], dtype=float),
+        "history": history,
+        "history_len": history_len,
+    }
+
+def _normalize(series):
+    """각 행을 첫 값 = SPARKLINE_BASE로 환산 (첫 값이 0이면 빈 추이)"""
+    base = series[:, :1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(base > 0, series / base * SPARKLINE_BASE, np.nan)
+
+def compute_sector_stats(records, digits=2):
+    """
+    ⭐️ 종목 축 연산만으로(섹터별 루프 없이) 섹터/전체 통계를 계산합니다.
+    - change_rate: 전일 시가총액 가중 등락률(%) = Σ(전일 시총 × 등락률) / Σ 전일 시총
+    - contribution: 전체 등락률에 대한 섹터 기여도(%p). 모든 섹터의 합 = 전체 등락률
+    - advancers / decliners / unchanged: 상승 / 하락 / 보합 종목 수
+    - sparkline: 최근 일봉으로 만든 시총가중 섹터 지수 (과거 → 오늘, 첫날 = 100)
+      현재 시가총액 / 현재가로 구한 주식 수를 고정하고, 모든 종목에 공통으로 있는 최근 구간(가장 짧은 일봉 길이)만 사용
+      ⭐️ [수정] 일봉 길이가 다른 종목이 섞여도 빠지는 종목이 없도록 (일봉이 없는 종목만 제외)
+    반환: {"index": 전체 통계, "sectors": [섹터 통계, ...] (시가총액 내림차순)}
+    """
+    columns = records_to_columns(records)
+    if not len(columns["sector"]):
+        return {"index": None, "sectors": []}
+
+    names, codes = np.unique(columns["sector"].astype(str), return_inverse=True)
+    k = len(names)
+    def by_sector(weights):
+        return np.bincount(codes, weights=weights, minlength=k)
+
+    cap = columns["market_cap"]
+    rate = columns["change_rate"] / 100
+    prev_cap = cap / (1 + rate) # 전일 시가총액 (가격제한폭 ±30%라 분모가 0이 되지 않음)
+    move = cap - prev_cap       # 시가총액 변화 = 전일 시총 × 등락률
+
+    sector_cap, sector_prev, sector_move = by_sector(cap), by_sector(prev_cap), by_sector(move)
+    count = np.bincount(codes, minlength=k)
+    advancers = np.bincount(codes, weights=rate > 0, minlength=k).astype(int)
+    decliners = np.bincount(codes, weights=rate < 0, minlength=k).astype(int)
+    total_prev = sector_prev.sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sector_rate = np.where(sector_prev > 0, sector_move / sector_prev * 100, 0.0)
+    contribution = sector_move / total_prev * 100 if total_prev else np.zeros(k)
+
+    # 섹터 추이: (섹터 × 종목) 원-핫 행렬 @ (종목 × 일) 시가총액 행렬
+    usable = (columns["history_len"] > 0) & (columns["price"] > 0)
+    days = int(columns["history_len"][usable].min()) if usable.any() else 0 # 공통 최근 구간 (일봉은 최신순)
+    shares = np.where(usable, cap / np.where(columns["price"] > 0, columns["price"], 1), 0.0)
+    daily_cap = columns["history"][:, :days][:, ::-1] * shares[:, None] # 과거 → 오늘
+    membership = np.zeros((k, len(codes)))
+    membership[codes, np.arange(len(codes))] = 1
+    sector_lines = _normalize(membership @ daily_cap) if days else np.zeros((k, 0))
+    index_line = _normalize(daily_cap.sum(axis=0, keepdims=True))[0] if days else np.zeros(0)
+
+    def line(values):
+        return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+    total_cap = sector_cap.sum()
+    sectors = [{
+        "sector": str(names[i]),
+        "count": int(count[i]),
+        "market_cap": int(sector_cap[i]),
+        "weight": round(float(sector_cap[i] / total_cap * 100), digits) if total_cap else 0.0,
+        "change_rate": round(float(sector_rate[i]), digits),
+        "contribution": round(float(contribution[i]), digits + 1),
+        "advancers": int(advancers[i]),
+        "decliners": int(decliners[i]),
+        "unchanged": int(count[i] - advancers[i] - decliners[i]),
+        "sparkline": line(sector_lines[i]),
+    } for i in np.argsort(-sector_cap, kind='stable')]
+
+    index = {
+        "count": int(count.sum()),
+        "market_cap": int(total_cap),
+        "change_rate": round(float(sector_move.sum() / total_prev * 100), digits) if total_prev else 0.0,
+        "advancers": int(advancers.sum()),
+        "decliners": int(decliners.sum()),
+        "unchanged": int(count.sum() - advancers.sum() - decliners.sum()),
+        "sparkline": line(index_line),
+    }
+    return {"index": index, "sectors": sectors}
@@ -0,0 +1,7 @@
+# conftest.py (hitmap 모듈은 같은 폴더 기준 import를 사용하므로 상위 폴더를 경로에 추가)
+
+import os
+import sys
+
+HITMAP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HITMAP_DIR)
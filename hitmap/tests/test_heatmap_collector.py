@@ -0,0 +1,56 @@
+# test_heatmap_collector.py (히트맵 비동기 수집기: 응답 가공 / 모의 서버 수집 / 일봉 캐시)
+
+import asyncio
+import json
+
+import pytest
+
+from heatmap_collector import HISTORY_PATH, PRICE_PATH, HeatmapCollector, merge_today_close, parse_history_output
+from mock_kis_quotes import SEED_FILE, MockQuoteServer
+
+def test_parse_history_output_skips_rows_without_close():
+    output = [{"stck_bsop_date": "20240103", "stck_clpr": "1,200"}, {"stck_bsop_date": "20240102", "stck_clpr": ""},
+              {"stck_bsop_date": "20240101", "stck_clpr": "1100"}]
+    assert parse_history_output(output) == [("20240103", 1200), ("20240101", 1100)]
+    assert parse_history_output(None) == []
+
+def test_merge_today_close_only_updates_today():
+    history = [("20240103", 1200), ("20240102", 1100)]
+    assert merge_today_close(history, "20240103", 1300) == [("20240103", 1300), ("20240102", 1100)]
+    assert merge_today_close(history, "20240104", 1300) is None # 장 시작 전: 전일 종가를 덮어쓰지 않음
+    assert merge_today_close([], "20240104", 1300) is None
+
+@pytest.fixture
+def mock_server(tmp_path):
+    with open(SEED_FILE, encoding='utf-8') as f:
+        seed = json.load(f)[:5]
+    seed_file = tmp_path / "seed.json"
+    seed_file.write_text(json.dumps(seed, ensure_ascii=False), encoding='utf-8')
+    mock = MockQuoteServer(port=0, latency=0, rate_limit=10_000, seed_file=str(seed_file))
+    mock.start()
+    yield mock
+    mock.stop()
+
+def test_collect_snapshot_and_reuse_history(mock_server):
+    stock_dict = {symbol: stock['name'] for symbol, stock in mock_server.stocks.items()}
+    stock_dict['999999'] = '없는 종목'
+    collector = HeatmapCollector(f"http://127.0.0.1:{mock_server.port}", "key", "secret", "token", rate_per_sec=1000)
+
+    snapshot = asyncio.run(collector.collect(stock_dict))
+    assert [stock['symbol'] for stock in snapshot] == list(mock_server.stocks) # 실패한 종목은 제외, 순서 유지
+    for stock in snapshot:
+        seed = mock_server.stocks[stock['symbol']]
+        assert set(stock) == set(seed)
+        assert stock['name'] == seed['name'] and stock['history'][1:] == seed['history'][1:]
+    assert mock_server.calls[HISTORY_PATH] == 5
+
+    asyncio.run(collector.collect(stock_dict)) # 2회차: 캐시된 일봉 재사용 (현재가만 조회)
+    assert mock_server.calls == {PRICE_PATH: 10, HISTORY_PATH: 5}
+
+def test_stale_cached_history_is_refetched(mock_server):
+    symbol = next(iter(mock_server.stocks))
+    collector = HeatmapCollector(f"http://127.0.0.1:{mock_server.port}", "key", "secret", "token", rate_per_sec=1000,
+                                 history_cache={symbol: (None, [("19990104", 1)])})
+    snapshot = asyncio.run(collector.collect({symbol: "종목"}))
+    assert mock_server.calls[HISTORY_PATH] == 1
+    assert snapshot[0]['history'][1:] == mock_server.stocks[symbol]['history'][1:]
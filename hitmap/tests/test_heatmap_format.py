@@ -0,0 +1,79 @@
+# test_heatmap_format.py (HMB1 바이너리 스냅샷 인코딩 ↔ 디코딩 왕복)
+
+import gzip
+import json
+import struct
+
+import pytest
+
+from heatmap_format import (
+    BINARY_MIME, FORMAT_BINARY, FORMAT_JSON, MAGIC, MIN_COMPRESS_BYTES, decode_snapshot, encode_json, encode_snapshot,
+    gzip_if_accepted, negotiate_format,
+)
+
+RECORDS = [
+    {"symbol": "005930", "name": "삼성전자", "sector": "전기전자", "market_cap": 589_000_000_000_000,
+     "change_rate": -1.23, "price": 98_700, "history": [98_700, 99_900, 97_100]},
+    {"symbol": "000660", "name": "SK하이닉스", "sector": "전기전자", "market_cap": 412_345_678_901_234,
+     "change_rate": 4.56, "price": 566_000, "history": [566_000, 541_300]},
+    {"symbol": "035420", "name": "NAVER", "sector": "서비스업", "market_cap": 41_000_000_000_000,
+     "change_rate": 0.0, "price": 252_500, "history": []},
+]
+
+def test_round_trip_keeps_records_and_header():
+    body = encode_snapshot(RECORDS, version=42, updated_at="2025-11-03 15:30:00", epoch="a1b2c3d4")
+    snapshot = decode_snapshot(body)
+    assert snapshot["version"] == 42
+    assert snapshot["epoch"] == "a1b2c3d4"
+    assert snapshot["updated_at"] == "2025-11-03 15:30:00"
+    assert snapshot["stocks"] == [{key: record[key] for key in snapshot["stocks"][0]} for record in RECORDS]
+
+def test_columns_start_on_8_byte_boundaries():
+    body = encode_snapshot(RECORDS, version=1)
+    assert body[:4] == MAGIC
+    (header_length,) = struct.unpack_from('<I', body, 4)
+    assert (8 + header_length) % 8 == 0
+    header = json.loads(body[8:8 + header_length])
+    assert all(offset % 8 == 0 for _, offset, _ in header["columns"].values())
+    assert header["days"] == 3 and header["count"] == len(RECORDS)
+
+def test_round_trip_empty_snapshot():
+    snapshot = decode_snapshot(encode_snapshot([], version=0))
+    assert snapshot["stocks"] == [] and snapshot["epoch"] is None
+
+def test_change_rate_rounds_to_scale():
+    record = dict(RECORDS[0], change_rate=1.005001)
+    assert decode_snapshot(encode_snapshot([record]))["stocks"][0]["change_rate"] == 1.01
+
+def test_decode_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        decode_snapshot(encode_json(RECORDS))
+
+def test_gzip_is_deterministic():
+    body = encode_snapshot(RECORDS * 20, version=3)
+    assert len(body) >= MIN_COMPRESS_BYTES
+    first, encoding = gzip_if_accepted(body, "gzip, deflate")
+    second, _ = gzip_if_accepted(body, "gzip, deflate")
+    assert encoding == "gzip" and first == second
+    assert gzip.decompress(first) == body
+    assert gzip_if_accepted(body, "identity") == (body, None)
+
+def test_negotiate_format():
+    assert negotiate_format("bin", None) == FORMAT_BINARY
+    assert negotiate_format("json", BINARY_MIME) == FORMAT_JSON # 쿼리가 Accept보다 우선
+    assert negotiate_format(None, f"{BINARY_MIME}, application/json") == FORMAT_BINARY
+    assert negotiate_format(None, "*/*") == FORMAT_JSON
+
+def test_snapshot_endpoint_serves_both_formats_with_etag():
+    from fastapi.testclient import TestClient
+    import heatmap_server
+
+    client = TestClient(heatmap_server.app) # lifespan(갱신 루프)은 시작하지 않음
+    res = client.get('/api/heatmap/snapshot', headers={"Accept": BINARY_MIME})
+    assert res.headers["content-type"] == BINARY_MIME
+    snapshot = decode_snapshot(res.content)
+    assert snapshot["epoch"] == heatmap_server.g_state.epoch
+    assert len(snapshot["stocks"]) == len(heatmap_server.g_state.records)
+    assert client.get('/api/heatmap/snapshot?format=bin', headers={"If-None-Match": res.headers["etag"]}).status_code == 304
+    assert client.get('/api/heatmap/snapshot', headers={"If-None-Match": res.headers["etag"]}).status_code == 200 # JSON은 다른 ETag
+    assert client.get('/heatmap_complete_data.json').json() == list(heatmap_server.g_state.records.values())
@@ -0,0 +1,66 @@
+# test_heatmap_layout.py (트리맵 레이아웃: squarified 배치 / 섹터 정렬 / 뷰포트 캐시 / 부분·전체 재계산)
+
+import pytest
+
+from heatmap_layout import LayoutCache, group_by_sector, squarify
+
+def area(rect):
+    return (rect[2] - rect[0]) * (rect[3] - rect[1])
+
+@pytest.mark.parametrize("values", [[50, 30, 10, 6, 4], [1, 1, 1, 1], [90, 5, 3, 2, 0]])
+def test_squarify_areas_are_proportional_and_fill_rect(values):
+    rects = squarify(values, 0, 0, 300, 200)
+    assert len(rects) == len(values)
+    total = sum(values)
+    for value, rect in zip(values, rects):
+        assert area(rect) == pytest.approx(300 * 200 * value / total)
+        assert 0 <= rect[0] <= rect[2] <= 300 and 0 <= rect[1] <= rect[3] <= 200
+    assert sum(area(rect) for rect in rects) == pytest.approx(300 * 200)
+
+def stock(symbol, sector, cap):
+    return {"symbol": symbol, "sector": sector, "market_cap": cap}
+
+RECORDS = [stock("A1", "반도체", 500), stock("A2", "반도체", 300), stock("B1", "금융", 200),
+           stock("B2", "금융", 150), stock("C1", "N/A", 10)]
+
+def test_group_by_sector_orders_by_total():
+    grouped = group_by_sector(RECORDS)
+    assert [name for name, _ in grouped] == ["반도체", "금융", "기타"]
+    assert grouped[1][1] == [("B1", 200), ("B2", 150)]
+
+def with_caps(**caps):
+    return [{**record, "market_cap": caps.get(record["symbol"], record["market_cap"])} for record in RECORDS]
+
+def test_small_moves_keep_layout():
+    cache = LayoutCache(threshold=0.02, viewports=[(800, 600)])
+    assert cache.update(RECORDS) and cache.version == 1
+    assert not cache.update(with_caps(A1=505)) # 1% 변화
+    assert cache.version == 1 and cache.stats()["full_recomputes"] == 1
+
+def test_stock_move_within_sector_retiles_only_that_sector():
+    cache = LayoutCache(threshold=0.02, viewports=[(800, 600)])
+    cache.update(RECORDS)
+    before = {kind: {key: list(rect) for key, rect in rects.items()} for kind, rects in cache.get(800, 600).items()}
+    assert cache.update(with_caps(B1=150, B2=200)) # 금융 합계는 그대로, 섹터 안에서 순위만 바뀜
+    layout = cache.get(800, 600)
+    assert cache.stats()["partial_recomputes"] == 1 and cache.version == 2
+    assert layout["sectors"] == before["sectors"]
+    assert layout["stocks"]["A1"] == before["stocks"]["A1"]
+    assert layout["stocks"]["B2"] == before["stocks"]["B1"] # 큰 종목 자리를 차지
+
+def test_sector_total_move_recomputes_everything():
+    cache = LayoutCache(threshold=0.02, viewports=[(800, 600)])
+    cache.update(RECORDS)
+    assert cache.update(with_caps(B2=190)) # 금융 합계 +11%
+    assert cache.stats()["full_recomputes"] == 2 and cache.stats()["partial_recomputes"] == 0
+    assert cache.update(RECORDS[:-1]) # 섹터가 빠짐
+    assert "기타" not in cache.get(800, 600)["sectors"]
+
+def test_viewport_cache_is_lru_and_payload_is_compact():
+    cache = LayoutCache(viewports=[], max_viewports=2)
+    cache.update(RECORDS)
+    for size in [(400, 300), (500, 300), (600, 300)]:
+        cache.get(*size)
+    assert list(cache._layouts) == [(500, 300), (600, 300)]
+    payload = cache.payload(600, 300)
+    assert payload["version"] == 1 and payload["stocks"][0][0] == "A1" and len(payload["stocks"][0]) == 5
@@ -0,0 +1,79 @@
+# test_heatmap_state.py (히트맵 스냅샷 상태: 변경분 추출 / 커서 / 조회 실패 종목 유지 / 갱신 루프)
+
+import asyncio
+
+import pytest
+
+import heatmap_server
+from heatmap_layout import LayoutCache
+from heatmap_state import HeatmapState, carry_over_missing, diff_snapshots
+
+def stock(symbol, price=100, history=(100, 99, 98), **fields):
+    return {"symbol": symbol, "sector": "전기·전자", "market_cap": price * 1_000_000, "change_rate": 0.5,
+            "price": price, "name": symbol, "history": list(history), **fields}
+
+def by_symbol(*records):
+    return {record["symbol"]: record for record in records}
+
+def test_diff_snapshots_reports_changed_fields_only():
+    old = by_symbol(stock("000001"), stock("000002"), stock("000003"))
+    new = by_symbol(stock("000001", price=101, history=(101, 99, 98)), stock("000002", history=(97, 96, 95)),
+                    stock("000004"))
+    changes = {change["symbol"]: change for change in diff_snapshots(old, new)}
+    assert changes["000001"] == {"symbol": "000001", "market_cap": 101_000_000, "price": 101, "history_head": 101}
+    assert changes["000002"] == {"symbol": "000002", "history": [97, 96, 95]}
+    assert changes["000003"] == {"symbol": "000003", "removed": True}
+    assert changes["000004"]["added"] is True
+
+def test_cursor_round_trip_and_deltas():
+    state = HeatmapState([stock("000001")], max_delta_log=2)
+
+    async def run():
+        for price in (101, 102, 103):
+            await state.apply([stock("000001", price=price)])
+        assert await state.apply([stock("000001", price=103)]) == [] # 변경 없으면 버전 유지
+
+    asyncio.run(run())
+    assert state.version == 3
+    assert state.parse_cursor(state.cursor(2)) == 2
+    assert state.parse_cursor("otherepoch-2") is None and state.parse_cursor("garbage") is None
+    assert [v for v, _ in state.deltas_since(1)] == [2, 3]
+    assert state.deltas_since(0) is None # 기록 범위 밖 → 전체 스냅샷
+    assert state.deltas_since(3) == [] and state.deltas_since(4) is None
+
+def test_carry_over_keeps_failed_symbols_and_drops_left_universe():
+    old = by_symbol(stock("000001"), stock("000002"), stock("000009"))
+    records, kept = carry_over_missing(old, [stock("000001", price=105)], ["1", "000002", "000003"])
+    assert [record["symbol"] for record in records] == ["000001", "000002"]
+    assert records[0]["price"] == 105 and records[1] is old["000002"] and kept == 1
+
+class PartialCollector:
+    """첫 종목만 시세를 받고 나머지는 조회에 실패한 것처럼 반환"""
+
+    def __init__(self, records):
+        self.records = records
+
+    async def collect(self, stock_dict):
+        return [{**self.records[0], "price": self.records[0]["price"] + 1}]
+
+def test_refresh_loop_does_not_remove_failed_symbols(monkeypatch):
+    records = [stock("000001"), stock("000002"), stock("000003")]
+    state = HeatmapState(records)
+    layouts = LayoutCache(0.02)
+    layouts.update(records)
+    layout_version = layouts.version
+    monkeypatch.setattr(heatmap_server, "g_state", state)
+    monkeypatch.setattr(heatmap_server, "g_layouts", layouts)
+    monkeypatch.setattr(heatmap_server, "g_stock_dict", {"000001": "a", "000002": "b", "000003": "c"})
+    monkeypatch.setattr(heatmap_server, "g_refresh_stats", dict(heatmap_server.g_refresh_stats))
+    monkeypatch.setattr(heatmap_server, "g_sector_stats", heatmap_server.g_sector_stats) # 갱신 루프가 교체하므로 복원용
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(heatmap_server.refresh_loop(PartialCollector(records)), 0.2)
+
+    asyncio.run(run())
+    assert list(state.records) == ["000001", "000002", "000003"]
+    assert state.deltas_since(0) == [(1, [{"symbol": "000001", "price": 101}])]
+    assert layouts.version == layout_version
+    assert heatmap_server.g_refresh_stats["last_stale"] == 2
@@ -0,0 +1,50 @@
+# test_sector_stats.py (섹터 집계: 시총가중 등락률 / 기여도 / 상승·하락 수 / 섹터 추이의 공통 구간)
+
+import pytest
+
+from sector_stats import compute_sector_stats
+
+def stock(symbol, sector, price, change_rate, history, shares=1_000):
+    return {"symbol": symbol, "sector": sector, "price": price, "change_rate": change_rate,
+            "market_cap": price * shares, "history": history}
+
+RECORDS = [
+    stock("A1", "반도체", 110, 10.0, [110, 100, 90]),
+    stock("A2", "반도체", 50, -2.0, [50, 51, 52], shares=2_000),
+    stock("B1", "금융", 20, 0.0, [20, 20, 10]),
+    stock("C1", "N/A", 10, 5.0, [10, 8, 8]),
+]
+
+def test_weighted_rates_counts_and_contribution():
+    stats = compute_sector_stats(RECORDS)
+    sectors = {sector["sector"]: sector for sector in stats["sectors"]}
+    assert [sector["sector"] for sector in stats["sectors"]] == ["반도체", "금융", "기타"]
+
+    prev = {r["symbol"]: r["market_cap"] / (1 + r["change_rate"] / 100) for r in RECORDS}
+    move_a = sum(RECORDS[i]["market_cap"] - prev[s] for i, s in enumerate(["A1", "A2"]))
+    assert sectors["반도체"]["change_rate"] == pytest.approx(move_a / (prev["A1"] + prev["A2"]) * 100, abs=0.01)
+    assert (sectors["반도체"]["advancers"], sectors["반도체"]["decliners"]) == (1, 1)
+    assert sectors["금융"]["unchanged"] == 1
+    assert sum(sector["contribution"] for sector in stats["sectors"]) == pytest.approx(stats["index"]["change_rate"], abs=0.01)
+    assert stats["index"]["count"] == 4
+
+def test_sparkline_uses_fixed_shares():
+    stats = compute_sector_stats(RECORDS)
+    sectors = {sector["sector"]: sector for sector in stats["sectors"]}
+    # 반도체: 과거 → 오늘 시총 = 90×1000 + 52×2000, 100×1000 + 51×2000, 110×1000 + 50×2000
+    assert sectors["반도체"]["sparkline"] == [100.0, round(202_000 / 194_000 * 100, 2), round(210_000 / 194_000 * 100, 2)]
+    assert stats["index"]["sparkline"][0] == 100.0 and len(stats["index"]["sparkline"]) == 3
+
+def test_sparkline_aligns_on_common_trailing_window():
+    # 한 종목만 일봉이 더 길어도 다른 종목이 빠지지 않고, 모든 종목이 있는 최근 3일로 맞춤
+    records = [dict(RECORDS[0], history=[110, 100, 90, 80, 70])] + RECORDS[1:] + [stock("D1", "금융", 5, 0.0, [])]
+    stats = compute_sector_stats(records)
+    expected = compute_sector_stats(RECORDS)
+    sectors = {sector["sector"]: sector["sparkline"] for sector in stats["sectors"]}
+    assert sectors == {sector["sector"]: sector["sparkline"] for sector in expected["sectors"]}
+    assert stats["index"]["sparkline"] == expected["index"]["sparkline"]
+
+def test_empty_and_missing_history():
+    assert compute_sector_stats([]) == {"index": None, "sectors": []}
+    stats = compute_sector_stats([stock("A1", "반도체", 110, 1.0, [])])
+    assert stats["index"]["sparkline"] == [] and stats["sectors"][0]["sparkline"] == []